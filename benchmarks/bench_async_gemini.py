@@ -0,0 +1,101 @@
+"""Load benchmark: blocking threadpool route vs. async Gemini route.
+
+Runs both paths in-process against a stub model with fixed latency, so no
+network or API key is needed:
+
+    python benchmarks/bench_async_gemini.py --requests 400 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import types as pytypes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+
+import services
+from providers import PROVIDERS, get_client
+from main import app
+
+STUB_ANALYSIS = json.dumps({
+    "description_summary": "Build and maintain web services.",
+    "requirements": ["3+ years of Python"],
+    "required_skills": ["Python", "FastAPI"],
+})
+
+
+class _StubResponse:
+    text = STUB_ANALYSIS
+
+
+def make_stub_client(latency: float):
+    """Stand-in for genai.Client exposing both the blocking and async surfaces."""
+    def generate_content(**kwargs):
+        time.sleep(latency)
+        return _StubResponse()
+
+    async def generate_content_async(**kwargs):
+        await asyncio.sleep(latency)
+        return _StubResponse()
+
+    return pytypes.SimpleNamespace(
+        models=pytypes.SimpleNamespace(generate_content=generate_content),
+        aio=pytypes.SimpleNamespace(models=pytypes.SimpleNamespace(generate_content=generate_content_async)),
+    )
+
+
+def make_legacy_app() -> FastAPI:
+    """The previous sync route shape: a `def` endpoint calling the blocking client."""
+    legacy = FastAPI()
+
+    @legacy.post("/analysis/job")
+    def analyze_job(request: dict):
+        response = get_client("gemini").models.generate_content(
+            model=services.ANALYSIS_MODEL, contents=request["job_description"], config=None
+        )
+        return json.loads(response.text)
+
+    return legacy
+
+
+async def run_load(target_app, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=target_app)
+    limit = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            async with limit:
+                # Unique descriptions so the analysis cache never short-circuits the call
+                response = await client.post("/analysis/job", json={"job_description": f"posting {i} {time.time()}"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub model latency in seconds")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="per-model Gemini semaphore size")
+    args = parser.parse_args()
+
+    PROVIDERS["gemini"].override(make_stub_client(args.latency))
+    services.GEMINI_MAX_CONCURRENCY = args.max_concurrency
+    services.analysis_cache.clear()
+
+    for name, target in (("sync threadpool", make_legacy_app()), ("async", app)):
+        elapsed = asyncio.run(run_load(target, args.requests, args.concurrency))
+        print(f"{name:>16}: {args.requests} requests in {elapsed:6.2f}s "
+              f"-> {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""End-to-end throughput/latency benchmark for every router, fully offline.
+
+Generation runs on the stub LLM backend (llm.py) and JSearch on the in-process fake
+(benchmarks/fake_jsearch.py), so the numbers measure our own overhead plus the
+configured upstream latency:
+
+    python benchmarks/bench_endpoints.py --requests 200 --concurrency 50 --latency 0.2
+    python benchmarks/bench_endpoints.py --only scores learning --latency 0
+
+Payloads are unique per request so caches do not short-circuit generation; pass
+--repeat-payloads to measure the cache-hit paths instead.
+
+In-process runs go through httpx.ASGITransport, which buffers whole responses, so time to
+first byte is only reported against a live server started with the same backends:
+
+    LLM_BACKEND=stub JSEARCH_BASE_URL=http://127.0.0.1:9100 uvicorn main:app --port 8000
+    python benchmarks/bench_endpoints.py --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def configure_environment(latency: float, workdir: str) -> None:
+    """Must run before the app is imported: backends and stores are chosen at import time."""
+    os.environ.setdefault("LLM_BACKEND", "stub")
+    os.environ["LLM_STUB_LATENCY_SECONDS"] = str(latency)
+    os.environ.setdefault("FAKE_JSEARCH_LATENCY", str(latency))
+    os.environ.setdefault("JSEARCH_BASE_URL", "http://fake-jsearch")
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+    for name, filename in (("JOB_STORE_PATH", "jobs.sqlite3"), ("TASK_STORE_PATH", "tasks.sqlite3"),
+                           ("AUDIO_CACHE_DIR", "audio_cache"), ("JOB_INDEX_DIR", "job_index")):
+        os.environ.setdefault(name, os.path.join(workdir, filename))
+
+
+JOB_DESCRIPTION = (
+    "Responsibilities:\n- Build Python and FastAPI services\n- Write SQL against PostgreSQL\n"
+    "Requirements:\n- Git, Docker and REST APIs\n- Strong communication skills\n"
+)
+RESUME = "Intern at Acme. Built React dashboards and Python data pipelines; used Docker and PostgreSQL."
+
+
+def scenarios(fixtures: dict, repeat: bool):
+    """name -> (method, path, payload factory taking the request index)."""
+    def tag(i: int) -> str:
+        return "" if repeat else f"\nReference {i}-{time.time_ns()}"
+
+    def answered(i: int) -> dict:
+        question_set = fixtures["question_set"]
+        questions = [dict(q, user_response=f"My answer {'' if repeat else i} to {q['text']}") for q in question_set["questions"]]
+        return {"question_set": dict(question_set, questions=questions)}
+
+    return {
+        "jobs": ("GET", "/jobs?query=python&num_pages=1", None),
+        "jobs_stream": ("GET", "/jobs/stream?query=python&num_pages=3&format=ndjson&description=truncate", None),
+        "analysis": ("POST", "/analysis/job", lambda i: {"job_description": JOB_DESCRIPTION + tag(i)}),
+        "analysis_batch": ("POST", "/analysis/jobs:batch",
+                           lambda i: {"items": [{"job_description": JOB_DESCRIPTION + tag(i * 10 + k)} for k in range(5)]}),
+        "questions": ("POST", "/questions?use_pool=false", lambda i: {
+            "job_description": JOB_DESCRIPTION + tag(i), "job_title": "Backend Intern", "resume": RESUME}),
+        "questions_pool": ("POST", "/questions", lambda i: {
+            "job_description": JOB_DESCRIPTION, "job_title": "Backend Intern", "resume": RESUME + tag(i)}),
+        "scores": ("POST", "/scores", answered),
+        "learning": ("POST", "/learning", lambda i: dict(fixtures["learning"], budget_hours=10 + (0 if repeat else i))),
+        "coach": ("POST", "/coach/guide", lambda i: {
+            "main_question": "Tell me about a hard bug.", "new_user_query": "How do I start?" + tag(i)}),
+        "coach_stream": ("POST", "/coach/guide?stream=true", lambda i: {
+            "main_question": "Tell me about a hard bug.", "new_user_query": "How do I start?" + tag(i)}),
+    }
+
+
+async def build_fixtures(client) -> dict:
+    response = await client.post("/questions?use_pool=false", json={
+        "job_description": JOB_DESCRIPTION, "job_title": "Backend Intern", "resume": RESUME})
+    response.raise_for_status()
+    question_set = response.json()
+    for question in question_set["questions"]:
+        question["user_response"] = "A reasonable answer."
+    report = (await client.post("/scores", json={"question_set": question_set})).json()
+    scored = (await client.post("/scores/learning-input", json={"question_set": question_set, "score_report": report})).json()
+    return {"question_set": question_set, "learning": {"scored_report": scored}}
+
+
+async def run_scenario(client, method: str, path: str, payload, total: int, concurrency: int):
+    limit = asyncio.Semaphore(concurrency)
+    latencies, first_bytes, errors = [], [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with limit:
+            start = time.perf_counter()
+            async with client.stream(method, path, json=payload(i) if payload else None) as response:
+                first = None
+                async for _ in response.aiter_bytes():
+                    first = first or time.perf_counter()
+                end = time.perf_counter()
+            if response.status_code >= 400:
+                errors += 1
+            latencies.append(end - start)
+            first_bytes.append((first or end) - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, latencies, first_bytes, errors
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_all(client, args, show_ttfb: bool) -> None:
+    fixtures = await build_fixtures(client)
+    print(f"stub latency {args.latency * 1000:.0f} ms, {args.requests} requests per endpoint, "
+          f"concurrency {args.concurrency}")
+    print(f"{'endpoint':>16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + (f" {'ttfb p50':>9}" if show_ttfb else "") + f" {'errors':>7}")
+    for name, (method, path, payload) in scenarios(fixtures, args.repeat_payloads).items():
+        if args.only and name not in args.only:
+            continue
+        elapsed, latencies, first_bytes, errors = await run_scenario(
+            client, method, path, payload, args.requests, args.concurrency)
+        print(f"{name:>16} {args.requests / elapsed:8.1f} {statistics.median(latencies) * 1000:8.1f} "
+              f"{percentile(latencies, 0.95) * 1000:8.1f} {percentile(latencies, 0.99) * 1000:8.1f}"
+              + (f" {statistics.median(first_bytes) * 1000:9.1f}" if show_ttfb else "") + f" {errors:>7}")
+
+
+async def main_async(args) -> None:
+    import httpx
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None,
+                                     limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            await run_all(client, args, show_ttfb=True)
+        return
+
+    from benchmarks import fake_jsearch
+    from jsearch import jsearch_client
+    from main import app
+
+    # Route JSearch traffic to the fake app in-process instead of over the network
+    jsearch_client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_jsearch.app),
+                                               base_url="http://fake-jsearch")
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await run_all(client, args, show_ttfb=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM and fake JSearch latency (s)")
+    parser.add_argument("--only", nargs="*", help="endpoint names to run (default: all)")
+    parser.add_argument("--url", help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--repeat-payloads", action="store_true", help="identical payloads, to measure cache hits")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(args.latency, workdir)
+        asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark POST /match scoring (matching.py) in pairs per second, on one core and without the HTTP layer.
+
+Jobs come from the fake JSearch generator with varied skills; "stored" jobs are fetched-and-indexed
+ones referenced by job_id (vectors come from the job index), "inline" jobs send their description:
+
+    python benchmarks/bench_match.py --jobs 1000 --resumes 1000 --iterations 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def configure_environment(workdir: str) -> None:
+    """Must run before the stores are imported: their paths are read at import time."""
+    os.environ.setdefault("JOB_STORE_PATH", os.path.join(workdir, "jobs.sqlite3"))
+    os.environ.setdefault("JOB_INDEX_DIR", os.path.join(workdir, "job_index"))
+
+
+def timed(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--resumes", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    configure_environment(tempfile.mkdtemp(prefix="bench_match_"))
+
+    from benchmarks.fake_jsearch import make_job
+    from job_index import job_index
+    from job_store import job_store
+    from matching import job_profiles, match_resumes
+    from models import MatchJob, MatchResume
+    from services import _to_raw_job
+    from skills import SKILL_ALIASES
+
+    rng = random.Random(0)
+    names = list(SKILL_ALIASES)
+    jobs = [_to_raw_job(make_job(", ".join(rng.sample(names, 6)), 1 + index // 10, index % 10))
+            for index in range(args.jobs)]
+    job_store.upsert_jobs(jobs)
+    job_index.add_jobs(jobs)
+    resumes = [
+        MatchResume(resume_id=f"r{index}", resume=f"Engineer experienced with {', '.join(rng.sample(names, 8))}. "
+                                                  "Built and shipped production services end to end. " * 5)
+        for index in range(args.resumes)
+    ]
+    stored = [MatchJob(job_id=job.job_id) for job in jobs]
+    inline = [MatchJob(job_title=job.job_title, job_description=job.job_description) for job in jobs]
+
+    cases = {
+        f"1 resume x {len(jobs)} stored jobs": lambda: match_resumes(resumes[:1], job_profiles(stored)),
+        f"1 resume x {len(jobs)} inline jobs": lambda: match_resumes(resumes[:1], job_profiles(inline)),
+        f"{len(resumes)} resumes x 1 stored job": lambda: match_resumes(resumes, job_profiles(stored[:1])),
+        "100 resumes x 100 stored jobs, top 20": lambda: match_resumes(resumes[:100], job_profiles(stored[:100]), 20),
+    }
+    pairs = {name: int(name.split(" x ")[0].split()[0]) * int(name.split(" x ")[1].split()[0]) for name in cases}
+    print(f"{'case':>38} {'ms':>9} {'pairs/s':>10}")
+    for name, case in cases.items():
+        seconds = timed(case, args.iterations)
+        print(f"{name:>38} {seconds * 1e3:9.1f} {pairs[name] / seconds:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark response serialization: FastAPI's response_model pipeline vs the fast path in responses.py.
+
+The default path dumps the returned model, re-validates it against the response_model and
+encodes the result with json.dumps; the fast path encodes the trusted instance once in pydantic-core:
+
+    python benchmarks/bench_serialization.py --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.fake_jsearch import make_job
+from llm import _stub_question_grade, _stub_question_set, _stub_recommendation_report
+from models import QuestionGrade, QuestionSet, RawJob, RecommendationReport, ScoreReport
+from responses import render_json
+from scoring import evaluation_from_grade, overall_stats
+from services import _to_raw_job
+
+PROMPT = 'Create a complete QuestionSet JSON for the role "Backend Intern" with difficulty "medium"'
+
+
+def build_payloads(num_jobs: int):
+    rng = random.Random(0)
+    jobs = [_to_raw_job(make_job("python", 1 + index // 10, index % 10)) for index in range(num_jobs)]
+    question_set = QuestionSet.model_validate(_stub_question_set(PROMPT, rng))
+    for question in question_set.questions:
+        question.user_response = "I would use a hash map keyed on the complement. " * 10
+    items = [evaluation_from_grade(question, QuestionGrade.model_validate(_stub_question_grade(
+        question.model_dump_json(), rng))) for question in question_set.questions]
+    score_report = ScoreReport(job_title=question_set.job_title, overall_summary="Scored 10 of 10 questions.",
+                               items=items, overall=overall_stats(items))
+    report = RecommendationReport.model_validate(_stub_recommendation_report(PROMPT, rng))
+    return {
+        f"List[RawJob] x{num_jobs}": (List[RawJob], jobs),
+        "QuestionSet": (QuestionSet, question_set),
+        "ScoreReport": (ScoreReport, score_report),
+        "RecommendationReport": (RecommendationReport, report),
+    }
+
+
+async def default_body(field, content) -> bytes:
+    """What a route with a response_model does with a returned model."""
+    serialized = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(serialized).body
+
+
+async def time_default(field, content, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await default_body(field, content)
+    return (time.perf_counter() - start) / iterations
+
+
+def time_fast(annotation, content, iterations: int) -> float:
+    is_list = isinstance(content, list)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render_json(content, annotation if is_list else None)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main_async(args) -> None:
+    print(f"{'response model':>22} {'bytes':>8} {'default us':>11} {'fast us':>9} {'speedup':>8}")
+    for name, (annotation, content) in build_payloads(args.jobs).items():
+        field = create_model_field(name=f"Response_{name}", type_=annotation, mode="serialization")
+        default = await default_body(field, content)
+        fast = render_json(content, annotation if isinstance(content, list) else None)
+        assert json.loads(default) == json.loads(fast), f"{name}: fast path output differs"
+        default_seconds = await time_default(field, content, args.iterations)
+        fast_seconds = time_fast(annotation, content, args.iterations)
+        print(f"{name:>22} {len(fast):8d} {default_seconds * 1e6:11.1f} {fast_seconds * 1e6:9.1f} "
+              f"{default_seconds / fast_seconds:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=50, help="jobs in the List[RawJob] payload")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark cold start of a worker: import of main, app startup plus first request, and first provider use.
+
+Each run is a fresh interpreter, like a newly autoscaled uvicorn worker:
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter; prints one JSON line of timings in seconds
+CHILD = r"""
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/")
+    first_request = time.perf_counter()
+    timings = {"import": imported - start, "first_request": first_request - imported}
+    try:
+        from providers import get_client
+    except ImportError:  # trees without the provider registry build clients at import
+        pass
+    else:
+        for name in ("gemini", "elevenlabs"):
+            provider_start = time.perf_counter()
+            get_client(name)
+            timings[f"first_{name}"] = time.perf_counter() - provider_start
+print(json.dumps(timings))
+"""
+
+
+def run_once(workdir: str) -> dict:
+    env = dict(
+        os.environ,
+        GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "benchmark"),
+        ELEVENLABS_API_KEY=os.environ.get("ELEVENLABS_API_KEY", "benchmark"),
+        CACHE_BACKEND="memory",
+        JOB_STORE_PATH=os.path.join(workdir, "jobs.sqlite3"),
+        TASK_STORE_PATH=os.path.join(workdir, "tasks.sqlite3"),
+        AUDIO_CACHE_DIR=os.path.join(workdir, "audio_cache"),
+        PYTHONPATH=ROOT,
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=workdir, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        run_once(workdir)  # warm the OS file cache and .pyc files so runs are comparable
+        for _ in range(args.runs):
+            runs.append(run_once(workdir))
+
+    for key in runs[0]:
+        values = [run[key] * 1000 for run in runs]
+        print(f"{key:>18}: median {statistics.median(values):7.1f} ms  "
+              f"min {min(values):7.1f} ms  max {max(values):7.1f} ms")
+    boot = [(run["import"] + run["first_request"]) * 1000 for run in runs]
+    print(f"{'import + request':>18}: median {statistics.median(boot):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark the job-description pre-processing stage: token reduction and time per document.
+
+Uses a generated corpus of scraped-style postings by default, or real ones:
+
+    python benchmarks/bench_textprep.py --docs 500
+    python benchmarks/bench_textprep.py --corpus jobs.ndjson   # e.g. saved from GET /jobs/stream
+    python benchmarks/bench_textprep.py --corpus postings/     # directory of .txt files
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textprep import _CORE_PRIORITY, JD_TOKEN_BUDGET, estimate_tokens, normalize, prepare_job_description, split_sections
+
+ROLE = [
+    "<p><b>About the Role</b></p><p>We are looking for a {title} to join our {team} team and build the services behind our {product}.</p>",
+    "ABOUT THE ROLE\nAs a {title} you will design, ship and operate features for our {product} used by millions.",
+]
+RESPONSIBILITIES = [
+    "What You'll Do:\n• Build and maintain {stack} services\n• Write tests and review code\n• Partner with product and design on new features\n• Participate in on-call rotation",
+    "<h3>Responsibilities</h3><ul><li>Develop REST APIs in {stack}</li><li>Improve performance and reliability</li><li>Mentor interns</li></ul>",
+    # Duties that mention boilerplate keywords must survive the filter
+    "Responsibilities:\n- Build {stack} models that flag fraudulent transactions\n- Own the background check integration for merchant onboarding\n- Detect abuse of employee benefits and privacy policy violations",
+]
+REQUIREMENTS = [
+    "Requirements:\n- {years}+ years of experience with {stack}\n- Solid grasp of data structures and algorithms\n- Experience with SQL databases and cloud platforms\n- Strong communication skills",
+    "<h3>Qualifications</h3><ul><li>BS in Computer Science or equivalent</li><li>Experience with {stack} and Git</li><li>Familiarity with CI/CD</li></ul>",
+]
+NICE = ["Nice to have:\n- Kubernetes\n- GraphQL\n- Open-source contributions"]
+COMPANY = [
+    "About Us:\n{company} is a fast-growing company on a mission to make {product} accessible to everyone. " * 3,
+    "<p><b>Who we are</b></p><p>Founded in 2012, {company} serves customers in 40 countries. Our culture values ownership, curiosity and kindness.</p>" * 2,
+]
+BENEFITS = [
+    "Benefits:\n- Medical, dental and vision insurance\n- 401(k) with company match\n- Unlimited PTO\n- Commuter benefits\n- Wellness stipend\n- Parental leave",
+    "<h3>What we offer</h3><ul><li>Competitive salary and equity</li><li>Health insurance</li><li>Learning budget</li><li>Home office stipend</li></ul>",
+]
+EEO = [
+    "{company} is an Equal Opportunity Employer. All qualified applicants will receive consideration for employment without regard to race, color, religion, sex, sexual orientation, gender identity, national origin, disability, or protected veteran status.",
+    "We provide reasonable accommodation to applicants with disabilities. This employer participates in E-Verify. Please beware of fraudulent recruiting scams.",
+    "Pay Transparency Nondiscrimination Provision: we will not discharge or discriminate against employees who inquire about pay.",
+]
+
+
+def generate_posting(rng: random.Random) -> str:
+    fields = {
+        "title": rng.choice(["Software Engineer", "Backend Developer", "Full Stack Engineer", "Data Engineer"]),
+        "team": rng.choice(["Payments", "Platform", "Growth", "Search"]),
+        "product": rng.choice(["banking app", "logistics platform", "health records system"]),
+        "stack": rng.choice(["Python/Django", "TypeScript/Node.js", "Java/Spring", "Go"]),
+        "years": rng.choice([1, 2, 3, 5]),
+        "company": rng.choice(["Acme Corp", "Globex", "Initech", "Umbrella"]),
+    }
+    parts = [rng.choice(ROLE), rng.choice(RESPONSIBILITIES), rng.choice(REQUIREMENTS)]
+    if rng.random() < 0.6:
+        parts.append(rng.choice(NICE))
+    parts += [rng.choice(COMPANY), rng.choice(BENEFITS)] + rng.sample(EEO, rng.randint(1, 3))
+    text = "\n\n".join(part.format(**fields) for part in parts)
+    # Scraped text often carries runs of whitespace and entities
+    return text.replace(" ", "  " if rng.random() < 0.3 else " ").replace("&", "&amp;")
+
+
+def load_corpus(path: str) -> list:
+    if os.path.isdir(path):
+        docs = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".txt"):
+                with open(os.path.join(path, name), encoding="utf-8") as f:
+                    docs.append(f.read())
+        return docs
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line).get("job_description") or "" for line in f if line.strip()]
+
+
+def core_sections_lost(doc: str, prepared: str) -> int:
+    """Responsibilities/requirements sections of `doc` none of whose lines made it into `prepared`."""
+    lost = 0
+    for priority, section in split_sections(normalize(doc)):
+        body = [line for line in section.split("\n")[1:] if line.strip()]
+        if priority == _CORE_PRIORITY and body and not any(line in prepared for line in body):
+            lost += 1
+    return lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="NDJSON of RawJob records or a directory of .txt postings")
+    parser.add_argument("--docs", type=int, default=500, help="generated postings when no corpus is given")
+    parser.add_argument("--budget", type=int, default=JD_TOKEN_BUDGET, help="token budget per posting")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus:
+        docs = [doc for doc in load_corpus(args.corpus) if doc]
+    else:
+        rng = random.Random(args.seed)
+        docs = [generate_posting(rng) for _ in range(args.docs)]
+
+    before, after, timings = [], [], []
+    lost = 0
+    for doc in docs:
+        start = time.perf_counter()
+        prepared = prepare_job_description(doc, token_budget=args.budget)
+        timings.append(time.perf_counter() - start)
+        before.append(estimate_tokens(doc))
+        after.append(estimate_tokens(prepared))
+        lost += core_sections_lost(doc, prepared)
+
+    reductions = [1 - a / b for a, b in zip(after, before)]
+    print(f"documents:            {len(docs)}")
+    print(f"tokens before/after:  {sum(before)} -> {sum(after)} "
+          f"({(1 - sum(after) / sum(before)) * 100:.1f}% fewer)")
+    print(f"per-doc reduction:    median {statistics.median(reductions) * 100:.1f}%, "
+          f"min {min(reductions) * 100:.1f}%, max {max(reductions) * 100:.1f}%")
+    print(f"time per document:    mean {statistics.mean(timings) * 1e3:.3f} ms, "
+          f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1e3:.3f} ms")
+    print(f"core sections lost:   {lost}")
+    if lost:
+        sys.exit("responsibilities/requirements sections were dropped")
+
+
+if __name__ == "__main__":
+    main()
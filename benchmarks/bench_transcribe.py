@@ -0,0 +1,104 @@
+"""Benchmark single-shot vs. chunked parallel transcription against a stub STT backend.
+
+Generates speech-like WAV recordings (tone bursts separated by pauses) and a stub whose
+latency grows with audio length, like a real STT call, so no network or API key is needed:
+
+    python benchmarks/bench_transcribe.py --minutes 1 3 5 --rtf 0.05 --concurrency 4
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+import types
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.concurrency import run_in_threadpool
+
+from transcription import STT_SEGMENT_SECONDS, split_wav, transcribe_chunked
+
+RATE = 16000
+
+
+def generate_recording(seconds: float, rng: np.random.Generator):
+    """Int16 mono WAV of 2-8s utterances and 0.4-1.2s pauses; returns (wav bytes, utterance spans)."""
+    chunks, spans, position = [], [], 0.0
+    while position < seconds:
+        talk = min(rng.uniform(2, 8), seconds - position)
+        t = np.arange(int(talk * RATE)) / RATE
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 5) * t) ** 2
+        chunks.append(np.sin(2 * np.pi * rng.uniform(120, 250) * t) * envelope * 8000 + rng.normal(0, 300, len(t)))
+        spans.append((position, position + talk))
+        position += talk
+        pause = rng.uniform(0.4, 1.2)
+        chunks.append(rng.normal(0, 80, int(pause * RATE)))
+        position += pause
+    samples = np.clip(np.concatenate(chunks), -32768, 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(RATE)
+        out.writeframes(samples.tobytes())
+    return buffer.getvalue(), spans
+
+
+def make_stub(base: float, rtf: float):
+    """Blocking STT stand-in: sleeps base + rtf * duration and returns one word per second of audio."""
+    def convert(upload):
+        _, fileobj, _ = upload
+        with wave.open(fileobj, "rb") as wav:
+            duration = wav.getnframes() / wav.getframerate()
+        time.sleep(base + rtf * duration)
+        words = [
+            {"text": f"w{i}", "type": "word", "start": float(i), "end": i + 0.8, "speaker_id": "speaker_0"}
+            for i in range(int(duration))
+        ]
+        return types.SimpleNamespace(text=" ".join(w["text"] for w in words), language_code="eng", words=words)
+
+    return convert
+
+
+async def run(minutes: float, args, rng: np.random.Generator) -> None:
+    data, spans = generate_recording(minutes * 60, rng)
+    stub = make_stub(args.base, args.rtf)
+
+    start = time.perf_counter()
+    await run_in_threadpool(stub, ("recording.wav", io.BytesIO(data), "audio/wav"))
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = await transcribe_chunked(io.BytesIO(data), stub, args.segment_seconds, args.concurrency)
+    chunked = time.perf_counter() - start
+
+    segments = split_wav(io.BytesIO(data), args.segment_seconds)
+    cuts = [segment.start for segment in segments[1:]]
+    in_speech = sum(any(s + 0.05 < cut < e - 0.05 for s, e in spans) for cut in cuts)
+    starts = [word["start"] for word in result["words"]]
+    print(f"{minutes:>4g} min  segments {len(segments):>3}  single-shot {single:6.2f}s  "
+          f"chunked {chunked:6.2f}s  speedup {single / chunked:4.1f}x  "
+          f"cuts inside speech {in_speech}/{len(cuts)}  timestamps ordered {starts == sorted(starts)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--base", type=float, default=0.3, help="fixed stub latency per call (s)")
+    parser.add_argument("--rtf", type=float, default=0.05, help="stub latency per second of audio")
+    parser.add_argument("--segment-seconds", type=float, default=STT_SEGMENT_SECONDS)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for minutes in args.minutes:
+        await run(minutes, args, rng)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
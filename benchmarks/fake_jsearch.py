@@ -0,0 +1,56 @@
+"""Local stand-in for the JSearch /search endpoint.
+
+Serves deterministic postings with configurable latency and rate limiting, so
+the JSearch client can be exercised without RapidAPI:
+
+    uvicorn benchmarks.fake_jsearch:app --port 9100
+    JSEARCH_BASE_URL=http://127.0.0.1:9100 uvicorn main:app
+
+Environment: FAKE_JSEARCH_LATENCY (seconds per page), FAKE_JSEARCH_PAGE_SIZE,
+FAKE_JSEARCH_RATE_LIMIT_EVERY (answer every Nth request with 429, 0 disables).
+"""
+import asyncio
+import itertools
+import os
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+LATENCY_SECONDS = float(os.getenv("FAKE_JSEARCH_LATENCY", "0.2"))
+PAGE_SIZE = int(os.getenv("FAKE_JSEARCH_PAGE_SIZE", "10"))
+RATE_LIMIT_EVERY = int(os.getenv("FAKE_JSEARCH_RATE_LIMIT_EVERY", "0"))
+
+app = FastAPI(title="Fake JSearch")
+_request_counter = itertools.count(1)
+
+
+def make_job(query: str, page: int, index: int) -> dict:
+    return {
+        "job_id": f"fake-{page}-{index}",
+        "job_title": f"Software Engineer {page}.{index}",
+        "employer_name": f"Employer {index % 7}",
+        "job_description": f"Work on {query}. " + "We build reliable Python and TypeScript services. " * 40,
+        "job_city": "New York",
+        "job_state": "NY",
+        "job_apply_link": f"https://jobs.example.com/{page}/{index}",
+        "job_employment_type": "FULLTIME",
+        "job_salary_min": 90000.0 + index * 1000,
+        "job_salary_max": 130000.0 + index * 1000,
+        "job_salary_currency": "USD",
+        "job_salary_period": "YEAR",
+    }
+
+
+@app.get("/search")
+async def search(query: str = "", page: int = 1, num_pages: int = 1):
+    if RATE_LIMIT_EVERY and next(_request_counter) % RATE_LIMIT_EVERY == 0:
+        return JSONResponse(status_code=429, content={"message": "Too many requests"}, headers={"Retry-After": "0.1"})
+
+    # Upstream serves multi-page requests sequentially
+    await asyncio.sleep(LATENCY_SECONDS * num_pages)
+    data = [
+        make_job(query, p, i)
+        for p in range(page, page + num_pages)
+        for i in range(PAGE_SIZE)
+    ]
+    return {"status": "OK", "data": data}
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import weakref
+from typing import List, Optional
+
+from cache import create_cache
+from models import CoachSession, CoachTurn, GuidanceRequest
+from textprep import estimate_tokens
+
+COACH_SESSION_BACKEND = os.getenv("COACH_SESSION_BACKEND", "memory")  # "memory" or "sqlite"
+COACH_SESSION_TTL_SECONDS = float(os.getenv("COACH_SESSION_TTL_SECONDS", "7200"))
+COACH_SESSION_MAX_SESSIONS = int(os.getenv("COACH_SESSION_MAX_SESSIONS", "10000"))
+COACH_HISTORY_TOKEN_BUDGET = int(os.getenv("COACH_HISTORY_TOKEN_BUDGET", "800"))
+COACH_WINDOW_TURNS = int(os.getenv("COACH_WINDOW_TURNS", "4"))
+
+# Idle sessions expire after the TTL; the least recently used are evicted past the cap
+session_store = create_cache(
+    "coach_sessions",
+    backend=COACH_SESSION_BACKEND,
+    max_entries=COACH_SESSION_MAX_SESSIONS,
+    ttl=COACH_SESSION_TTL_SECONDS,
+)
+# Serialises turn recording per session within this process; entries go away with their last user
+_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def get_session(session_id: str) -> Optional[CoachSession]:
+    data = session_store.get(session_id)
+    return CoachSession.model_validate_json(data) if data is not None else None
+
+
+def save_session(session: CoachSession) -> None:
+    session_store.set(session.session_id, session.model_dump_json())
+
+
+def start_session(request: GuidanceRequest) -> Optional[CoachSession]:
+    """Start a session if the client asked for one, seeding it with any legacy history_str it sent.
+
+    Legacy calls that don't opt in stay stateless, so they don't leave unused sessions behind.
+    """
+    if not request.start_session:
+        return None
+    session = CoachSession(main_question=request.main_question, summary=request.history_str.strip())
+    save_session(session)
+    return session
+
+
+def session_lock(session_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+
+def append_turn(session: CoachSession, turn: CoachTurn) -> CoachSession:
+    """Append a turn to the stored session in one atomic update and return the stored result.
+
+    Turns recorded meanwhile by other requests (or workers) are kept; a session that expired
+    in the meantime is re-saved from `session`.
+    """
+    def append(data: Optional[str]) -> str:
+        stored = CoachSession.model_validate_json(data) if data is not None else session
+        stored.turns.append(turn)
+        return stored.model_dump_json()
+
+    return CoachSession.model_validate_json(session_store.update(session.session_id, append))
+
+
+def compact_turns(session_id: str, older: List[CoachTurn], summary: str) -> None:
+    """Replace the `older` leading turns with `summary`, unless another compaction already did."""
+    def compact(data: Optional[str]) -> Optional[str]:
+        if data is None:
+            return None
+        stored = CoachSession.model_validate_json(data)
+        if stored.turns[:len(older)] == older:
+            stored.turns = stored.turns[len(older):]
+            stored.summary = summary
+        return stored.model_dump_json()
+
+    session_store.update(session_id, compact)
+
+
+def history_text(session: CoachSession) -> str:
+    """Render the compacted summary plus the recent window of turns for the prompt."""
+    lines = []
+    if session.summary:
+        lines.append(f"Summary of earlier discussion: {session.summary}")
+    for turn in session.turns:
+        lines.append(f"User: {turn.user}")
+        lines.append(f"Coach: {turn.coach}")
+    return "\n".join(lines)
+
+
+def needs_compaction(session: CoachSession) -> bool:
+    return (
+        len(session.turns) > COACH_WINDOW_TURNS
+        and estimate_tokens(history_text(session)) > COACH_HISTORY_TOKEN_BUDGET
+    )
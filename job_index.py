@@ -0,0 +1,338 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from job_store import job_store
+from models import JobAnalysis, RawJob
+from skills import canonical_skill, extract_skills
+
+JOB_INDEX_ENABLED = os.getenv("JOB_INDEX_ENABLED", "1") == "1"
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", "job_index")  # shared by workers: SQLite metadata plus a vector file
+JOB_INDEX_DIM = int(os.getenv("JOB_INDEX_DIM", "1024"))  # hashed features per job vector
+
+_SKILL_WEIGHT = 3.0  # a skill counts as much as a word mentioned about 7 times
+_TITLE_REPEAT = 3  # title words count as if repeated this often in the description
+_MIN_ROWS = 1024
+_WORD = re.compile(r"[a-z][a-z0-9+#]+")
+_STOPWORDS = {
+    "and", "the", "for", "with", "you", "our", "are", "will", "from", "that", "this", "have", "your", "who",
+    "all", "can", "not", "their", "they", "has", "but", "was", "were", "what", "when", "which", "into", "out",
+    "about", "more", "other", "such", "must", "also", "any", "able", "work", "working", "experience", "team",
+    "role", "job", "years", "year", "including", "etc", "within", "across", "per", "may", "new", "well",
+}
+
+
+class IndexHit(NamedTuple):
+    job_id: str
+    score: float
+    similarity: float  # cosine of the hashed feature vectors
+    skill_coverage: Optional[float]  # share of the query's skills the job asks for, None without query skills
+    matched_skills: List[str]
+    missing_skills: List[str]  # the job's skills that the query lacks
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in _WORD.findall((text or "").lower()) if word not in _STOPWORDS]
+
+
+def _vectors(docs: Sequence[Tuple[Iterable[str], Counter]], dim: int) -> np.ndarray:
+    """L2-normalised signed feature-hashing vectors of (skills, word counts) docs, one row per doc.
+
+    Word counts are sublinear. crc32 rather than hash() so every worker maps a feature to the same
+    bucket; each distinct feature is hashed once per call and all rows are filled by one bincount.
+    """
+    buckets: Dict[str, int] = {}  # feature -> row offset of its bucket, negative for a negative sign
+    positions: List[int] = []
+    weights: List[float] = []
+    for row, (skills, words) in enumerate(docs):
+        features = [("s:" + skill, _SKILL_WEIGHT) for skill in skills]
+        features += [("w:" + word, 1.0 + math.log(count)) for word, count in words.items()]
+        for feature, weight in features:
+            bucket = buckets.get(feature)
+            if bucket is None:
+                hashed = zlib.crc32(feature.encode())
+                bucket = buckets[feature] = hashed % dim if hashed & 0x80000000 else -(hashed % dim) - 1
+            positions.append(row * dim + (bucket if bucket >= 0 else -bucket - 1))
+            weights.append(weight if bucket >= 0 else -weight)
+    vectors = np.bincount(np.array(positions, dtype=np.int64), weights=np.array(weights, dtype=np.float32),
+                          minlength=len(docs) * dim).astype(np.float32).reshape(len(docs), dim)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+def analysis_skills(analysis: JobAnalysis) -> Set[str]:
+    """Canonical skills an analysis lists, or mentions in its requirements."""
+    skills = {canonical_skill(skill) for skill in analysis.required_skills if skill.strip()}
+    return skills | extract_skills("\n".join(analysis.requirements))
+
+
+def job_skills(title: Optional[str], description: Optional[str], analysis: Optional[JobAnalysis] = None) -> Set[str]:
+    """Canonical skills of a job: found in its title and description, plus those its analysis lists."""
+    skills = extract_skills(f"{title or ''}\n{description or ''}")
+    return skills | analysis_skills(analysis) if analysis is not None else skills
+
+
+def _job_words(title: Optional[str], description: Optional[str]) -> Counter:
+    words = Counter(_words(description))
+    for word in _words(title):
+        words[word] += _TITLE_REPEAT
+    return words
+
+
+def job_vectors(docs: Sequence[Tuple[Iterable[str], Optional[str], Optional[str]]], dim: int) -> np.ndarray:
+    """Vectors of (skills, title, description) jobs, one row each."""
+    return _vectors([(skills, _job_words(title, description)) for skills, title, description in docs], dim)
+
+
+def query_vectors(docs: Sequence[Tuple[Iterable[str], Optional[str]]], dim: int) -> np.ndarray:
+    """Vectors of (skills, text) queries such as resumes, one row each."""
+    return _vectors([(skills, Counter(_words(text))) for skills, text in docs], dim)
+
+
+def query_vector(skills: Iterable[str], text: Optional[str], dim: int) -> np.ndarray:
+    return query_vectors([(skills, text)], dim)[0]
+
+
+def query_skills(skills: Iterable[str] = (), text: Optional[str] = None) -> Set[str]:
+    """Canonical skills of a query: the listed ones plus those mentioned in `text` (e.g. a resume)."""
+    return {canonical_skill(skill) for skill in skills if skill.strip()} | extract_skills(text or "")
+
+
+class JobIndex:
+    """Local search index over stored jobs, ranking them against a resume or skill list without any API call.
+
+    Each job is a row of hashed skill and word features in a float32 file mapped with np.memmap, so
+    workers share one copy through the page cache and ranking is a single matrix-vector product.
+    An SQLite table maps rows to job IDs and skill sets; a version number bumped on every write lets
+    each worker fold new and re-indexed jobs into its in-memory inverted index (skill and title word
+    -> rows) before answering a query. Jobs are indexed as they are fetched and re-indexed with the
+    skills of their analysis once one is stored.
+    """
+
+    def __init__(self, directory: str = JOB_INDEX_DIR, dim: int = JOB_INDEX_DIM, enabled: bool = JOB_INDEX_ENABLED):
+        self.directory = directory
+        self.dim = dim
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._vectors: Optional[np.memmap] = None
+        self._job_ids: List[Optional[str]] = []  # row -> job ID
+        self._rows: Dict[str, int] = {}  # job ID -> row
+        self._skills: List[frozenset] = []  # row -> canonical skills
+        self._titles: List[frozenset] = []  # row -> title words
+        self._postings: Dict[str, Set[int]] = {}  # "s:<skill>" / "t:<word>" -> rows
+        self._version = 0
+        self.searches = 0
+        self.indexed = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), check_same_thread=False,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                " row INTEGER PRIMARY KEY, job_id TEXT UNIQUE NOT NULL, skills TEXT NOT NULL,"
+                " title TEXT NOT NULL, version INTEGER NOT NULL, indexed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS docs_version ON docs (version)")
+            self._conn = conn
+        return self._conn
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, f"vectors_{self.dim}.f32")
+
+    def _map(self, rows: int) -> np.ndarray:
+        """The vector file mapped with room for at least `rows` rows, growing the file if needed."""
+        if self._vectors is not None and len(self._vectors) >= rows:
+            return self._vectors
+        row_bytes = self.dim * 4
+        path = self._vectors_path
+        with open(path, "ab") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < rows * row_bytes:
+                # Grown in place (zero-filled), so mappings held by other workers stay valid
+                size = max(rows * 2, _MIN_ROWS) * row_bytes
+                file.truncate(size)
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(size // row_bytes, self.dim))
+        return self._vectors
+
+    def _sync(self) -> None:
+        """Fold rows written since the last sync (by any worker) into the in-memory index."""
+        changed = self._connect().execute(
+            "SELECT row, job_id, skills, title, version FROM docs WHERE version > ? ORDER BY version",
+            (self._version,),
+        ).fetchall()
+        for row, job_id, skills, title, version in changed:
+            position = row - 1
+            if position >= len(self._job_ids):
+                grow = position + 1 - len(self._job_ids)
+                self._job_ids += [None] * grow
+                self._skills += [frozenset()] * grow
+                self._titles += [frozenset()] * grow
+            for key in self._keys(position):
+                self._postings[key].discard(position)
+            self._job_ids[position] = job_id
+            self._rows[job_id] = position
+            self._skills[position] = frozenset(filter(None, skills.split("\n")))
+            self._titles[position] = frozenset(title.split())
+            for key in self._keys(position):
+                self._postings.setdefault(key, set()).add(position)
+            self._version = version
+        if changed:
+            self._map(len(self._job_ids))
+
+    def _keys(self, position: int) -> List[str]:
+        return [f"s:{skill}" for skill in self._skills[position]] + [f"t:{word}" for word in self._titles[position]]
+
+    def add_jobs(self, jobs: Iterable[RawJob]) -> None:
+        """Index (or re-index) jobs, including the skills of any analysis stored for them."""
+        jobs = [job for job in jobs if job.job_id]
+        if not self.enabled or not jobs:
+            return
+        analyses = job_store.get_analyses([job.job_id for job in jobs])
+        found = [job_skills(job.job_title, job.job_description, analyses.get(job.job_id)) for job in jobs]
+        # One batched hashing pass for the whole page of jobs
+        vectors = job_vectors([(skills, job.job_title, job.job_description) for skills, job in zip(found, jobs)],
+                              self.dim)
+        docs = [(job.job_id, skills, " ".join(sorted(set(_words(job.job_title)))), vector)
+                for job, skills, vector in zip(jobs, found, vectors)]
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")  # serialises row allocation and versions across workers
+            try:
+                version = conn.execute("SELECT COALESCE(MAX(version), 0) FROM docs").fetchone()[0]
+                now = time.time()
+                written = []
+                for job_id, skills, title, vector in docs:
+                    version += 1
+                    conn.execute(
+                        "INSERT INTO docs (job_id, skills, title, version, indexed_at) VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT (job_id) DO UPDATE SET skills = excluded.skills, title = excluded.title,"
+                        " version = excluded.version, indexed_at = excluded.indexed_at",
+                        (job_id, "\n".join(sorted(skills)), title, version, now),
+                    )
+                    row = conn.execute("SELECT row FROM docs WHERE job_id = ?", (job_id,)).fetchone()[0]
+                    written.append((row - 1, vector))
+                # Vectors land before the commit, so a worker that sees a row's version also sees its vector
+                vectors = self._map(max(position for position, _ in written) + 1)
+                for position, vector in written:
+                    vectors[position] = vector
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self.indexed += len(docs)
+            self._sync()
+
+    def add_analysis(self, job: RawJob, analysis: JobAnalysis) -> None:
+        """Store a job's analysis and re-index the job with its skills."""
+        job_store.save_analysis(job.job_id, analysis)
+        self.add_jobs([job])
+
+    def backfill(self, batch_size: int = 500) -> int:
+        """Index stored jobs missing from the index (e.g. fetched before it existed); returns how many."""
+        if not self.enabled:
+            return 0
+        added = 0
+        for jobs in job_store.iter_jobs(batch_size):
+            with self._lock:
+                self._sync()
+                missing = [job for job in jobs if job.job_id not in self._rows]
+            self.add_jobs(missing)
+            added += len(missing)
+        return added
+
+    def search(self, skills: Iterable[str] = (), text: Optional[str] = None, title: Optional[str] = None,
+               limit: int = 20) -> List[IndexHit]:
+        """Jobs ranked against a skill list and/or free text such as a resume.
+
+        The score averages the vector similarity, the share of query skills the job asks for (when
+        there are any) and the share of `title` words in the job title (when given).
+        """
+        wanted = query_skills(skills, text)
+        title_words = set(_words(title))
+        vector = query_vector(wanted, text, self.dim)
+        with self._lock:
+            self.searches += 1
+            self._sync()
+            count = len(self._job_ids)
+            if not self.enabled or count == 0:
+                return []
+            similarity = np.maximum(self._vectors[:count] @ vector, 0.0)
+            parts = [similarity]
+            coverage = None
+            if wanted:
+                coverage = self._coverage([f"s:{skill}" for skill in wanted], count)
+                parts.append(coverage)
+            if title_words:
+                parts.append(self._coverage([f"t:{word}" for word in title_words], count))
+            # Unused rows have no vector or postings, so they score 0 and are dropped below
+            score = np.mean(parts, axis=0)
+            limit = min(limit, count)
+            top = np.argpartition(-score, limit - 1)[:limit]
+            top = top[np.argsort(-score[top], kind="stable")]
+            return [
+                IndexHit(
+                    job_id=self._job_ids[row],
+                    score=round(float(score[row]), 4),
+                    similarity=round(float(similarity[row]), 4),
+                    skill_coverage=None if coverage is None else round(float(coverage[row]), 4),
+                    matched_skills=sorted(wanted & self._skills[row]),
+                    missing_skills=sorted(self._skills[row] - wanted),
+                )
+                for row in top
+                if score[row] > 0
+            ]
+
+    def lookup(self, job_ids: Iterable[str]) -> Dict[str, Tuple[Set[str], np.ndarray]]:
+        """Skills and vector (a copy) of each indexed job among `job_ids`."""
+        found = {}
+        with self._lock:
+            if not self.enabled:
+                return found
+            self._sync()
+            for job_id in job_ids:
+                row = self._rows.get(job_id)
+                if row is not None:
+                    found[job_id] = (set(self._skills[row]), np.array(self._vectors[row]))
+        return found
+
+    def _coverage(self, keys: List[str], count: int) -> np.ndarray:
+        """Per row, the share of `keys` whose posting list contains it."""
+        hits = np.zeros(count, dtype=np.float32)
+        for key in keys:
+            rows = self._postings.get(key)
+            if rows:
+                hits[np.fromiter(rows, dtype=np.int64, count=len(rows))] += 1.0
+        return hits / len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self.enabled:
+                self._sync()
+            return {
+                "enabled": self.enabled,
+                "jobs": len(self._rows),
+                "dim": self.dim,
+                "skills": sum(1 for key, rows in self._postings.items() if key.startswith("s:") and rows),
+                "vector_bytes": 0 if self._vectors is None else self._vectors.nbytes,
+                "indexed": self.indexed,
+                "searches": self.searches,
+            }
+
+
+job_index = JobIndex()
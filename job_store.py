@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from models import JobAnalysis, RawJob
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+
+_COLUMNS = list(RawJob.model_fields)
+
+
+class JobStore:
+    """SQLite-backed store of RawJob records, upserted by stable job_id, and their latest analyses."""
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            + "".join(f" {column}," for column in _COLUMNS if column != "job_id")
+            + " first_seen REAL NOT NULL, last_seen REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_employer ON jobs (employer_name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_last_seen ON jobs (last_seen)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_analyses ("
+            " job_id TEXT PRIMARY KEY, analysis TEXT NOT NULL, analyzed_at REAL NOT NULL)"
+        )
+
+    def upsert_jobs(self, jobs: Iterable[RawJob]) -> None:
+        now = time.time()
+        rows = [tuple(getattr(job, column) for column in _COLUMNS) + (now, now) for job in jobs]
+        if not rows:
+            return
+        updates = ", ".join(f"{column} = excluded.{column}" for column in _COLUMNS if column != "job_id")
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT INTO jobs ({', '.join(_COLUMNS)}, first_seen, last_seen)"
+                f" VALUES ({', '.join('?' for _ in range(len(_COLUMNS) + 2))})"
+                f" ON CONFLICT (job_id) DO UPDATE SET {updates}, last_seen = excluded.last_seen",
+                rows,
+            )
+
+    def get_job(self, job_id: str) -> Optional[RawJob]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return RawJob(**dict(zip(_COLUMNS, row)))
+
+    def get_jobs(self, job_ids: List[str]) -> List[Optional[RawJob]]:
+        """Jobs in the order of `job_ids` (None where unknown), read in one query."""
+        if not job_ids:
+            return []
+        unique = list(dict.fromkeys(job_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id IN ({', '.join('?' for _ in unique)})", unique
+            ).fetchall()
+        jobs = {job.job_id: job for job in (RawJob(**dict(zip(_COLUMNS, row))) for row in rows)}
+        return [jobs.get(job_id) for job_id in job_ids]
+
+    def iter_jobs(self, batch_size: int = 500) -> Iterator[List[RawJob]]:
+        """All stored jobs, in batches of up to `batch_size`."""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {', '.join(_COLUMNS)} FROM jobs WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield [RawJob(**dict(zip(_COLUMNS, row[1:]))) for row in rows]
+
+    def save_analysis(self, job_id: str, analysis: JobAnalysis) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_analyses (job_id, analysis, analyzed_at) VALUES (?, ?, ?)",
+                (job_id, analysis.model_dump_json(), time.time()),
+            )
+
+    def get_analyses(self, job_ids: List[str]) -> Dict[str, JobAnalysis]:
+        """Latest stored analysis per job ID; jobs never analyzed are left out."""
+        if not job_ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT job_id, analysis FROM job_analyses WHERE job_id IN ({', '.join('?' for _ in job_ids)})",
+                job_ids,
+            ).fetchall()
+        return {job_id: JobAnalysis.model_validate_json(analysis) for job_id, analysis in rows}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+job_store = JobStore()
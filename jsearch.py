@@ -0,0 +1,138 @@
+import asyncio
+import os
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from metrics import upstream
+
+# Environment variables
+RAPIDAPI_HOST = "jsearch.p.rapidapi.com"
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "your-rapidapi-key-here")
+JSEARCH_BASE_URL = os.getenv("JSEARCH_BASE_URL", f"https://{RAPIDAPI_HOST}")  # point at a fake server for local testing
+JSEARCH_POOL_SIZE = int(os.getenv("JSEARCH_POOL_SIZE", "20"))
+JSEARCH_TIMEOUT_SECONDS = float(os.getenv("JSEARCH_TIMEOUT_SECONDS", "30"))
+JSEARCH_CONNECT_TIMEOUT_SECONDS = float(os.getenv("JSEARCH_CONNECT_TIMEOUT_SECONDS", "5"))
+JSEARCH_MAX_RETRIES = int(os.getenv("JSEARCH_MAX_RETRIES", "3"))
+JSEARCH_BACKOFF_SECONDS = float(os.getenv("JSEARCH_BACKOFF_SECONDS", "0.5"))
+JSEARCH_FAN_OUT_CONCURRENCY = int(os.getenv("JSEARCH_FAN_OUT_CONCURRENCY", "5"))
+
+# Status codes worth retrying with backoff
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class JSearchClient:
+    """Pooled async client for the JSearch API with retry and per-page fan-out."""
+
+    def __init__(self, base_url: str = JSEARCH_BASE_URL, api_key: str = RAPIDAPI_KEY,
+                 pool_size: int = JSEARCH_POOL_SIZE, timeout: float = JSEARCH_TIMEOUT_SECONDS,
+                 connect_timeout: float = JSEARCH_CONNECT_TIMEOUT_SECONDS,
+                 max_retries: int = JSEARCH_MAX_RETRIES, backoff: float = JSEARCH_BACKOFF_SECONDS,
+                 fan_out_concurrency: int = JSEARCH_FAN_OUT_CONCURRENCY):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.fan_out_concurrency = fan_out_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "x-rapidapi-host": RAPIDAPI_HOST,
+                    "x-rapidapi-key": self.api_key,
+                },
+                http2=_http2_available(),
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            )
+        return self._client
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after is not None:
+                try:
+                    return max(float(retry_after), 0.0)
+                except ValueError:
+                    pass
+        return self.backoff * (2 ** attempt) * (1 + random.random() / 2)
+
+    async def search(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Make one /search call, retrying rate-limited and transient failures."""
+        client = self._get_client()
+        attempt = 0
+        while True:
+            response = None
+            try:
+                with upstream("jsearch", "search") as call:
+                    response = await client.get("/search", params=params)
+                    call.outcome = "ok" if response.status_code < 400 else str(response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json().get("data", [])
+            except (httpx.TimeoutException, httpx.TransportError):
+                if attempt >= self.max_retries:
+                    raise
+            if attempt >= self.max_retries:
+                response.raise_for_status()
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def _fetch_page(self, params: Dict[str, Any], page_number: int,
+                          semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return await self.search({**params, "page": page_number, "num_pages": 1})
+
+    async def search_pages(self, params: Dict[str, Any], page: int, num_pages: int,
+                           fan_out: bool = False) -> List[Dict[str, Any]]:
+        """Fetch a page range, optionally as concurrent single-page calls merged in order."""
+        if not fan_out or num_pages <= 1:
+            return await self.search({**params, "page": page, "num_pages": num_pages})
+
+        semaphore = asyncio.Semaphore(self.fan_out_concurrency)
+        pages = await asyncio.gather(
+            *(self._fetch_page(params, page + i, semaphore) for i in range(num_pages))
+        )
+        return [job for page_jobs in pages for job in page_jobs]
+
+    async def iter_pages(self, params: Dict[str, Any], page: int,
+                         num_pages: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Fetch pages concurrently and yield each one, in order, as soon as it is available."""
+        semaphore = asyncio.Semaphore(self.fan_out_concurrency)
+        tasks = [
+            asyncio.create_task(self._fetch_page(params, page + i, semaphore))
+            for i in range(num_pages)
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+jsearch_client = JSearchClient()
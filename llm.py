@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import types as pytypes
+from typing import Any, AsyncIterator, Callable, Dict, Set
+
+from models import JobAnalysis, QuestionGrade, QuestionSet, RecommendationReport
+from providers import get_client
+from skills import extract_skills
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini", or "stub" for offline load tests
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("LLM_STUB_LATENCY_SECONDS", "0.2"))
+LLM_STUB_JITTER_SECONDS = float(os.getenv("LLM_STUB_JITTER_SECONDS", "0"))
+STUB_PREFIX = "stub:"
+
+# Every model an endpoint was configured with, so /health knows whether Gemini is needed at all
+_configured_models: Set[str] = set()
+
+
+def model_for(endpoint: str, default: str) -> str:
+    """Model for an endpoint: LLM_MODEL_<ENDPOINT> overrides the default, e.g.
+    LLM_MODEL_SCORING=models/gemini-flash-lite-latest; a "stub:" prefix routes that endpoint to the stub."""
+    model = os.getenv(f"LLM_MODEL_{endpoint.upper()}", default)
+    _configured_models.add(model)
+    return model
+
+
+def backend_for(model: str) -> str:
+    return "stub" if LLM_BACKEND == "stub" or model.startswith(STUB_PREFIX) else "gemini"
+
+
+def gemini_in_use() -> bool:
+    """Whether any endpoint's model is served by Gemini rather than the stub backend."""
+    return any(backend_for(model) == "gemini" for model in _configured_models)
+
+
+def client_for(model: str):
+    """Client exposing the genai `aio.models` surface for the model's backend."""
+    return stub_client if backend_for(model) == "stub" else get_client("gemini")
+
+
+def _prompt_text(contents) -> str:
+    if isinstance(contents, str):
+        return contents
+    parts = []
+    for content in contents or []:
+        for part in (content.get("parts", []) if isinstance(content, dict) else getattr(content, "parts", None) or []):
+            text = part.get("text") if isinstance(part, dict) else getattr(part, "text", None)
+            if text:
+                parts.append(text)
+    return "\n".join(parts)
+
+
+def _job_title(prompt: str) -> str:
+    # The templates name the role last, after the job description and resume
+    matches = re.findall(r'role[:\s]*"?([^"\n]+)"?', prompt, re.IGNORECASE)
+    return matches[-1].strip() if matches else "Software Engineer Intern"
+
+
+def _rubric_size(prompt: str) -> int:
+    start = prompt.find("{")
+    if start >= 0:
+        try:
+            return len(json.loads(prompt[start:prompt.rfind("}") + 1]).get("rubric", [])) or 3
+        except ValueError:
+            pass
+    return 3
+
+
+def _stub_job_analysis(prompt: str, rng: random.Random) -> dict:
+    skills = sorted(extract_skills(prompt)) or ["python", "sql", "communication"]
+    return {
+        "description_summary": f"Build and maintain services using {', '.join(skills[:3])}.",
+        "requirements": [f"Experience with {skill}" for skill in skills[:5]],
+        "required_skills": skills[:8],
+    }
+
+
+def _stub_question_set(prompt: str, rng: random.Random) -> dict:
+    difficulty = next((d for d in ("easy", "hard") if f'difficulty "{d}"' in prompt), "medium")
+    kinds = ["coding"] * 2 + ["job_requirement"] * 4 + ["behavioral"] * 4
+    questions = []
+    for index, kind in enumerate(kinds):
+        question = {
+            "kind": kind,
+            "text": f"Stub {kind.replace('_', ' ')} question {index + 1} (variant {rng.randint(1, 999)}).",
+            "rationale": "Covers a core requirement from the job description.",
+            "rubric": [f"Criterion {bullet + 1}" for bullet in range(3)],
+        }
+        if kind == "coding":
+            question["coding"] = {"difficulty": difficulty, "constraints": ["1 <= n <= 10^5"], "examples": ["[1,2,3] -> 6"]}
+        questions.append(question)
+    return {"job_title": _job_title(prompt), "summary": "Stub interview covering coding, role skills and behavior.",
+            "questions": questions}
+
+
+def _stub_question_grade(prompt: str, rng: random.Random) -> dict:
+    grade = {
+        "bullet_scores": [{"score": rng.choice([0, 0.5, 1]), "notes": "Stub assessment."} for _ in range(_rubric_size(prompt))],
+        "feedback": "Solid structure; add a concrete example and quantify the outcome.",
+    }
+    if '"kind":"coding"' in prompt.replace(" ", ""):
+        grade["coding_review"] = {"time_complexity": "O(n)", "space_complexity": "O(1)",
+                                  "correctness_risk": rng.choice(["low", "medium", "high"]), "notes": "Stub review."}
+    return grade
+
+
+def _stub_recommendation_report(prompt: str, rng: random.Random) -> dict:
+    topics = [
+        {
+            "topic": topic,
+            "skill_area": area,
+            "why": "Scored below the remediation threshold.",
+            "priority": priority,
+            "actions": ["Review the fundamentals", "Summarize key trade-offs"],
+            "practice_tasks": ["Solve three practice problems"],
+            "resources": [{"title": f"{topic} guide", "type": "doc", "cost": "free"}],
+        }
+        for topic, area, priority in [("Hash maps", "coding", "high"), ("REST API design", "backend", "medium"),
+                                      ("STAR stories", "collaboration", "low")]
+    ]
+    return {"job_title": _job_title(prompt), "overview": "Strong collaboration; coding fundamentals need practice.",
+            "quick_wins": ["Practice two-sum variants", "Prepare two STAR stories"], "topics": topics,
+            "study_schedule": ["Week 1: hash maps", "Week 2: REST and STAR stories"]}
+
+
+# response_schema -> fixture builder returning schema-valid JSON
+STUB_FIXTURES: Dict[type, Callable[[str, random.Random], dict]] = {
+    JobAnalysis: _stub_job_analysis,
+    QuestionSet: _stub_question_set,
+    QuestionGrade: _stub_question_grade,
+    RecommendationReport: _stub_recommendation_report,
+}
+
+_STUB_WORDS = ("Lead with the outcome, then walk through your approach step by step. Name one trade-off you "
+               "considered and why you chose it. Close with what you would measure to confirm it worked.").split()
+
+
+class StubModels:
+    """Deterministic stand-in for `client.aio.models`: same input, same output, after a configurable delay."""
+
+    def __init__(self, latency: float, jitter: float):
+        self.latency = latency
+        self.jitter = jitter
+
+    def _rng(self, model: str, prompt: str) -> random.Random:
+        return random.Random(hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).digest())
+
+    def _respond(self, model: str, contents, config):
+        prompt = _prompt_text(contents)
+        rng = self._rng(model, prompt)
+        schema = getattr(config, "response_schema", None)
+        if schema in STUB_FIXTURES:
+            payload = STUB_FIXTURES[schema](prompt, rng)
+            text = schema.model_validate(payload).model_dump_json()
+        elif schema is not None:
+            raise ValueError(f"No stub fixture for response_schema {schema!r}")
+        else:
+            text = " ".join(_STUB_WORDS[: rng.randint(30, len(_STUB_WORDS))])
+        usage = pytypes.SimpleNamespace(prompt_token_count=len(prompt) // 4 + 1,
+                                        candidates_token_count=len(text) // 4 + 1,
+                                        cached_content_token_count=None)
+        return text, usage, rng
+
+    async def generate_content(self, model: str, contents, config=None):
+        text, usage, rng = self._respond(model, contents, config)
+        await asyncio.sleep(self.latency + rng.uniform(0, self.jitter))
+        return pytypes.SimpleNamespace(text=text, usage_metadata=usage)
+
+    async def generate_content_stream(self, model: str, contents, config=None) -> AsyncIterator[Any]:
+        text, usage, rng = self._respond(model, contents, config)
+        words = text.split(" ")
+
+        async def chunks():
+            await asyncio.sleep(self.latency + rng.uniform(0, self.jitter))
+            for start in range(0, len(words), 8):
+                yield pytypes.SimpleNamespace(text=" ".join(words[start:start + 8]) + " ", usage_metadata=usage)
+                await asyncio.sleep(0.01)
+
+        return chunks()
+
+
+class StubLLMClient:
+    def __init__(self, latency: float = LLM_STUB_LATENCY_SECONDS, jitter: float = LLM_STUB_JITTER_SECONDS):
+        self.aio = pytypes.SimpleNamespace(models=StubModels(latency, jitter))
+
+
+stub_client = StubLLMClient()
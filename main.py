@@ -1,18 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from routers import jobs, analysis, questions, learning, scores, tts
-from routers import guidance
+from routers import guidance, tasks, match
 from fastapi.middleware.cors import CORSMiddleware
+from jsearch import jsearch_client
+from llm import gemini_in_use
+from job_index import JOB_INDEX_ENABLED, job_index
+from metrics import MetricsMiddleware, render as render_metrics
+from providers import PROVIDERS_WARM_ON_STARTUP, provider_status, warm
+from question_pool import QUESTION_POOL_WARM_INTERVAL_SECONDS, run_pool_warmer
+from tasks import task_queue
+from upload_limits import BodySizeLimitMiddleware, TRANSCRIBE_MAX_UPLOAD_BYTES
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers also re-enqueue tasks left queued or running by a previous process
+    await task_queue.start()
+    background = []
+    if PROVIDERS_WARM_ON_STARTUP:
+        # Build SDK clients off the event loop so the worker serves requests meanwhile
+        background.append(asyncio.create_task(asyncio.to_thread(warm)))
+    if JOB_INDEX_ENABLED:
+        # Index jobs stored before the index existed (or by a worker with it disabled)
+        background.append(asyncio.create_task(asyncio.to_thread(job_index.backfill)))
+    if QUESTION_POOL_WARM_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_pool_warmer()))
+    yield
+    for task in background:
+        task.cancel()
+    await task_queue.stop()
+    # Close pooled upstream connections on shutdown
+    await jsearch_client.aclose()
 
 # FastAPI app
 app = FastAPI(
     title="Job Search API",
     description="API for job search and AI-powered job analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
 
+# Added before CORS so CORS wraps it and 413 responses still carry CORS headers
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=TRANSCRIBE_MAX_UPLOAD_BYTES, paths=["/tts/transcribe"])
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # allows all origins (use specific origins in production!)
@@ -20,6 +53,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so request timings include the other middleware and rejected requests
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(jobs.router)
 app.include_router(analysis.router)
@@ -28,6 +63,8 @@ app.include_router(learning.router)
 app.include_router(scores.router)
 app.include_router(tts.router)
 app.include_router(guidance.router)
+app.include_router(tasks.router)
+app.include_router(match.router)
 
 # Custom exception handler for UnicodeDecodeError
 @app.exception_handler(UnicodeDecodeError)
@@ -43,20 +80,102 @@ async def unicode_decode_exception_handler(request: Request, exc: UnicodeDecodeE
 def root():
     return {"message": "Job Search API", "version": "1.0.0"}
 
+@app.get("/health")
+def health():
+    """Liveness plus per-provider readiness (configured, initialized, init time, last error).
+
+    Only providers the configured backends use count toward the status: with every model on the
+    stub backend, a missing Gemini key is not a degradation.
+    """
+    unused = set() if gemini_in_use() else {"gemini"}
+    providers = {name: {**status, "in_use": name not in unused} for name, status in provider_status().items()}
+    ready = all(status["ready"] for status in providers.values() if status["in_use"])
+    return {"status": "ok" if ready else "degraded", "providers": providers}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus metrics: request, upstream and validation latency histograms, tokens, cache and audio counters."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # --- Important Notes for Setup and Execution ---
 
 ## Prerequisites:
-# 1. **Install required libraries:** `pip install fastapi uvicorn requests pydantic google-genai`
+# 1. **Install required libraries:** `pip install fastapi uvicorn httpx pydantic google-genai`
 # 2. **Set environment variables:**
 #    - **`GEMINI_API_KEY`**: Get your key from Google AI Studio.
 #    - **`RAPIDAPI_KEY`**: Get your JSearch key from RapidAPI.
+#    - Optional: **`CACHE_BACKEND`** (`memory` or `sqlite`), **`CACHE_PATH`**, **`CACHE_TTL_SECONDS`**,
+#      **`CACHE_MAX_ENTRIES`** to tune the AI response cache.
+#    - Optional: **`GEMINI_MAX_CONCURRENCY`** (in-flight generations per model) and
+#      **`GEMINI_TIMEOUT_SECONDS`** to bound Gemini calls.
+#    - Optional: **`JSEARCH_BASE_URL`** (e.g. a local fake server), **`JSEARCH_POOL_SIZE`**,
+#      **`JSEARCH_TIMEOUT_SECONDS`**, **`JSEARCH_MAX_RETRIES`**, **`JSEARCH_FAN_OUT_CONCURRENCY`**.
+#    - Optional: **`COACH_SESSION_BACKEND`** (`memory` or `sqlite`), **`COACH_SESSION_TTL_SECONDS`**,
+#      **`COACH_HISTORY_TOKEN_BUDGET`**, **`COACH_WINDOW_TURNS`** for coaching sessions.
+#    - Optional: **`TEXTPREP_ENABLED`**, **`JD_TOKEN_BUDGET`**, **`RESUME_TOKEN_BUDGET`** for trimming
+#      job descriptions and resumes before they are sent to Gemini.
+#    - Optional: **`QUESTION_POOL_SIZE`**, **`QUESTION_SET_MAX_REUSE`**, **`QUESTION_POOL_TTL_SECONDS`** and
+#      **`QUESTION_POOL_WARM_INTERVAL_SECONDS`** (> 0 pre-generates sets for the most-viewed jobs, of the
+#      **`QUESTION_POOL_MAX_TRACKED_JOBS`** whose views are counted). Personalized sets are generated from the
+#      resume's skill list only, since resumes with the same skills share them.
+#    - Optional: **`SCORING_MAX_CONCURRENCY`**, **`SCORING_MAX_ATTEMPTS`** and **`SCORING_BACKOFF_SECONDS`**
+#      (base of the exponential retry backoff) for per-question scoring.
+#    - Optional: **`TASK_WORKERS`**, **`TASK_MAX_ATTEMPTS`**, **`TASK_RETRY_BACKOFF_SECONDS`**, **`TASK_STORE_PATH`**
+#      for `async=true` requests; **`TASK_QUEUE_URL`** (needs `redis`) shares the queue between processes, which
+#      must then share one TASK_STORE_PATH (startup fails otherwise). Running tasks are heartbeated every
+#      **`TASK_HEARTBEAT_SECONDS`** and re-queued after **`TASK_STALE_SECONDS`** without one (their worker died).
+#      `callback_url` must be a public http(s) URL, or a host in **`TASK_CALLBACK_ALLOWED_HOSTS`** when set.
+#    - Optional: **`AUDIO_CACHE_DIR`**, **`AUDIO_CACHE_MAX_BYTES`** for the synthesized-speech cache, and
+#      **`TTS_SENTENCE_MIN_CHARS`**, **`TTS_PREFETCH_SENTENCES`** for sentence-level streaming on /tts/speak.
+#    - Missing keys no longer stop the app: only endpoints using that provider fail, and
+#      GET /health reports which providers are ready (Gemini only counts while some model is not on the
+#      stub). Clients (and their SDKs) load on first use;
+#      **`PROVIDERS_WARM_ON_STARTUP`** (e.g. `gemini,elevenlabs`) builds them in the background at startup.
+#    - Optional: **`TRANSCRIBE_MAX_UPLOAD_BYTES`** (default 25 MB) caps /tts/transcribe uploads.
+#    - Optional: **`STT_CHUNKING_MIN_SECONDS`**, **`STT_SEGMENT_SECONDS`**, **`STT_MAX_CONCURRENCY`** for
+#      `chunked=true` transcription of long WAV recordings.
+#    - Optional: **`LLM_MODEL_<ENDPOINT>`** (`ANALYSIS`, `QUESTIONS`, `LEARNING`, `SCORING`, `GUIDANCE`) picks the
+#      model per endpoint; **`LLM_BACKEND=stub`** (or a `stub:` model name) serves deterministic fixtures
+#      offline after **`LLM_STUB_LATENCY_SECONDS`**, for load tests: `python benchmarks/bench_endpoints.py`.
+#    - Optional: **`METRICS_TIMING_HEADERS=1`** adds a Server-Timing header per response, and
+#      **`LLM_TOKEN_PRICES`** (JSON of model -> USD per 1M input/output tokens) enables cost estimates on /metrics.
+#    - Optional: **`FAST_JSON_RESPONSES=1`** sends model responses as JSON encoded once by pydantic-core, skipping
+#      FastAPI's response_model re-validation (`python benchmarks/bench_serialization.py` compares the two).
+#    - Optional: **`JOB_SEARCH_FRESH_SECONDS`**, **`JOB_SEARCH_STALE_SECONDS`** (served while refreshing in the background),
+#      **`JOB_SEARCH_CACHE_MAX_BYTES`**, **`JOB_SEARCH_CACHE_ENABLED`** for the search-result cache shared by
+#      /jobs and /jobs/stream (identical in-flight searches from either share one JSearch fetch).
+#    - Optional: **`SINGLEFLIGHT_ENABLED`**, **`SINGLEFLIGHT_MAX_WAITERS`**, **`SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS`**:
+#      identical analysis, question, scoring and learning requests in flight share one generation.
+#    - Optional: **`JOB_INDEX_DIR`** (shared by workers), **`JOB_INDEX_DIM`**, **`JOB_INDEX_ENABLED`** for the local
+#      job index behind /jobs/search; fetched jobs are indexed as they arrive, analyzed ones with their skills.
+#    - Optional: **`MATCH_COVERAGE_WEIGHT`** (default 0.7): share of a /match score from skill coverage, the rest
+#      from text similarity (`python benchmarks/bench_match.py` measures pairs per second).
 
 ## How to Run:
 # 1. Run the server: `uvicorn main:app --reload`
 # 2. Access the API docs at: `http://127.0.0.1:8000/docs`
 # 3. Available endpoints:
-#    - GET /jobs - Get raw job data
-#    - POST /analysis/job - Analyze job description with AI
-#    - POST /questions - Generate interview questions
-#    - POST /learning - Generate learning recommendations
-#    - POST /scores - Score interview questions
\ No newline at end of file
+#    - GET /jobs - Get raw job data (`fan_out=true` fetches pages concurrently)
+#    - GET /jobs/stream - Stream raw jobs as NDJSON or SSE (`format=ndjson|sse`)
+#      Both accept `description=full|truncate|none` to shrink list payloads.
+#    - GET /jobs/cache - Job search cache hit/stale/miss/coalesced stats
+#    - POST /jobs/search - Rank stored jobs against a resume and/or skill list, with matched and missing skills
+#    - GET /jobs/index - Local job index size and search count
+#    - GET /jobs/{job_id} - Get a fetched job from the local store (`JOB_STORE_PATH`)
+#    - POST /analysis/job - Analyze job description (or a stored `job_id`) with AI
+#    - POST /analysis/jobs:batch - Analyze many descriptions/job IDs concurrently (`stream=true` for NDJSON)
+#    - GET /analysis/cache - Job analysis cache hit/miss stats
+#    - POST /questions - Generate interview questions (served from the cache/pool when possible)
+#    - POST /learning - Generate learning recommendations (`async=true` returns a task, `callback_url` optional)
+#    - POST /scores - Score interview questions (`async=true` returns a task, `callback_url` optional)
+#    - GET /tasks/{task_id} - Status and result of a background task (`/events` streams SSE updates)
+#    - POST /scores/learning-input - Convert a ScoreReport into the `scored_report` for /learning
+#    - POST /match - Score one resume against many jobs (or many resumes against one job) by skill overlap,
+#      with matched and missing skills per pair; POST /match/learning-input turns a result into `scored_report`
+#    - GET /health - Provider readiness (`degraded` when a key is missing)
+#    - GET /metrics - Prometheus metrics (per-route latency, upstream calls, tokens, cache hits, audio)
+#    - POST /coach/guide - Coaching guidance (`stream=true` for Server-Sent Events); with `start_session=true`
+#      returns a `session_id` to send with follow-ups instead of the whole `history_str`
+#    - POST /tts/speak - Text to speech, streamed sentence by sentence (cached per sentence)
+#    - GET /tts/cache - Audio cache size and hit/miss stats
+#    - POST /tts/transcribe - Speech to text (`chunked=true` splits long WAVs at silences and transcribes in parallel)
\ No newline at end of file
@@ -0,0 +1,168 @@
+import os
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from job_index import analysis_skills, job_index, job_skills, job_vectors, query_skills, query_vectors
+from job_store import job_store
+from models import JobAnalysis, MatchJob, MatchResult, MatchResume, ScoredItem, ScoredReportIn, SkillWeight
+
+MATCH_COVERAGE_WEIGHT = float(os.getenv("MATCH_COVERAGE_WEIGHT", "0.7"))  # the rest of the score is text similarity
+
+# With an analysis, skills only mentioned in the description count this much next to the analyzed ones
+_MENTIONED_WEIGHT = 0.5
+
+
+class JobProfile(NamedTuple):
+    job_id: Optional[str]
+    job_title: Optional[str]
+    skills: Dict[str, float]  # canonical skill -> share of the job's skill weight
+    analyzed: Set[str]  # skills listed by the job's analysis
+    vector: np.ndarray
+
+
+def _profile(job_id: Optional[str], title: Optional[str], analysis: Optional[JobAnalysis], skills: Set[str],
+             vector: np.ndarray) -> JobProfile:
+    analyzed = analysis_skills(analysis) if analysis is not None else set()
+    skills = skills | analyzed
+    raw = {skill: 1.0 if not analyzed or skill in analyzed else _MENTIONED_WEIGHT for skill in skills}
+    total = sum(raw.values())
+    return JobProfile(job_id, title, {skill: weight / total for skill, weight in raw.items()}, analyzed, vector)
+
+
+def job_profiles(jobs: List[MatchJob]) -> List[Optional[JobProfile]]:
+    """Skills, weights and vectors of each job; None for a job_id that is neither stored nor described.
+
+    Stored jobs reuse their job-index vector and stored analysis, so they cost no text processing.
+    Every other distinct (title, description, analysis) is processed once, and their vectors are
+    hashed in one batch.
+    """
+    job_ids = [job.job_id for job in jobs if job.job_id]
+    stored = dict(zip(job_ids, job_store.get_jobs(job_ids)))
+    analyses = job_store.get_analyses(job_ids)
+    indexed = job_index.lookup(job_ids)
+
+    profiles: List[Optional[JobProfile]] = [None] * len(jobs)
+    # (title, description, analysis JSON) -> the positions of the jobs it describes
+    pending: Dict[Tuple[Optional[str], Optional[str], Optional[str]], List[int]] = {}
+    sources: Dict[Tuple[Optional[str], Optional[str], Optional[str]], Tuple[Optional[str], Optional[JobAnalysis]]] = {}
+    for position, job in enumerate(jobs):
+        record = stored.get(job.job_id) if job.job_id else None
+        analysis = job.analysis or analyses.get(job.job_id)
+        title = job.job_title or (record.job_title if record is not None else None)
+        if job.job_description is None and record is not None and job.job_id in indexed:
+            skills, vector = indexed[job.job_id]
+            profiles[position] = _profile(job.job_id, title, analysis, skills, vector)
+            continue
+        description = job.job_description if job.job_description is not None or record is None else record.job_description
+        if description is None and analysis is None:
+            continue
+        key = (title, description, analysis.model_dump_json() if analysis is not None else None)
+        pending.setdefault(key, []).append(position)
+        sources[key] = (description, analysis)
+
+    docs = []
+    for (title, _, _), (description, analysis) in sources.items():
+        if analysis is not None and not description:
+            description = "\n".join([analysis.description_summary] + analysis.requirements)
+        docs.append((job_skills(title, description, analysis), title, description))
+    if docs:
+        vectors = job_vectors(docs, job_index.dim)
+        for (key, positions), (skills, title, _), vector in zip(pending.items(), docs, vectors):
+            profile = _profile(None, title, sources[key][1], skills, vector)
+            for position in positions:
+                profiles[position] = profile._replace(job_id=jobs[position].job_id)
+    return profiles
+
+
+def _skill_weights(profile: JobProfile) -> List[SkillWeight]:
+    """The job's skills, heaviest first."""
+    return [
+        SkillWeight(skill=skill, weight=round(weight, 4), from_analysis=skill in profile.analyzed)
+        for skill, weight in sorted(profile.skills.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def match_resumes(resumes: List[MatchResume], jobs: List[JobProfile], limit: Optional[int] = None) -> List[MatchResult]:
+    """Score every resume against every job, best pairs first.
+
+    Skill coverage is a (resumes x skills) 0/1 matrix times the (skills x jobs) matrix of skill
+    weights, and similarity the product of the hashed feature vectors, so scoring all pairs is
+    two matrix products; only the returned pairs get per-skill breakdowns.
+    """
+    # Identical resumes are processed once; `rows` maps each resume to its distinct one
+    distinct: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+    rows = [distinct.setdefault((resume.resume or "", tuple(resume.skills)), len(distinct)) for resume in resumes]
+    distinct_skills = [query_skills(skills, text) for text, skills in distinct]
+    resume_skills = [distinct_skills[row] for row in rows]
+    vocabulary = {skill: column for column, skill in enumerate(
+        sorted(set().union(*distinct_skills, *(profile.skills for profile in jobs))))}
+
+    has = np.zeros((len(distinct), len(vocabulary)), dtype=np.float32)
+    for row, skills in enumerate(distinct_skills):
+        has[row, [vocabulary[skill] for skill in skills]] = 1.0
+    wants = np.zeros((len(jobs), len(vocabulary)), dtype=np.float32)
+    for row, profile in enumerate(jobs):
+        wants[row, [vocabulary[skill] for skill in profile.skills]] = list(profile.skills.values())
+
+    resume_vectors = query_vectors([(skills, text) for skills, (text, _) in zip(distinct_skills, distinct)],
+                                   job_index.dim)
+    profile_vectors = np.stack([profile.vector for profile in jobs])
+    similarity = np.maximum(resume_vectors @ profile_vectors.T, 0.0)[rows]
+    coverage = (has @ wants.T)[rows]
+    # Jobs without any recognised skill are ranked on similarity alone
+    coverage = np.where(wants.any(axis=1), coverage, similarity)
+    score = MATCH_COVERAGE_WEIGHT * coverage + (1.0 - MATCH_COVERAGE_WEIGHT) * similarity
+
+    order = np.argsort(-score, axis=None, kind="stable")[:limit]
+    breakdowns: Dict[int, List[SkillWeight]] = {}  # job row -> its skills, shared by all of the job's results
+    results = []
+    for resume_row, job_row in zip(*np.unravel_index(order, score.shape)):
+        resume, profile = resumes[resume_row], jobs[job_row]
+        skills = resume_skills[resume_row]
+        if job_row not in breakdowns:
+            breakdowns[job_row] = _skill_weights(profile)
+        results.append(MatchResult(
+            resume_index=int(resume_row),
+            resume_id=resume.resume_id,
+            job_index=int(job_row),
+            job_id=profile.job_id,
+            job_title=profile.job_title,
+            score=round(float(score[resume_row, job_row]), 4),
+            skill_coverage=round(float(coverage[resume_row, job_row]), 4),
+            similarity=round(float(similarity[resume_row, job_row]), 4),
+            matched_skills=[weight for weight in breakdowns[job_row] if weight.skill in skills],
+            missing_skills=[weight for weight in breakdowns[job_row] if weight.skill not in skills],
+        ))
+    return results
+
+
+def to_scored_report_in(match: MatchResult) -> ScoredReportIn:
+    """Convert a match into the /learning input: one item per job skill, missing ones scored 0."""
+    skills = [(skill, True) for skill in match.matched_skills] + [(skill, False) for skill in match.missing_skills]
+    items = [
+        ScoredItem(
+            question_id=f"skill-{number}",
+            kind="job_requirement",
+            text=f"Skill the job asks for: {skill.skill}",
+            verdict="excellent" if matched else "poor",
+            raw_score=1.0 if matched else 0.0,
+            max_score=1.0,
+            percent=100.0 if matched else 0.0,
+            weight=skill.weight,
+            weighted_raw=skill.weight if matched else 0.0,
+            weighted_max=skill.weight,
+            bullet_evals=[],
+            feedback="The resume shows this skill." if matched else "The resume does not show this skill.",
+        )
+        for number, (skill, matched) in enumerate(skills, start=1)
+    ]
+    return ScoredReportIn(
+        job_title=match.job_title or "Target role",
+        overall={
+            "skill_coverage": round(match.skill_coverage * 100, 2),
+            "score": round(match.score * 100, 2),
+            "summary": f"Resume shows {len(match.matched_skills)} of {len(items)} skills the job asks for.",
+        },
+        items=items,
+    )
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add a Server-Timing header (per-phase durations) to every response, e.g. for browser devtools
+METRICS_TIMING_HEADERS = os.getenv("METRICS_TIMING_HEADERS", "0") == "1"
+# USD per million tokens, e.g. {"models/gemini-flash-latest": [0.30, 2.50, 0.075]}
+# (input, output and optionally cached input, which defaults to the input price)
+LLM_TOKEN_PRICES: Dict[str, List[float]] = json.loads(os.getenv("LLM_TOKEN_PRICES", "{}"))
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect_left(self.buckets, value)  # first bucket with value <= bound, else +Inf
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, [list(counts), total, count]) for key, (counts, total, count) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = _format_labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {repr(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time until the response body was fully sent.",
+                            ["method", "route", "status"])
+RESPONSE_START_SECONDS = Histogram("http_response_start_seconds", "Time until response headers were sent.",
+                                   ["method", "route"])
+REQUEST_PHASE_SECONDS = Histogram("http_request_phase_seconds",
+                                  "Time per request spent in a phase (summed across concurrent calls).",
+                                  ["route", "phase"])
+UPSTREAM_SECONDS = Histogram("upstream_request_duration_seconds", "Latency of calls to external providers.",
+                             ["provider", "operation", "model", "outcome"])
+LLM_QUEUE_SECONDS = Histogram("llm_queue_wait_seconds", "Time waiting for a per-model generation slot.", ["model"])
+VALIDATION_SECONDS = Histogram("llm_validation_duration_seconds", "Time to validate generated JSON into a model.",
+                               ["schema"], buckets=FAST_BUCKETS)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported in usage metadata.", ["provider", "model", "kind"])
+LLM_COST = Counter("llm_cost_usd_total", "Estimated spend from LLM_TOKEN_PRICES.", ["model"])
+AUDIO_BYTES = Counter("audio_bytes_total", "Audio bytes synthesized or transcribed.", ["operation", "source"])
+AUDIO_SECONDS = Counter("audio_seconds_total", "Audio duration synthesized or transcribed, where it can be derived.",
+                        ["operation", "source"])
+SINGLEFLIGHT_CALLS = Counter("singleflight_calls_total",
+                             "Calls through single-flight groups: leader (ran the call), coalesced (shared it), "
+                             "overflow (waiter limit reached, ran its own) or timeout.", ["group", "role"])
+
+_METRICS = [REQUEST_SECONDS, RESPONSE_START_SECONDS, REQUEST_PHASE_SECONDS, UPSTREAM_SECONDS, LLM_QUEUE_SECONDS,
+            VALIDATION_SECONDS, LLM_TOKENS, LLM_COST, AUDIO_BYTES, AUDIO_SECONDS, SINGLEFLIGHT_CALLS]
+
+# Caches report their own hit/miss counters; these are read at scrape time
+_cache_stats: Dict[str, Callable[[], dict]] = {}
+
+# Phase -> seconds for the request being handled (None outside requests, e.g. background tasks)
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def register_cache(name: str, stats: Callable[[], dict]) -> None:
+    """Export a cache's `stats()` hits/misses/entries as cache_* metrics labelled `name`."""
+    _cache_stats[name] = stats
+
+
+def record_timing(phase: str, seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(histogram: Histogram, phase: Optional[str] = None, **labels: str) -> Iterator[None]:
+    """Observe the block's duration on `histogram` and, if given, add it to the request's `phase`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        if phase:
+            record_timing(phase, elapsed)
+
+
+def observe_upstream(provider: str, operation: str, seconds: float, model: str = "", outcome: str = "ok") -> None:
+    UPSTREAM_SECONDS.observe(seconds, provider=provider, operation=operation, model=model, outcome=outcome)
+    record_timing(provider, seconds)
+
+
+class UpstreamCall:
+    outcome = "ok"
+
+
+@contextmanager
+def upstream(provider: str, operation: str, model: str = "") -> Iterator[UpstreamCall]:
+    """Time one call to an external provider; set `.outcome` on the yielded call to label e.g. a 429."""
+    call = UpstreamCall()
+    start = time.perf_counter()
+    try:
+        yield call
+    except (asyncio.TimeoutError, TimeoutError):
+        call.outcome = "timeout"
+        raise
+    except Exception:
+        call.outcome = "error"
+        raise
+    finally:
+        observe_upstream(provider, operation, time.perf_counter() - start, model, call.outcome)
+
+
+def upstream_iter(chunks: Iterable[bytes], provider: str, operation: str, model: str = "") -> Iterator[bytes]:
+    """Yield from a blocking upstream stream, timing only the waits on it (not the consumer)."""
+    iterator = iter(chunks)
+    waited = 0.0
+    outcome = "ok"
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                waited += time.perf_counter() - start
+            yield chunk
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        observe_upstream(provider, operation, waited, model, outcome)
+
+
+def record_usage(provider: str, model: str, usage) -> None:
+    """Count tokens (and estimated cost) from a generation's usage_metadata."""
+    if usage is None:
+        return
+    counts = {
+        "prompt": getattr(usage, "prompt_token_count", None) or 0,
+        "output": getattr(usage, "candidates_token_count", None) or 0,
+        "cached": getattr(usage, "cached_content_token_count", None) or 0,
+    }
+    for kind, count in counts.items():
+        if count:
+            LLM_TOKENS.inc(count, provider=provider, model=model, kind=kind)
+    prices = LLM_TOKEN_PRICES.get(model)
+    if prices:
+        input_price, output_price = prices[0], prices[1]
+        cached_price = prices[2] if len(prices) > 2 else input_price
+        cost = ((counts["prompt"] - counts["cached"]) * input_price + counts["cached"] * cached_price
+                + counts["output"] * output_price) / 1_000_000
+        LLM_COST.inc(cost, model=model)
+
+
+_AUDIO_FORMAT = re.compile(r"^(mp3|pcm|ulaw)_(\d+)(?:_(\d+))?$")
+
+
+def audio_seconds(output_format: str, num_bytes: int) -> Optional[float]:
+    """Duration of ElevenLabs audio from its size: mp3_<rate>_<kbps> is constant bitrate,
+    pcm_<rate> is 16-bit mono and ulaw_<rate> 8-bit mono."""
+    match = _AUDIO_FORMAT.match(output_format)
+    if match is None:
+        return None
+    codec, rate, kbps = match.group(1), int(match.group(2)), match.group(3)
+    if codec == "mp3":
+        return num_bytes * 8 / (int(kbps) * 1000) if kbps else None
+    return num_bytes / (rate * (2 if codec == "pcm" else 1))
+
+
+def record_audio(operation: str, source: str, num_bytes: int, seconds: Optional[float] = None) -> None:
+    AUDIO_BYTES.inc(num_bytes, operation=operation, source=source)
+    if seconds is not None:
+        AUDIO_SECONDS.inc(seconds, operation=operation, source=source)
+
+
+def _render_caches() -> List[str]:
+    lines = []
+    for metric, key, kind, help in (("cache_hits_total", "hits", "counter", "Cache hits."),
+                                    ("cache_misses_total", "misses", "counter", "Cache misses."),
+                                    ("cache_entries", "entries", "gauge", "Entries currently cached.")):
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+        for name, stats in sorted(_cache_stats.items()):
+            try:
+                value = stats().get(key)
+            except Exception:
+                continue
+            if value is not None:
+                lines.append(f'{metric}{{cache="{_escape(name)}"}} {_format_value(value)}')
+    return lines
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _METRICS:
+        lines += metric.render()
+    lines += _render_caches()
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in timings.items()]
+    return ", ".join(entries + [f"total;dur={total * 1000:.1f}"])
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request by route template (not raw path, to bound label cardinality).
+
+    Phases recorded during the request (upstream calls, validation, ...) are observed per route and,
+    with `timing_headers`, sent as a Server-Timing header covering the work done before the response started.
+    """
+
+    def __init__(self, app, timing_headers: bool = METRICS_TIMING_HEADERS):
+        self.app = app
+        self.timing_headers = timing_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+        started_at = None
+
+        async def timed_send(message):
+            nonlocal status, started_at
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                started_at = time.perf_counter()
+                if self.timing_headers:
+                    header = server_timing(timings, started_at - start).encode("latin-1")
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _request_timings.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, route=route, status=str(status))
+            if started_at is not None:
+                RESPONSE_START_SECONDS.observe(started_at - start, method=method, route=route)
+            for phase, seconds in timings.items():
+                REQUEST_PHASE_SECONDS.observe(seconds, route=route, phase=phase)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Literal, Annotated, Dict, Any
 import uuid
 
@@ -24,7 +24,27 @@ class JobAnalysis(BaseModel):
     required_skills: List[str] = Field(description="A list of technical or soft skills mentioned.")
 
 class JobDescriptionRequest(BaseModel):
-    job_description: str
+    job_description: Optional[str] = None
+    job_id: Optional[str] = Field(default=None, description="ID of a job returned by /jobs, instead of job_description.")
+
+    @model_validator(mode="after")
+    def check_job_source(self):
+        if self.job_description is None and self.job_id is None:
+            raise ValueError("Provide either job_description or job_id.")
+        return self
+
+class BatchAnalysisRequest(BaseModel):
+    items: Annotated[List[JobDescriptionRequest], Field(min_length=1, max_length=100)]
+    max_concurrency: int = Field(default=8, ge=1, le=32)
+
+class BatchAnalysisResult(BaseModel):
+    index: int = Field(description="Position of the item in the request.")
+    job_id: Optional[str] = None
+    analysis: Optional[JobAnalysis] = None
+    error: Optional[str] = None
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[BatchAnalysisResult]
 
 class JobSearchRequest(BaseModel):
     query: str = "Software Developer Jobs in USA"
@@ -34,6 +54,86 @@ class JobSearchRequest(BaseModel):
     date_posted: str = "today"
     job_requirements: str = "under_3_years_experience"
 
+class JobIndexSearchRequest(BaseModel):
+    resume: Optional[str] = Field(default=None, description="Resume or profile text to rank stored jobs against.")
+    skills: List[str] = Field(default_factory=list, description="Skills to rank stored jobs against, alone or with resume.")
+    title: Optional[str] = Field(default=None, description="Desired job title; jobs sharing its words rank higher.")
+    limit: int = Field(default=20, ge=1, le=100)
+
+    @model_validator(mode="after")
+    def check_query(self):
+        if not (self.resume or "").strip() and not any(skill.strip() for skill in self.skills):
+            raise ValueError("Provide a resume or at least one skill.")
+        return self
+
+class JobIndexSearchResult(BaseModel):
+    job: RawJob
+    score: float = Field(description="Mean of similarity, skill_coverage (with query skills) and title overlap (with title).")
+    similarity: float = Field(description="Cosine similarity of hashed skill and word features.")
+    skill_coverage: Optional[float] = Field(default=None, description="Share of the query's skills the job asks for.")
+    matched_skills: List[str]
+    missing_skills: List[str] = Field(description="Skills the job asks for that the query lacks.")
+
+class JobIndexSearchResponse(BaseModel):
+    results: List[JobIndexSearchResult]
+
+# Resume-to-job matching models
+MATCH_MAX_PAIRS = 10_000
+
+class MatchResume(BaseModel):
+    resume_id: Optional[str] = None
+    resume: Optional[str] = Field(default=None, description="Resume or profile text.")
+    skills: List[str] = Field(default_factory=list, description="Skills the candidate has, alone or with resume.")
+
+    @model_validator(mode="after")
+    def check_resume_source(self):
+        if not (self.resume or "").strip() and not any(skill.strip() for skill in self.skills):
+            raise ValueError("Provide a resume or at least one skill.")
+        return self
+
+class MatchJob(BaseModel):
+    job_id: Optional[str] = Field(default=None, description="ID of a job returned by /jobs; its stored analysis is used if any.")
+    job_title: Optional[str] = None
+    job_description: Optional[str] = None
+    analysis: Optional[JobAnalysis] = Field(default=None, description="Output of /analysis/job for this job.")
+
+    @model_validator(mode="after")
+    def check_job_source(self):
+        if self.job_id is None and self.job_description is None and self.analysis is None:
+            raise ValueError("Provide job_id, job_description or analysis.")
+        return self
+
+class MatchRequest(BaseModel):
+    resumes: Annotated[List[MatchResume], Field(min_length=1)]
+    jobs: Annotated[List[MatchJob], Field(min_length=1)]
+    limit: Optional[int] = Field(default=None, ge=1, description="Return only the best matches.")
+
+    @model_validator(mode="after")
+    def check_pairs(self):
+        if len(self.resumes) * len(self.jobs) > MATCH_MAX_PAIRS:
+            raise ValueError(f"At most {MATCH_MAX_PAIRS} resume-job pairs per request.")
+        return self
+
+class SkillWeight(BaseModel):
+    skill: str
+    weight: float = Field(description="Share of the job's total skill weight this skill carries.")
+    from_analysis: bool = Field(description="Listed by the job's analysis rather than only mentioned in its description.")
+
+class MatchResult(BaseModel):
+    resume_index: int
+    resume_id: Optional[str] = None
+    job_index: int
+    job_id: Optional[str] = None
+    job_title: Optional[str] = None
+    score: float = Field(description="Blend of skill_coverage (weight MATCH_COVERAGE_WEIGHT, default 0.7) and similarity.")
+    skill_coverage: float = Field(description="Weighted share of the job's skills the resume has.")
+    similarity: float = Field(description="Cosine similarity of hashed skill and word features.")
+    matched_skills: List[SkillWeight]
+    missing_skills: List[SkillWeight] = Field(description="Skills the job asks for that the resume lacks, heaviest first.")
+
+class MatchResponse(BaseModel):
+    results: List[MatchResult] = Field(description="Best matches first.")
+
 # Question generation models
 QuestionType = Literal["coding", "behavioral", "job_requirement"]
 Difficulty = Literal["easy", "medium", "hard"]
@@ -61,10 +161,17 @@ class QuestionSet(BaseModel):
     questions: Annotated[List[Question], Field(min_length=10, max_length=10)]
 
 class QuestionGenerationRequest(BaseModel):
-    job_description: str
+    job_description: Optional[str] = None
     resume: str
-    job_title: str
+    job_title: Optional[str] = None
     difficulty: Difficulty = "medium"
+    job_id: Optional[str] = Field(default=None, description="ID of a job returned by /jobs, instead of job_description/job_title.")
+
+    @model_validator(mode="after")
+    def check_job_source(self):
+        if self.job_id is None and (self.job_description is None or self.job_title is None):
+            raise ValueError("Provide either job_id or both job_description and job_title.")
+        return self
 
 # Learning recommendation models
 class BulletEvalOut(BaseModel):
@@ -152,19 +259,67 @@ class QuestionEvaluation(BaseModel):
     feedback: str
     coding_review: Optional[CodingReview] = None
 
+class BulletGrade(BaseModel):
+    # Use 0, 0.5, or 1 where possible; allow floats for nuance.
+    score: float = Field(ge=0, le=1)
+    notes: Optional[str] = ""
+
+class QuestionGrade(BaseModel):
+    """Model output for one question; criteria, verdict and aggregates are filled in locally."""
+    bullet_scores: List[BulletGrade] = Field(description="One entry per rubric bullet, in rubric order.")
+    feedback: str
+    coding_review: Optional[CodingReview] = None
+
 class ScoreReport(BaseModel):
     job_title: str
     overall_summary: str
     items: List[QuestionEvaluation]
+    overall: Dict[str, Any] = Field(default_factory=dict, description="Aggregate stats computed from bullet scores.")
+    failed_question_ids: List[str] = Field(default_factory=list, description="Questions that could not be scored after retries.")
 
 class ScoringRequest(BaseModel):
     question_set: QuestionSet
 
+class ScoredReportConversionRequest(BaseModel):
+    question_set: QuestionSet
+    score_report: ScoreReport
+
 # Guidance/coach models
 class GuidanceRequest(BaseModel):
-    main_question: str
-    history_str: str
+    main_question: Optional[str] = Field(default=None, description="Required when starting a new session.")
+    history_str: str = Field(default="", description="Legacy full transcript; prefer session_id.")
     new_user_query: str
+    session_id: Optional[str] = Field(default=None, description="Coaching session to continue.")
+    start_session: bool = Field(default=False, description="Start a coaching session and return its session_id.")
+
+    @model_validator(mode="after")
+    def check_session(self):
+        if self.session_id is None and self.main_question is None:
+            raise ValueError("Provide main_question to start a session, or session_id to continue one.")
+        return self
 
 class GuidanceResponse(BaseModel):
     guidance: str
+    session_id: Optional[str] = None
+
+class CoachTurn(BaseModel):
+    user: str
+    coach: str
+
+class CoachSession(BaseModel):
+    session_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    main_question: str
+    summary: str = Field(default="", description="Rolling summary of turns compacted out of the window.")
+    turns: List[CoachTurn] = Field(default_factory=list)
+
+# Background task models
+class TaskInfo(BaseModel):
+    task_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    kind: Literal["learning", "scores"]
+    status: Literal["queued", "running", "succeeded", "failed"] = "queued"
+    attempts: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    callback_url: Optional[str] = None
+    created_at: float
+    updated_at: float
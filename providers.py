@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()  # API keys may come from a .env file
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated providers to build in the background once the app has started, e.g. "gemini,elevenlabs"
+PROVIDERS_WARM_ON_STARTUP = [name for name in os.getenv("PROVIDERS_WARM_ON_STARTUP", "").split(",") if name.strip()]
+
+
+class ProviderNotConfigured(Exception):
+    """The provider's API key is not set, so its endpoints are unavailable."""
+
+
+class Provider:
+    """A shared client for one external service, built (and its SDK imported) on first use."""
+
+    def __init__(self, name: str, env_key: str, factory: Callable[[str], Any], required: bool = True):
+        self.name = name
+        self.env_key = env_key
+        self.factory = factory
+        self.required = required  # False when the client works (e.g. against a fake server) without a key
+        self.init_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv(self.env_key))
+
+    def get(self):
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            if self._client is None:
+                if self.required and not self.configured:
+                    raise ProviderNotConfigured(f"{self.name} is not configured: set {self.env_key}")
+                start = time.perf_counter()
+                try:
+                    self._client = self.factory(os.getenv(self.env_key, ""))
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.init_seconds = time.perf_counter() - start
+                self.error = None
+        return self._client
+
+    def override(self, client) -> None:
+        """Use the given client instead of building one (e.g. a stub in benchmarks)."""
+        with self._lock:
+            self._client = client
+
+    def status(self) -> dict:
+        return {
+            "configured": self.configured,
+            "ready": (self.configured or not self.required) and self.error is None,
+            "initialized": self._client is not None,
+            "init_ms": round(self.init_seconds * 1000, 1) if self.init_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+def _gemini(api_key: str):
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+def _elevenlabs(api_key: str):
+    from elevenlabs.client import ElevenLabs
+    return ElevenLabs(api_key=api_key)
+
+
+def _jsearch(api_key: str):
+    from jsearch import jsearch_client
+    return jsearch_client
+
+
+PROVIDERS: Dict[str, Provider] = {
+    "gemini": Provider("gemini", "GEMINI_API_KEY", _gemini),
+    "elevenlabs": Provider("elevenlabs", "ELEVENLABS_API_KEY", _elevenlabs),
+    # A JSEARCH_BASE_URL override (e.g. benchmarks/fake_jsearch.py) needs no RapidAPI key
+    "jsearch": Provider("jsearch", "RAPIDAPI_KEY", _jsearch, required=not os.getenv("JSEARCH_BASE_URL")),
+}
+
+
+def get_client(name: str):
+    """Shared client for a provider; raises ProviderNotConfigured when its key is missing."""
+    return PROVIDERS[name].get()
+
+
+def provider_status() -> Dict[str, dict]:
+    return {name: provider.status() for name, provider in PROVIDERS.items()}
+
+
+def warm(names: List[str] = PROVIDERS_WARM_ON_STARTUP) -> None:
+    """Build the named providers now (blocking); failures are recorded in their status."""
+    for name in names:
+        try:
+            get_client(name.strip())
+        except ProviderNotConfigured as e:
+            logger.warning("Provider %s could not be initialized: %s", name.strip(), e)
+        except Exception:
+            logger.exception("Provider %s could not be initialized", name.strip())
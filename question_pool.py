@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from collections import Counter
+from typing import Iterable, List, Optional, Set, Tuple, get_args
+
+from pydantic import BaseModel, Field
+
+from cache import create_cache, make_cache_key, normalize_text
+from job_store import job_store
+from models import Difficulty, QuestionGenerationRequest, QuestionSet
+from services import generate_questions
+from skills import extract_skills
+from textprep import prepare_job_description
+
+logger = logging.getLogger(__name__)
+
+QUESTION_POOL_TTL_SECONDS = float(os.getenv("QUESTION_POOL_TTL_SECONDS", "604800"))
+QUESTION_POOL_SIZE = int(os.getenv("QUESTION_POOL_SIZE", "3"))  # generic sets kept per (job, difficulty)
+QUESTION_SET_MAX_REUSE = int(os.getenv("QUESTION_SET_MAX_REUSE", "20"))  # serves before a personalized set is regenerated
+QUESTION_POOL_WARM_INTERVAL_SECONDS = float(os.getenv("QUESTION_POOL_WARM_INTERVAL_SECONDS", "0"))  # 0 disables warming
+QUESTION_POOL_WARM_TOP_JOBS = int(os.getenv("QUESTION_POOL_WARM_TOP_JOBS", "10"))
+QUESTION_POOL_WARM_DIFFICULTIES = [
+    difficulty.strip() for difficulty in os.getenv("QUESTION_POOL_WARM_DIFFICULTIES", "medium").split(",") if difficulty.strip()
+]
+QUESTION_POOL_WARM_CONCURRENCY = int(os.getenv("QUESTION_POOL_WARM_CONCURRENCY", "2"))
+QUESTION_POOL_MAX_TRACKED_JOBS = int(os.getenv("QUESTION_POOL_MAX_TRACKED_JOBS", "10000"))  # view counts kept
+
+# Fail at startup rather than on every warmer tick
+_invalid_difficulties = set(QUESTION_POOL_WARM_DIFFICULTIES) - set(get_args(Difficulty))
+if _invalid_difficulties:
+    raise ValueError(f"QUESTION_POOL_WARM_DIFFICULTIES: unknown difficulty {', '.join(sorted(_invalid_difficulties))}; "
+                     f"use {', '.join(get_args(Difficulty))}")
+
+GENERIC_RESUME = "(No resume provided. Tailor the questions to the job description only.)"
+GENERIC_FINGERPRINT = "generic"
+
+# Personalized sets: one per (JD, title, difficulty, resume skills); generic pools: several per (JD, title, difficulty)
+question_set_cache = create_cache("question_sets", ttl=QUESTION_POOL_TTL_SECONDS)
+question_pool_cache = create_cache("question_pools", ttl=QUESTION_POOL_TTL_SECONDS)
+
+
+class CachedQuestionSet(BaseModel):
+    question_set: QuestionSet
+    served: int = 0
+
+
+class QuestionPool(BaseModel):
+    sets: List[QuestionSet] = Field(default_factory=list)
+    served: int = 0
+
+
+job_views: Counter = Counter()
+_background_tasks: Set[asyncio.Task] = set()
+_pending_keys: Set[str] = set()
+
+
+def resume_fingerprint(resume: str) -> str:
+    """Digest of the skills a resume mentions, so resumes with the same skills share questions."""
+    skills = sorted(extract_skills(resume))
+    if not skills:
+        return GENERIC_FINGERPRINT
+    return hashlib.sha256("\x00".join(skills).encode("utf-8")).hexdigest()[:16]
+
+
+def skills_resume(resume: str) -> str:
+    """The resume reduced to the skills its fingerprint covers.
+
+    Personalized sets are shared by every resume with the same fingerprint, so they are generated
+    from this alone: no candidate's projects, employers or other details can reach another candidate.
+    """
+    return "Candidate skills: " + ", ".join(sorted(extract_skills(resume)))
+
+
+def _keys(request: QuestionGenerationRequest) -> Tuple[str, str]:
+    jd_digest = make_cache_key(prepare_job_description(request.job_description), normalize_text(request.job_title or ""))
+    personal_key = make_cache_key(jd_digest, request.difficulty, resume_fingerprint(request.resume))
+    pool_key = make_cache_key(jd_digest, request.difficulty, GENERIC_FINGERPRINT)
+    return personal_key, pool_key
+
+
+def _with_fresh_ids(question_set: QuestionSet) -> QuestionSet:
+    """Copy a stored set with new question IDs so candidates never share IDs."""
+    questions = [
+        question.model_copy(update={"question_id": str(uuid.uuid4()), "user_response": ""})
+        for question in question_set.questions
+    ]
+    return question_set.model_copy(update={"questions": questions})
+
+
+def _serve_personalized(personal_key: str) -> Optional[QuestionSet]:
+    data = question_set_cache.get(personal_key)
+    if data is None:
+        return None
+    entry = CachedQuestionSet.model_validate_json(data)
+    entry.served += 1
+    if entry.served >= QUESTION_SET_MAX_REUSE:
+        question_set_cache.delete(personal_key)
+    else:
+        question_set_cache.set(personal_key, entry.model_dump_json())
+    return _with_fresh_ids(entry.question_set)
+
+
+def _serve_from_pool(pool_key: str) -> Optional[QuestionSet]:
+    data = question_pool_cache.get(pool_key)
+    if data is None:
+        return None
+    pool = QuestionPool.model_validate_json(data)
+    if not pool.sets:
+        return None
+    question_set = pool.sets[pool.served % len(pool.sets)]
+    pool.served += 1
+    question_pool_cache.set(pool_key, pool.model_dump_json())
+    return _with_fresh_ids(question_set)
+
+
+def _store_personalized(personal_key: str, question_set: QuestionSet) -> None:
+    question_set_cache.set(personal_key, CachedQuestionSet(question_set=question_set).model_dump_json())
+
+
+def _add_to_pool(pool_key: str, question_set: QuestionSet) -> None:
+    data = question_pool_cache.get(pool_key)
+    pool = QuestionPool.model_validate_json(data) if data is not None else QuestionPool()
+    pool.sets = (pool.sets + [question_set])[-QUESTION_POOL_SIZE:]
+    question_pool_cache.set(pool_key, pool.model_dump_json())
+
+
+def _pool_size(pool_key: str) -> int:
+    data = question_pool_cache.get(pool_key)
+    return len(QuestionPool.model_validate_json(data).sets) if data is not None else 0
+
+
+def _spawn(key: str, coroutine) -> None:
+    """Run a generation in the background unless one for the same key is already running."""
+    if key in _pending_keys:
+        coroutine.close()
+        return
+    _pending_keys.add(key)
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+
+    def done(finished: asyncio.Task):
+        _background_tasks.discard(finished)
+        _pending_keys.discard(key)
+        if not finished.cancelled():
+            finished.exception()  # retrieved so failures are not reported as unhandled
+
+    task.add_done_callback(done)
+
+
+async def _generate_personalized(request: QuestionGenerationRequest, personal_key: str) -> QuestionSet:
+    question_set = await generate_questions(request.model_copy(update={"resume": skills_resume(request.resume)}))
+    _store_personalized(personal_key, question_set)
+    return question_set
+
+
+async def get_question_set(request: QuestionGenerationRequest, personalize: bool = True) -> Tuple[QuestionSet, str]:
+    """Serve a question set from the cache or pool when possible; returns (set, source).
+
+    Sources: "cache" (personalized hit), "pool" (generic pooled set; a personalized set is
+    generated in the background when requested), "generated" (fresh generation).
+    """
+    personal_key, pool_key = _keys(request)
+    resume_is_generic = resume_fingerprint(request.resume) == GENERIC_FINGERPRINT
+
+    if personalize and not resume_is_generic:
+        cached = _serve_personalized(personal_key)
+        if cached is not None:
+            return cached, "cache"
+
+    pooled = _serve_from_pool(pool_key)
+    if pooled is not None:
+        if personalize and not resume_is_generic:
+            _spawn(personal_key, _generate_personalized(request, personal_key))
+        return pooled, "pool"
+
+    if personalize and not resume_is_generic:
+        question_set = await _generate_personalized(request, personal_key)
+    else:
+        # Pooled sets are shared between candidates, so never build them from a real resume
+        question_set = await generate_questions(request.model_copy(update={"resume": GENERIC_RESUME}))
+        _add_to_pool(pool_key, question_set)
+    return _with_fresh_ids(question_set), "generated"
+
+
+def record_job_views(job_ids: Iterable[str]) -> None:
+    """Count how often jobs are shown by /jobs so the warmer can target popular ones."""
+    job_views.update(job_ids)
+    if len(job_views) > QUESTION_POOL_MAX_TRACKED_JOBS:
+        # Keep the most-viewed half so memory stays bounded
+        top = job_views.most_common(QUESTION_POOL_MAX_TRACKED_JOBS // 2)
+        job_views.clear()
+        job_views.update(dict(top))
+
+
+def _decay_job_views() -> None:
+    """Halve view counts so popularity reflects recent traffic; jobs no longer viewed drop out."""
+    for job_id, views in list(job_views.items()):
+        if views > 1:
+            job_views[job_id] = views // 2
+        else:
+            del job_views[job_id]
+
+
+async def warm_pool_once(top_jobs: int = QUESTION_POOL_WARM_TOP_JOBS,
+                         difficulties: List[str] = QUESTION_POOL_WARM_DIFFICULTIES) -> int:
+    """Fill generic pools for the most-viewed jobs; returns the number of sets generated."""
+    semaphore = asyncio.Semaphore(QUESTION_POOL_WARM_CONCURRENCY)
+
+    async def fill(job, difficulty: str) -> int:
+        request = QuestionGenerationRequest(
+            job_description=job.job_description,
+            job_title=job.job_title or "",
+            resume=GENERIC_RESUME,
+            difficulty=difficulty,
+        )
+        _, pool_key = _keys(request)
+        generated = 0
+        async with semaphore:
+            while _pool_size(pool_key) < QUESTION_POOL_SIZE:
+                try:
+                    _add_to_pool(pool_key, await generate_questions(request))
+                    generated += 1
+                except Exception:
+                    break
+        return generated
+
+    jobs = [job_store.get_job(job_id) for job_id, _ in job_views.most_common(top_jobs)]
+    _decay_job_views()
+    results = await asyncio.gather(*(
+        fill(job, difficulty)
+        for job in jobs if job is not None and job.job_description
+        for difficulty in difficulties
+    ))
+    return sum(results)
+
+
+async def run_pool_warmer(interval: float = QUESTION_POOL_WARM_INTERVAL_SECONDS) -> None:
+    """Background loop that keeps pools for popular jobs warm."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await warm_pool_once()
+        except Exception:
+            logger.exception("Question pool warming failed")
@@ -0,0 +1,35 @@
+import os
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Serialize trusted service output straight to JSON instead of FastAPI's response_model pipeline
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "0") == "1"
+
+
+@lru_cache(maxsize=None)
+def type_adapter(annotation: Any) -> TypeAdapter:
+    """Cached TypeAdapter per response type, so its serializer is built once per process."""
+    return TypeAdapter(annotation)
+
+
+def render_json(content: Any, annotation: Any = None) -> bytes:
+    """JSON bytes for a model (or e.g. a List[Model] given its annotation), encoded by pydantic-core."""
+    if annotation is None and hasattr(content, "__pydantic_serializer__"):
+        return content.__pydantic_serializer__.to_json(content)
+    return type_adapter(annotation if annotation is not None else type(content)).dump_json(content)
+
+
+def model_response(content: Any, annotation: Any = None, headers: Optional[Mapping[str, str]] = None):
+    """Return `content` from a route with a response_model.
+
+    With FAST_JSON_RESPONSES, it is sent as pre-rendered JSON: FastAPI skips re-validating and
+    re-encoding it, which is safe because services already return validated instances of the
+    response model. Otherwise `content` is returned as is for FastAPI to validate and serialize.
+    Pass `headers` as set on an injected Response; FastAPI does not apply those to a returned Response.
+    """
+    if not FAST_JSON_RESPONSES:
+        return content
+    return Response(render_json(content, annotation), media_type="application/json", headers=dict(headers or {}))
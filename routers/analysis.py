@@ -1,14 +1,90 @@
+import asyncio
+import logging
+
 from fastapi import APIRouter, HTTPException
-from models import JobAnalysis, JobDescriptionRequest
-from services import analyze_job_description
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
+from models import RawJob, JobAnalysis, JobDescriptionRequest, BatchAnalysisRequest, BatchAnalysisResult, BatchAnalysisResponse
+from services import analyze_job_description, analyze_job_descriptions, analysis_cache
+from job_store import job_store
+from job_index import job_index
+from responses import model_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
+async def _index_analysis(job: RawJob, analysis: JobAnalysis) -> None:
+    """Keep the analysis so the job index (and /match) can use its skills; failures don't fail the analysis."""
+    try:
+        await asyncio.to_thread(job_index.add_analysis, job, analysis)
+    except Exception:
+        logger.exception("Indexing the analysis of job %s failed", job.job_id)
+
 @router.post("/job", response_model=JobAnalysis)
-def analyze_job(request: JobDescriptionRequest):
+async def analyze_job(request: JobDescriptionRequest):
     """Analyze a job description and extract summary, requirements, and skills using AI."""
+    job_description = request.job_description
+    job = None
+    if job_description is None:
+        job = job_store.get_job(request.job_id)
+        if job is None or not job.job_description:
+            raise HTTPException(status_code=404, detail=f"Job {request.job_id} not found")
+        job_description = job.job_description
+
     try:
-        analysis = analyze_job_description(request.job_description)
-        return analysis
+        analysis = await analyze_job_description(job_description)
+        if job is not None:
+            await _index_analysis(job, analysis)
+        return model_response(analysis)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs:batch", response_model=BatchAnalysisResponse)
+async def analyze_jobs_batch(request: BatchAnalysisRequest, stream: bool = False):
+    """Analyze many job descriptions or stored job IDs concurrently, reporting errors per item.
+
+    With `stream=true`, results are sent as NDJSON lines in completion order.
+    """
+    missing: List[BatchAnalysisResult] = []
+    descriptions: List[str] = []
+    positions: List[int] = []
+    stored: Dict[int, RawJob] = {}
+    for index, item in enumerate(request.items):
+        job_description: Optional[str] = item.job_description
+        if job_description is None:
+            job = job_store.get_job(item.job_id)
+            job_description = job.job_description if job is not None else None
+            if not job_description:
+                missing.append(BatchAnalysisResult(index=index, job_id=item.job_id, error=f"Job {item.job_id} not found"))
+                continue
+            stored[index] = job
+        descriptions.append(job_description)
+        positions.append(index)
+
+    async def completed():
+        for result in missing:
+            yield result
+        async for batch_indices, analysis, error in analyze_job_descriptions(descriptions, request.max_concurrency):
+            for batch_index in batch_indices:
+                index = positions[batch_index]
+                if analysis is not None and index in stored:
+                    await _index_analysis(stored[index], analysis)
+                yield BatchAnalysisResult(index=index, job_id=request.items[index].job_id, analysis=analysis, error=error)
+
+    if stream:
+        async def ndjson():
+            async for result in completed():
+                yield result.model_dump_json() + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    results: Dict[int, BatchAnalysisResult] = {}
+    async for result in completed():
+        results[result.index] = result
+    return model_response(BatchAnalysisResponse(results=[results[index] for index in range(len(request.items))]))
+
+@router.get("/cache")
+def get_analysis_cache_stats():
+    """Report hit/miss counters and size of the job analysis cache."""
+    return analysis_cache.stats()
@@ -1,15 +1,44 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from models import GuidanceRequest, GuidanceResponse
-from services import generate_guidance
+from services import generate_guidance, stream_guidance
+from coach_sessions import get_session, start_session
+from responses import model_response
 
 router = APIRouter(prefix="/coach", tags=["coach"])
 
 
 @router.post("/guide", response_model=GuidanceResponse)
-def guide_user(request: GuidanceRequest):
-    """Provide concise guidance to a follow-up question using main context and history."""
+async def guide_user(request: GuidanceRequest, stream: bool = False):
+    """Provide concise guidance to a follow-up question using main context and history.
+
+    Set `start_session` to start a coaching session; send the returned `session_id` with each
+    follow-up instead of the full history. Without either, the call is stateless. With `stream=true`, guidance is sent as Server-Sent
+    Events (`token` events, then `done` carrying the session_id).
+    """
+    if request.session_id is not None:
+        session = get_session(request.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Coaching session {request.session_id} not found or expired")
+    else:
+        session = start_session(request)
+
+    if stream:
+        async def events():
+            try:
+                async for text in stream_guidance(request, session):
+                    yield f"event: token\ndata: {json.dumps({'text': text})}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            else:
+                session_id = session.session_id if session is not None else None
+                yield f"event: done\ndata: {json.dumps({'session_id': session_id})}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
     try:
-        return generate_guidance(request)
+        return model_response(await generate_guidance(request, session))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,29 +1,131 @@
+import json
 from fastapi import APIRouter, HTTPException
-from typing import List
-from models import RawJob
-from services import get_raw_jobs
+from fastapi.responses import StreamingResponse
+from typing import List, Literal
+from models import RawJob, JobIndexSearchRequest, JobIndexSearchResult, JobIndexSearchResponse
+from services import get_raw_jobs, stream_raw_jobs
+from job_store import job_store
+from job_index import job_index
+from search_cache import job_search_cache
+from question_pool import record_job_views
+from responses import model_response
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+DescriptionMode = Literal["full", "truncate", "none"]
+
+def _shape_job(job: RawJob, description: DescriptionMode, description_chars: int) -> RawJob:
+    """Drop or shorten job_description for list views."""
+    if description == "none":
+        job.job_description = None
+    elif description == "truncate" and job.job_description and len(job.job_description) > description_chars:
+        job.job_description = job.job_description[:description_chars].rstrip() + "…"
+    return job
+
 @router.get("", response_model=List[RawJob])
-def get_jobs(
+async def get_jobs(
     query: str = "Software Engineering Jobs in  New York City", 
     page: int = 1, 
     num_pages: int = 1, 
     country: str = "us", 
     date_posted: str = "today", 
-    job_requirements: str = "over_3_years_experience"
+    job_requirements: str = "over_3_years_experience",
+    fan_out: bool = False,
+    description: DescriptionMode = "full",
+    description_chars: int = 300
 ):
     """Get raw job data from JSearch API without AI processing."""
     try:
-        jobs = get_raw_jobs(
+        jobs = await get_raw_jobs(
             query=query,
             page=page,
             num_pages=num_pages,
             country=country,
             date_posted=date_posted,
-            job_requirements=job_requirements
+            job_requirements=job_requirements,
+            fan_out=fan_out
         )
-        return jobs
+        record_job_views(job.job_id for job in jobs)
+        return model_response([_shape_job(job, description, description_chars) for job in jobs], List[RawJob])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stream")
+async def stream_jobs(
+    query: str = "Software Engineering Jobs in  New York City",
+    page: int = 1,
+    num_pages: int = 1,
+    country: str = "us",
+    date_posted: str = "today",
+    job_requirements: str = "over_3_years_experience",
+    format: Literal["ndjson", "sse"] = "ndjson",
+    description: DescriptionMode = "full",
+    description_chars: int = 300
+):
+    """Stream raw jobs as NDJSON lines or Server-Sent Events as each page arrives."""
+    jobs = stream_raw_jobs(
+        query=query,
+        page=page,
+        num_pages=num_pages,
+        country=country,
+        date_posted=date_posted,
+        job_requirements=job_requirements
+    )
+
+    async def ndjson():
+        try:
+            async for job in jobs:
+                record_job_views([job.job_id])
+                yield _shape_job(job, description, description_chars).model_dump_json() + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    async def sse():
+        try:
+            async for job in jobs:
+                record_job_views([job.job_id])
+                yield f"event: job\ndata: {_shape_job(job, description, description_chars).model_dump_json()}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        else:
+            yield "event: done\ndata: {}\n\n"
+
+    if format == "sse":
+        return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.get("/cache")
+def get_job_search_cache_stats():
+    """Report hit/stale/miss/coalesced counters and size of the job search cache."""
+    return job_search_cache.stats()
+
+@router.post("/search", response_model=JobIndexSearchResponse)
+def search_jobs(request: JobIndexSearchRequest, description: DescriptionMode = "full", description_chars: int = 300):
+    """Rank previously fetched jobs against a resume and/or skill list using the local job index (no API calls)."""
+    try:
+        hits = job_index.search(skills=request.skills, text=request.resume, title=request.title, limit=request.limit)
+        jobs = job_store.get_jobs([hit.job_id for hit in hits])
+        results = [
+            JobIndexSearchResult(job=_shape_job(job, description, description_chars), score=hit.score,
+                                 similarity=hit.similarity, skill_coverage=hit.skill_coverage,
+                                 matched_skills=hit.matched_skills, missing_skills=hit.missing_skills)
+            for hit, job in zip(hits, jobs)
+            if job is not None
+        ]
+        return model_response(JobIndexSearchResponse(results=results))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/index")
+def get_job_index_stats():
+    """Report the size of the local job index and how often it was searched."""
+    return job_index.stats()
+
+@router.get("/{job_id}", response_model=RawJob)
+def get_job(job_id: str):
+    """Get a previously fetched job from the local job store."""
+    job = job_store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    record_job_views([job_id])
+    return model_response(job)
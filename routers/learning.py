@@ -1,14 +1,33 @@
-from fastapi import APIRouter, HTTPException
-from models import RecommendationReport, LearningPlanRequest
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from models import TaskInfo, RecommendationReport, LearningPlanRequest
 from services import generate_learning_plan
+from tasks import InvalidCallbackUrl, task_queue
+from responses import model_response
 
 router = APIRouter(prefix="/learning", tags=["learning"])
 
-@router.post("", response_model=RecommendationReport)
-def generate_learning_recommendations(request: LearningPlanRequest):
-    """Generate learning recommendations based on scored interview report."""
+@router.post("", response_model=RecommendationReport, responses={202: {"model": TaskInfo}})
+async def generate_learning_recommendations(
+    request: LearningPlanRequest,
+    async_mode: bool = Query(False, alias="async", description="Queue the generation and return a task (202)"),
+    callback_url: Optional[str] = Query(None, description="With async=true, POST the finished task here"),
+):
+    """Generate learning recommendations based on scored interview report.
+
+    With `async=true`, returns 202 with a TaskInfo right away; poll GET /tasks/{task_id},
+    stream GET /tasks/{task_id}/events, or pass `callback_url` to receive the result.
+    """
+    if async_mode:
+        try:
+            task = await task_queue.submit("learning", request, callback_url)
+        except InvalidCallbackUrl as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return JSONResponse(status_code=202, content=task.model_dump(mode="json"),
+                            headers={"Location": f"/tasks/{task.task_id}"})
     try:
-        recommendation_report = generate_learning_plan(request)
-        return recommendation_report
+        recommendation_report = await generate_learning_plan(request)
+        return model_response(recommendation_report)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+from models import MatchRequest, MatchResponse, MatchResult, ScoredReportIn
+from matching import job_profiles, match_resumes, to_scored_report_in
+from responses import model_response
+
+router = APIRouter(prefix="/match", tags=["match"])
+
+@router.post("", response_model=MatchResponse)
+def match_resumes_to_jobs(request: MatchRequest):
+    """Score resumes against jobs by weighted skill overlap and text similarity, without any AI call.
+
+    Send one resume and many jobs to rank jobs, or many resumes and one job to rank candidates.
+    Jobs given by `job_id` use their stored analysis (from /analysis/job) when there is one.
+    """
+    profiles = job_profiles(request.jobs)
+    for job, profile in zip(request.jobs, profiles):
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"Job {job.job_id} not found")
+
+    try:
+        results = match_resumes(request.resumes, profiles, request.limit)
+        return model_response(MatchResponse(results=results))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/learning-input", response_model=ScoredReportIn)
+def convert_match_result(match: MatchResult):
+    """Convert a match result into the scored_report that /learning expects, one item per job skill."""
+    if not match.matched_skills and not match.missing_skills:
+        raise HTTPException(status_code=400, detail="The match has no job skills to plan from")
+    return model_response(to_scored_report_in(match))
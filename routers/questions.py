@@ -1,14 +1,35 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from models import QuestionSet, QuestionGenerationRequest
 from services import generate_questions
+from job_store import job_store
+from question_pool import get_question_set
+from responses import model_response
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
 @router.post("", response_model=QuestionSet)
-def generate_interview_questions(request: QuestionGenerationRequest):
-    """Generate interview questions based on job description and resume."""
+async def generate_interview_questions(request: QuestionGenerationRequest, response: Response,
+                                       use_pool: bool = True, personalize: bool = True):
+    """Generate interview questions based on job description and resume.
+
+    With `use_pool`, sets are served from the question-set cache or the pre-generated pool for the
+    job when available (`X-Question-Set-Source` header: cache, pool or generated). With
+    `personalize`, a pool hit also starts a resume-specific generation that later calls reuse.
+    """
+    if request.job_id is not None and (request.job_description is None or request.job_title is None):
+        job = job_store.get_job(request.job_id)
+        if job is None or not job.job_description:
+            raise HTTPException(status_code=404, detail=f"Job {request.job_id} not found")
+        request = request.model_copy(update={
+            "job_description": request.job_description or job.job_description,
+            "job_title": request.job_title or job.job_title or "",
+        })
+
     try:
-        question_set = generate_questions(request)
-        return question_set
+        if not use_pool:
+            return model_response(await generate_questions(request))
+        question_set, source = await get_question_set(request, personalize=personalize)
+        response.headers["X-Question-Set-Source"] = source
+        return model_response(question_set, headers=response.headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
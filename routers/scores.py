@@ -1,14 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from models import ScoreReport, ScoringRequest
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from models import TaskInfo, ScoreReport, ScoringRequest, ScoredReportIn, ScoredReportConversionRequest
 from services import score_questions
+from tasks import InvalidCallbackUrl, task_queue
+from scoring import to_scored_report_in
+from responses import model_response
 
 router = APIRouter(prefix="/scores", tags=["scores"])
 
-@router.post("", response_model=ScoreReport)
-def score_interview_questions(request: ScoringRequest):
-    """Score interview questions based on user responses."""
+@router.post("", response_model=ScoreReport, responses={202: {"model": TaskInfo}})
+async def score_interview_questions(
+    request: ScoringRequest,
+    async_mode: bool = Query(False, alias="async", description="Queue the scoring and return a task (202)"),
+    callback_url: Optional[str] = Query(None, description="With async=true, POST the finished task here"),
+):
+    """Score interview questions based on user responses.
+
+    With `async=true`, returns 202 with a TaskInfo right away; see POST /learning.
+    """
+    if async_mode:
+        try:
+            task = await task_queue.submit("scores", request, callback_url)
+        except InvalidCallbackUrl as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return JSONResponse(status_code=202, content=task.model_dump(mode="json"),
+                            headers={"Location": f"/tasks/{task.task_id}"})
     try:
-        score_report = score_questions(request)
-        return score_report
+        score_report = await score_questions(request)
+        return model_response(score_report)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/learning-input", response_model=ScoredReportIn)
+def convert_score_report(request: ScoredReportConversionRequest):
+    """Convert a ScoreReport and its QuestionSet into the scored_report that /learning expects."""
+    if not request.score_report.items:
+        raise HTTPException(status_code=400, detail="The score report has no scored questions to plan from")
+    return model_response(to_scored_report_in(request.score_report, request.question_set))
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from models import TaskInfo
+from tasks import TERMINAL_STATUSES, task_queue, task_store
+from responses import model_response
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+# How often the event stream re-reads the store when no local update arrives (e.g. a shared queue)
+EVENTS_POLL_SECONDS = 1.0
+
+
+@router.get("/{task_id}", response_model=TaskInfo)
+def get_task(task_id: str):
+    """Get the status of a background task, and its result once it has finished."""
+    task = task_store.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    return model_response(task)
+
+
+@router.get("/{task_id}/events")
+async def task_events(task_id: str):
+    """Stream `status` Server-Sent Events for a task until it succeeds or fails."""
+    if task_store.get(task_id) is None:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+
+    async def events():
+        last = None
+        while True:
+            task = task_store.get(task_id)
+            if task is None:
+                return
+            state = (task.status, task.attempts)
+            if state != last:
+                last = state
+                yield f"event: status\ndata: {task.model_dump_json()}\n\n"
+            if task.status in TERMINAL_STATUSES:
+                return
+            await task_queue.wait_for_update(task_id, EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,25 +1,33 @@
 # routers/tts.py
 from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
 import os
-from typing import Iterable, Union, Optional, List
-from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Iterator, Optional, List
+from audio_cache import audio_cache
+from metrics import audio_seconds, record_audio, upstream, upstream_iter
+from textprep import split_sentences
+from providers import ProviderNotConfigured, get_client
+from transcription import STT_CHUNKING_MIN_SECONDS, transcribe_chunked, wav_duration
+
+TTS_SENTENCE_MIN_CHARS = int(os.getenv("TTS_SENTENCE_MIN_CHARS", "40"))  # shorter sentences join the next one
+TTS_PREFETCH_SENTENCES = int(os.getenv("TTS_PREFETCH_SENTENCES", "2"))  # synthesized ahead of the one streaming
+TTS_SYNTHESIS_WORKERS = int(os.getenv("TTS_SYNTHESIS_WORKERS", "8"))
+# Formats whose per-sentence audio can be concatenated into one playable stream
+CHUNKED_OUTPUT_FORMATS = ("mp3_", "pcm_", "ulaw_")
+
+_synthesis_pool = ThreadPoolExecutor(max_workers=TTS_SYNTHESIS_WORKERS, thread_name_prefix="tts")
 
-load_dotenv()  # loads ELEVENLABS_API_KEY from .env if present
-
-API_KEY = os.getenv("ELEVENLABS_API_KEY")
-if not API_KEY:
-    # Fail fast so you notice during startup
-    raise RuntimeError(
-        "Missing ELEVENLABS_API_KEY. Add it to your environment or .env file."
-    )
+router = APIRouter(prefix="/tts", tags=["tts"])
 
-client = ElevenLabs(api_key=API_KEY)
 
-router = APIRouter(prefix="/tts", tags=["tts"])
+def _client():
+    """Shared ElevenLabs client; without ELEVENLABS_API_KEY only the /tts endpoints fail (503)."""
+    return get_client("elevenlabs")
 
 
 class TTSRequest(BaseModel):
@@ -32,33 +40,74 @@ class TTSRequest(BaseModel):
 class STTResponse(BaseModel):
     transcription: str
     language_code: Optional[str] = None
+    words: Optional[List] = None  # timestamped words, when the model returns them
     audio_events: Optional[List] = None
     speakers: Optional[List] = None
 
 
-def _to_bytes_iter(
-    audio: Union[bytes, bytearray, Iterable[bytes]]
-) -> Iterable[bytes]:
-    """ElevenLabs SDK may return bytes or an iterable of bytes; normalize."""
-    if isinstance(audio, (bytes, bytearray)):
-        yield audio
-    else:
-        for chunk in audio:
-            yield chunk
+def _synthesize_stream(text: str, req: TTSRequest) -> Iterator[bytes]:
+    """Stream audio for one piece of text, from the audio cache or ElevenLabs (then cached)."""
+    key = audio_cache.key(text, req.voice_id, req.model_id, req.output_format)
+    cached = audio_cache.get(key)
+    if cached is not None:
+        record_audio("tts", "cache", len(cached), audio_seconds(req.output_format, len(cached)))
+        yield cached
+        return
+    parts = []
+    for chunk in upstream_iter(_client().text_to_speech.convert_as_stream(
+        voice_id=req.voice_id,
+        text=text,
+        model_id=req.model_id,
+        output_format=req.output_format,
+    ), "elevenlabs", "tts", req.model_id):
+        parts.append(chunk)
+        yield chunk
+    audio = b"".join(parts)
+    record_audio("tts", "upstream", len(audio), audio_seconds(req.output_format, len(audio)))
+    audio_cache.set(key, audio)
+
+
+def _synthesize(text: str, req: TTSRequest) -> bytes:
+    return b"".join(_synthesize_stream(text, req))
+
+
+def _speech_chunks(req: TTSRequest) -> Iterator[bytes]:
+    """Audio for the request, sentence by sentence: the first streams straight through while the
+    next few are synthesized in the background."""
+    sentences = [req.text]
+    if req.output_format.startswith(CHUNKED_OUTPUT_FORMATS):
+        sentences = split_sentences(req.text, TTS_SENTENCE_MIN_CHARS) or sentences
+    upcoming = iter(sentences[1:])
+    prefetched = deque(
+        _synthesis_pool.submit(_synthesize, sentence, req) for sentence in islice(upcoming, TTS_PREFETCH_SENTENCES)
+    )
+    try:
+        yield from _synthesize_stream(sentences[0], req)
+        while prefetched:
+            audio = prefetched.popleft().result()
+            sentence = next(upcoming, None)
+            if sentence is not None:
+                prefetched.append(_synthesis_pool.submit(_synthesize, sentence, req))
+            yield audio
+    finally:
+        for future in prefetched:
+            future.cancel()
 
 
 @router.post("/speak")
 def speak(req: TTSRequest):
     """
     Synthesize speech and stream the audio back.
+
+    Text is synthesized sentence by sentence so audio starts after the first sentence;
+    sentences already synthesized with the same voice, model and format come from the audio cache.
     """
+    chunks = _speech_chunks(req)
     try:
-        audio = client.text_to_speech.convert(
-            text=req.text,
-            voice_id=req.voice_id,
-            model_id=req.model_id,
-            output_format=req.output_format,
-        )
+        # Pull the first chunk here so upstream failures still return a 502
+        first = next(chunks, b"")
+    except ProviderNotConfigured as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"ElevenLabs error: {e}")
 
@@ -68,22 +117,31 @@ def speak(req: TTSRequest):
     filename_ext = "mp3" if media_type == "audio/mpeg" else "wav"
 
     return StreamingResponse(
-        _to_bytes_iter(audio),
+        chain([first], chunks),
         media_type=media_type,
         headers={"Content-Disposition": f'inline; filename="speech.{filename_ext}"'},
     )
 
 
+@router.get("/cache")
+def get_audio_cache_stats():
+    """Audio cache size and hit/miss counts."""
+    return audio_cache.stats()
+
+
 @router.post("/transcribe", response_model=STTResponse)
 async def transcribe_audio(
     file: UploadFile = File(...),
     model_id: str = "scribe_v1",
     tag_audio_events: bool = True,
     language_code: str = "eng",
-    diarize: bool = True
+    diarize: bool = True,
+    chunked: bool = False
 ):
     """
     Convert speech to text using ElevenLabs Speech-to-Text API.
+
+    Uploads are capped at TRANSCRIBE_MAX_UPLOAD_BYTES (413 beyond it).
     
     Args:
         file: Audio file to transcribe (supports MP3, WAV, M4A, etc.)
@@ -91,6 +149,8 @@ async def transcribe_audio(
         tag_audio_events: Whether to tag audio events like laughter, applause, etc.
         language_code: Language of the audio file. If None, auto-detects language.
         diarize: Whether to annotate who is speaking (speaker diarization)
+        chunked: Split WAV recordings longer than STT_CHUNKING_MIN_SECONDS at silences and
+            transcribe the segments concurrently (other formats are sent whole)
     
     Returns:
         STTResponse with transcription and metadata
@@ -103,24 +163,35 @@ async def transcribe_audio(
         )
     
     try:
-        # Read the uploaded file content
-        audio_content = await file.read()
-        audio_data = BytesIO(audio_content)
-        
-        # Transcribe using ElevenLabs
-        transcription = client.speech_to_text.convert(
-            file=audio_data,
-            model_id=model_id,
-            tag_audio_events=tag_audio_events,
-            language_code=language_code if language_code != "auto" else None,
-            diarize=diarize
-        )
+        # Hand the spooled upload straight to the SDK (no in-memory copy) and keep the
+        # blocking call off the event loop
+        await file.seek(0)
+
+        def convert(upload):
+            with upstream("elevenlabs", "stt", model_id):
+                return _client().speech_to_text.convert(
+                    file=upload,
+                    model_id=model_id,
+                    tag_audio_events=tag_audio_events,
+                    language_code=language_code if language_code != "auto" else None,
+                    diarize=diarize
+                )
+
+        # Reads only the header; None for anything but PCM WAV
+        duration = await run_in_threadpool(wav_duration, file.file)
+        record_audio("stt", "upload", file.size or 0, duration)
+
+        if chunked and duration is not None and duration > STT_CHUNKING_MIN_SECONDS:
+            return STTResponse(**await transcribe_chunked(file.file, convert))
+
+        transcription = await run_in_threadpool(convert, (file.filename, file.file, file.content_type))
         
         # Parse the response
         transcription_text = transcription.text if hasattr(transcription, 'text') else str(transcription)
         
         # Extract additional metadata if available
         detected_language = getattr(transcription, 'language_code', language_code)
+        words = getattr(transcription, 'words', None)
         audio_events = getattr(transcription, 'audio_events', None)
         speakers = getattr(transcription, 'speakers', None)
         
@@ -129,14 +200,19 @@ async def transcribe_audio(
             audio_events = None
         if speakers is not None and not isinstance(speakers, list):
             speakers = None
+        if words is not None and not isinstance(words, list):
+            words = None
         
         return STTResponse(
             transcription=transcription_text,
             language_code=detected_language,
+            words=words,
             audio_events=audio_events,
             speakers=speakers
         )
         
+    except ProviderNotConfigured as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=502, 
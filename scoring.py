@@ -0,0 +1,138 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from models import (
+    BulletEval, BulletEvalOut, Question, QuestionEvaluation, QuestionGrade, QuestionSet,
+    ScoredItem, ScoredReportIn, ScoreReport,
+)
+
+# Average bullet score at or above each threshold earns the verdict; below the last is "poor"
+VERDICT_THRESHOLDS: Tuple[Tuple[str, float], ...] = (("excellent", 0.85), ("good", 0.65), ("fair", 0.35))
+VERDICTS = [verdict for verdict, _ in VERDICT_THRESHOLDS] + ["poor"]
+
+# Relative weight of each question kind in weighted totals
+KIND_WEIGHTS: Dict[str, float] = {"coding": 1.0, "behavioral": 1.0, "job_requirement": 1.0}
+
+
+def _score_matrix(evaluations: List[QuestionEvaluation]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pad per-item bullet scores into an (items x bullets) matrix with a validity mask."""
+    width = max((len(item.bullet_evals) for item in evaluations), default=0)
+    scores = np.zeros((len(evaluations), width))
+    mask = np.zeros((len(evaluations), width), dtype=bool)
+    for row, item in enumerate(evaluations):
+        count = len(item.bullet_evals)
+        scores[row, :count] = [bullet.score for bullet in item.bullet_evals]
+        mask[row, :count] = True
+    return scores, mask
+
+
+def verdicts_for(averages: np.ndarray) -> List[str]:
+    """Map average bullet scores to verdicts."""
+    conditions = [averages >= threshold for _, threshold in VERDICT_THRESHOLDS]
+    return np.select(conditions, VERDICTS[:-1], default=VERDICTS[-1]).tolist()
+
+
+def item_aggregates(evaluations: List[QuestionEvaluation]) -> Dict[str, np.ndarray]:
+    """Per-item raw/max/percent/average and weighted totals, computed across all items at once."""
+    scores, mask = _score_matrix(evaluations)
+    raw = (scores * mask).sum(axis=1)
+    maximum = mask.sum(axis=1).astype(float)
+    average = np.divide(raw, maximum, out=np.zeros_like(raw), where=maximum > 0)
+    weight = np.array([KIND_WEIGHTS.get(item.kind, 1.0) for item in evaluations])
+    return {
+        "raw_score": raw,
+        "max_score": maximum,
+        "average": average,
+        "percent": average * 100,
+        "weight": weight,
+        "weighted_raw": raw * weight,
+        "weighted_max": maximum * weight,
+    }
+
+
+def evaluation_from_grade(question: Question, grade: QuestionGrade) -> QuestionEvaluation:
+    """Attach rubric criteria and the local verdict to the model's per-bullet scores."""
+    if len(grade.bullet_scores) != len(question.rubric):
+        raise ValueError(f"expected {len(question.rubric)} bullet scores, got {len(grade.bullet_scores)}")
+    evaluation = QuestionEvaluation(
+        question_id=question.question_id,
+        kind=question.kind,
+        verdict="poor",
+        bullet_evals=[
+            BulletEval(criterion=criterion, score=bullet.score, notes=bullet.notes)
+            for criterion, bullet in zip(question.rubric, grade.bullet_scores)
+        ],
+        feedback=grade.feedback,
+        coding_review=grade.coding_review,
+    )
+    return apply_verdicts([evaluation])[0]
+
+
+def unanswered_evaluation(question: Question) -> QuestionEvaluation:
+    """Score an empty response locally: every criterion is unmet."""
+    grade = QuestionGrade(
+        bullet_scores=[{"score": 0, "notes": "Not addressed; no response was given."} for _ in question.rubric],
+        feedback="No response was provided for this question.",
+    )
+    return evaluation_from_grade(question, grade)
+
+
+def apply_verdicts(evaluations: List[QuestionEvaluation]) -> List[QuestionEvaluation]:
+    """Recompute every item's verdict from its bullet scores."""
+    if not evaluations:
+        return evaluations
+    verdicts = verdicts_for(item_aggregates(evaluations)["average"])
+    return [item.model_copy(update={"verdict": verdict}) for item, verdict in zip(evaluations, verdicts)]
+
+
+def overall_stats(evaluations: List[QuestionEvaluation]) -> Dict[str, Any]:
+    """Report-level totals, percentages and verdict counts."""
+    aggregates = item_aggregates(evaluations)
+    raw, maximum = aggregates["raw_score"].sum(), aggregates["max_score"].sum()
+    weighted_raw, weighted_max = aggregates["weighted_raw"].sum(), aggregates["weighted_max"].sum()
+    verdict_counts = {verdict: 0 for verdict in VERDICTS}
+    for item in evaluations:
+        verdict_counts[item.verdict] += 1
+    return {
+        "questions_scored": len(evaluations),
+        "raw_score": float(raw),
+        "max_score": float(maximum),
+        "percent": round(float(raw / maximum * 100), 2) if maximum else 0.0,
+        "weighted_raw": float(weighted_raw),
+        "weighted_max": float(weighted_max),
+        "weighted_percent": round(float(weighted_raw / weighted_max * 100), 2) if weighted_max else 0.0,
+        "verdict_counts": verdict_counts,
+    }
+
+
+def to_scored_report_in(report: ScoreReport, question_set: QuestionSet) -> ScoredReportIn:
+    """Convert a ScoreReport (plus its QuestionSet for question text) into the /learning input."""
+    texts = {question.question_id: question.text for question in question_set.questions}
+    aggregates = item_aggregates(report.items)
+    items = [
+        ScoredItem(
+            question_id=item.question_id,
+            kind=item.kind,
+            text=texts.get(item.question_id, ""),
+            verdict=item.verdict,
+            raw_score=float(aggregates["raw_score"][row]),
+            max_score=float(aggregates["max_score"][row]),
+            percent=round(float(aggregates["percent"][row]), 2),
+            weight=float(aggregates["weight"][row]),
+            weighted_raw=float(aggregates["weighted_raw"][row]),
+            weighted_max=float(aggregates["weighted_max"][row]),
+            bullet_evals=[
+                BulletEvalOut(criterion=bullet.criterion, score=bullet.score, notes=bullet.notes)
+                for bullet in item.bullet_evals
+            ],
+            feedback=item.feedback,
+            coding_review=item.coding_review,
+        )
+        for row, item in enumerate(report.items)
+    ]
+    return ScoredReportIn(
+        job_title=report.job_title,
+        overall={**overall_stats(report.items), "summary": report.overall_summary},
+        items=items,
+    )
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from pydantic import TypeAdapter
+
+from cache import normalize_text, make_cache_key
+from metrics import register_cache
+from models import RawJob
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+JOB_SEARCH_CACHE_ENABLED = os.getenv("JOB_SEARCH_CACHE_ENABLED", "1") == "1"
+JOB_SEARCH_FRESH_SECONDS = float(os.getenv("JOB_SEARCH_FRESH_SECONDS", "300"))  # served without refreshing
+JOB_SEARCH_STALE_SECONDS = float(os.getenv("JOB_SEARCH_STALE_SECONDS", "3600"))  # served while refreshing, up to this age
+JOB_SEARCH_CACHE_MAX_BYTES = int(os.getenv("JOB_SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+JOB_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("JOB_SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+_jobs_adapter = TypeAdapter(List[RawJob])
+
+
+def search_key(query: str, page: int, num_pages: int, country: str, date_posted: str, job_requirements: str) -> str:
+    """Key for a search: case and whitespace folded, job_requirements order-insensitive."""
+    requirements = ",".join(sorted(filter(None, (normalize_text(part) for part in job_requirements.split(",")))))
+    return make_cache_key(query, str(page), str(num_pages), country, date_posted, requirements)
+
+
+class JobSearchCache:
+    """Size-bounded LRU of search results with stale-while-revalidate and request coalescing.
+
+    Results are kept as JSON bytes, which bounds memory exactly and hands every caller its own
+    RawJob instances (routes reshape jobs in place). Within `fresh` seconds an entry is served as
+    is; up to `stale` seconds it is served immediately while one background refresh runs. Concurrent
+    misses (and a running refresh) for a key share one upstream fetch through a SingleFlight group.
+    """
+
+    def __init__(self, enabled: bool = JOB_SEARCH_CACHE_ENABLED, fresh: float = JOB_SEARCH_FRESH_SECONDS,
+                 stale: float = JOB_SEARCH_STALE_SECONDS, max_bytes: int = JOB_SEARCH_CACHE_MAX_BYTES,
+                 max_entries: int = JOB_SEARCH_CACHE_MAX_ENTRIES):
+        self.enabled = enabled
+        self.fresh = fresh
+        self.stale = max(stale, fresh)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()  # key -> (fetched_at, jobs JSON)
+        self._total = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("job_search")
+        self._refreshing: Set[asyncio.Task] = set()
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.stale:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _remove(self, key: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._total -= len(payload)
+
+    def put(self, key: str, jobs: List[RawJob]) -> bytes:
+        payload = _jobs_adapter.dump_json(jobs)
+        if not self.enabled or len(payload) > self.max_bytes:
+            return payload
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), payload)
+            self._total += len(payload)
+            while self._total > self.max_bytes or len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return payload
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[List[RawJob]]]) -> bytes:
+        """JSON of the fetched jobs, stored under `key`; joins the fetch already running for `key` if any."""
+        async def fetch_and_store() -> bytes:
+            return self.put(key, await fetch())
+
+        return await self._flight.do(key, fetch_and_store)
+
+    def _refresh(self, key: str, fetch: Callable[[], Awaitable[List[RawJob]]]) -> None:
+        if self._flight.in_flight(key):
+            return
+        self.refreshes += 1
+        task = asyncio.create_task(self._fetch(key, fetch))
+        self._refreshing.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # The stale entry keeps being served until it ages out
+            self.refresh_errors += 1
+            logger.error("Job search refresh failed", exc_info=task.exception())
+
+    def cached(self, key: str, fetch: Callable[[], Awaitable[List[RawJob]]]) -> Optional[List[RawJob]]:
+        """Cached jobs for `key` (refreshing them in the background when stale), else None."""
+        if not self.enabled:
+            return None
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.fresh:
+            self.stale_hits += 1
+            self._refresh(key, fetch)
+        else:
+            self.hits += 1
+        return _jobs_adapter.validate_json(entry[1])
+
+    async def get(self, key: str, fetch: Callable[[], Awaitable[List[RawJob]]]) -> List[RawJob]:
+        """Jobs for `key` from the cache, or from `fetch`, shared with concurrent callers of the same key."""
+        if not self.enabled:
+            return await fetch()
+        jobs = self.cached(key, fetch)
+        if jobs is not None:
+            return jobs
+        self.misses += 1
+        return _jobs_adapter.validate_json(await self._fetch(key, fetch))
+
+    def stats(self) -> dict:
+        flight = self._flight.stats()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "fresh_seconds": self.fresh,
+                "stale_seconds": self.stale,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": flight["coalesced"],
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "in_flight": flight["in_flight"],
+            }
+
+
+job_search_cache = JobSearchCache()
+register_cache("job_search", job_search_cache.stats)
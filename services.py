@@ -1,100 +1,314 @@
-import requests
+import asyncio
+import hashlib
+import json
 import os
-from typing import List
-from google import genai
-from google.genai import types
-from models import RawJob, JobAnalysis, QuestionSet, QuestionGenerationRequest, RecommendationReport, LearningPlanRequest, ScoreReport, ScoringRequest, GuidanceRequest, GuidanceResponse
-
-# Environment variables
-RAPIDAPI_HOST = "jsearch.p.rapidapi.com"
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "your-rapidapi-key-here")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Setup AI client
-if not GEMINI_API_KEY:
-    print("Warning: GEMINI_API_KEY not found. Using dummy key, AI calls will fail.")
-    ai_client = genai.Client(api_key="DUMMY_KEY_IF_MISSING")
-else:
-    ai_client = genai.Client(api_key=GEMINI_API_KEY)
-
-def get_raw_jobs(query: str, page: int, num_pages: int, country: str, 
-                date_posted: str, job_requirements: str) -> List[RawJob]:
-    """Fetch raw job data from JSearch API."""
-    url = f"https://{RAPIDAPI_HOST}/search"
-    headers = {
-        "x-rapidapi-host": RAPIDAPI_HOST,
-        "x-rapidapi-key": RAPIDAPI_KEY,
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from models import RawJob, JobAnalysis, Question, QuestionSet, QuestionGenerationRequest, RecommendationReport, LearningPlanRequest, QuestionEvaluation, QuestionGrade, ScoreReport, ScoringRequest, GuidanceRequest, GuidanceResponse
+from cache import create_cache, make_cache_key
+from llm import backend_for, client_for, model_for
+from metrics import LLM_QUEUE_SECONDS, VALIDATION_SECONDS, observe_upstream, record_usage, timed, upstream
+from providers import get_client
+from job_store import job_store
+from job_index import job_index
+from search_cache import job_search_cache, search_key
+from singleflight import SingleFlight
+from models import CoachSession, CoachTurn
+from textprep import prepare_job_description, prepare_resume
+from scoring import evaluation_from_grade, overall_stats, unanswered_evaluation
+from coach_sessions import COACH_WINDOW_TURNS, append_turn, compact_turns, history_text, needs_compaction, session_lock
+
+# Bounds for in-flight Gemini generations
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "64"))  # per model
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "90"))
+
+_model_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+class GeminiTimeoutError(Exception):
+    """A Gemini generation exceeded GEMINI_TIMEOUT_SECONDS."""
+
+def _model_semaphore(model: str) -> asyncio.Semaphore:
+    semaphore = _model_semaphores.get(model)
+    if semaphore is None:
+        semaphore = _model_semaphores[model] = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    return semaphore
+
+@asynccontextmanager
+async def _generation_slot(model: str):
+    """Hold one of the model's in-flight slots, timing the wait for it."""
+    semaphore = _model_semaphore(model)
+    with timed(LLM_QUEUE_SECONDS, "llm_queue", model=model):
+        await semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+async def generate_content(model: str, contents, config):
+    """Run a Gemini generation on the async client, bounded per model and by a timeout."""
+    provider = backend_for(model)
+    async with _generation_slot(model):
+        try:
+            with upstream(provider, "generate", model):
+                gemini_response = await asyncio.wait_for(
+                    client_for(model).aio.models.generate_content(model=model, contents=contents, config=config),
+                    timeout=GEMINI_TIMEOUT_SECONDS,
+                )
+        except asyncio.TimeoutError:
+            raise GeminiTimeoutError(f"Gemini request timed out after {GEMINI_TIMEOUT_SECONDS:g}s")
+    record_usage(provider, model, getattr(gemini_response, "usage_metadata", None))
+    return gemini_response
+
+def parse_response(schema, gemini_response):
+    """Validate a generation's JSON text into `schema`, timed as the request's `validate` phase."""
+    with timed(VALIDATION_SECONDS, "validate", schema=schema.__name__):
+        return schema.model_validate_json(gemini_response.text)
+
+async def generate_with_instruction(model: str, system_instruction: str, user_prompt: str, **config_kwargs):
+    """Generate with a static system instruction, sent apart from the per-request user prompt."""
+    from google.genai import types  # imported here so worker boot does not pay for the SDK
+    config = types.GenerateContentConfig(system_instruction=system_instruction, **config_kwargs)
+    contents = [{"role": "user", "parts": [{"text": user_prompt}]}]
+    return await generate_content(model=model, contents=contents, config=config)
+
+def _search_fetcher(params: dict, page: int, num_pages: int, fan_out: bool = False):
+    async def fetch() -> List[RawJob]:
+        try:
+            raw_jobs = await get_client("jsearch").search_pages(params, page=page, num_pages=num_pages, fan_out=fan_out)
+        except Exception as e:
+            raise Exception(f"JSearch API error: {str(e)}")
+
+        jobs = [_to_raw_job(job) for job in raw_jobs]
+        job_store.upsert_jobs(jobs)
+        # Skill extraction and hashing take about a millisecond per job, so off the event loop
+        await asyncio.to_thread(job_index.add_jobs, jobs)
+        return jobs
+    return fetch
+
+async def get_raw_jobs(query: str, page: int, num_pages: int, country: str,
+                      date_posted: str, job_requirements: str, fan_out: bool = False) -> List[RawJob]:
+    """Fetch raw job data from JSearch API, served from the search cache when possible."""
+    params = {
+        "query": query,
+        "country": country,
+        "date_posted": date_posted,
+        "job_requirements": job_requirements,
     }
+    key = search_key(query, page, num_pages, country, date_posted, job_requirements)
+    return await job_search_cache.get(key, _search_fetcher(params, page, num_pages, fan_out))
+
+class _PageFeed:
+    """Pages of one in-flight streamed search, replayed to every /jobs/stream request that joins it."""
+
+    def __init__(self):
+        self.pages: List[List[RawJob]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, jobs: List[RawJob]) -> None:
+        self.pages.append(jobs)
+        self._notify()
+
+    def close(self, jobs: Optional[List[RawJob]] = None, error: Optional[BaseException] = None) -> None:
+        if self.done:
+            return
+        # A search that joined an already running /jobs fetch arrives as one page
+        if jobs is not None and not self.pages:
+            self.pages.append(jobs)
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def jobs(self) -> AsyncIterator[RawJob]:
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.pages):
+                # Copies, since routes reshape the yielded jobs in place
+                for job in self.pages[index]:
+                    yield job.model_copy()
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+# Streamed searches being fetched, by search key
+_page_feeds: Dict[str, _PageFeed] = {}
+
+def _streaming_fetcher(params: dict, page: int, num_pages: int, feed: _PageFeed):
+    async def fetch() -> List[RawJob]:
+        fetched: List[RawJob] = []
+        try:
+            async for raw_jobs in get_client("jsearch").iter_pages(params, page=page, num_pages=num_pages):
+                jobs = [_to_raw_job(job) for job in raw_jobs]
+                job_store.upsert_jobs(jobs)
+                await asyncio.to_thread(job_index.add_jobs, jobs)
+                fetched += jobs
+                feed.publish(jobs)
+        except Exception as e:
+            raise Exception(f"JSearch API error: {str(e)}")
+        return fetched
+    return fetch
+
+async def stream_raw_jobs(query: str, page: int, num_pages: int, country: str,
+                          date_posted: str, job_requirements: str) -> AsyncIterator[RawJob]:
+    """Yield raw jobs from JSearch page by page as each page arrives (all at once when cached).
+
+    Misses go through the search cache's coalescing like /jobs: concurrent identical streams
+    replay one fetch's pages, /jobs requests join it, and its complete result is cached.
+    """
     params = {
         "query": query,
-        "page": page,
-        "num_pages": num_pages,
         "country": country,
         "date_posted": date_posted,
         "job_requirements": job_requirements,
     }
+    key = search_key(query, page, num_pages, country, date_posted, job_requirements)
+    cached = job_search_cache.cached(key, _search_fetcher(params, page, num_pages, fan_out=True))
+    if cached is not None:
+        for job in cached:
+            yield job
+        return
+
+    feed = _page_feeds.get(key)
+    if feed is None:
+        feed = _page_feeds[key] = _PageFeed()
+        # Runs on its own, so the fetch (and caching its result) outlives a disconnecting client
+        fetch = asyncio.ensure_future(job_search_cache.get(key, _streaming_fetcher(params, page, num_pages, feed)))
+
+        def finished(task: asyncio.Task, feed: _PageFeed = feed) -> None:
+            if _page_feeds.get(key) is feed:
+                del _page_feeds[key]
+            if task.cancelled():
+                feed.close(error=Exception("JSearch API error: search was cancelled"))
+            elif task.exception() is not None:
+                feed.close(error=task.exception())
+            else:
+                feed.close(jobs=task.result())
+
+        fetch.add_done_callback(finished)
+    async for job in feed.jobs():
+        yield job
+
+def make_job_id(job: dict) -> str:
+    """Stable job ID: the upstream job_id, else a digest of the posting's identity fields."""
+    if job.get('job_id'):
+        return str(job['job_id'])
+    identity = "\x00".join(
+        " ".join(str(job.get(field) or "").split()).casefold()
+        for field in ('employer_name', 'job_title', 'job_city', 'job_state', 'job_apply_link')
+    )
+    return "job_" + hashlib.sha256(identity.encode("utf-8")).hexdigest()[:24]
+
+def _to_raw_job(job: dict) -> RawJob:
+    return RawJob(
+        job_id=make_job_id(job),
+        job_title=job.get('job_title'),
+        employer_name=job.get('employer_name'),
+        job_description=job.get('job_description'),
+        job_city=job.get('job_city'),
+        job_state=job.get('job_state'),
+        job_apply_link=job.get('job_apply_link'),
+        job_employment_type=job.get('job_employment_type'),
+        job_salary_min=job.get('job_salary_min'),
+        job_salary_max=job.get('job_salary_max'),
+        job_salary_currency=job.get('job_salary_currency'),
+        job_salary_period=job.get('job_salary_period')
+    )
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        raw_data = response.json()
-    except Exception as e:
-        raise Exception(f"JSearch API error: {str(e)}")
+ANALYSIS_MODEL = model_for("analysis", 'models/gemini-flash-lite-latest')
+ANALYSIS_PROMPT = "Analyze the following job description and extract:\n1. A concise summary of what the job involves (4-5 lines)\n2. Key requirements and qualifications needed (return as a list of individual requirements (upto 5)\n3. Required technical and soft skills (return as a list of individual skills (upto 5) )\n\nJob Description:\n{job_description}"
 
-    jobs: List[RawJob] = []
-    for i, job in enumerate(raw_data.get("data", [])):
-        job_id = f"job_{i}_{hash(job.get('job_title', ''))}"
-        
-        jobs.append(RawJob(
-            job_id=job_id,
-            job_title=job.get('job_title'),
-            employer_name=job.get('employer_name'),
-            job_description=job.get('job_description'),
-            job_city=job.get('job_city'),
-            job_state=job.get('job_state'),
-            job_apply_link=job.get('job_apply_link'),
-            job_employment_type=job.get('job_employment_type'),
-            job_salary_min=job.get('job_salary_min'),
-            job_salary_max=job.get('job_salary_max'),
-            job_salary_currency=job.get('job_salary_currency'),
-            job_salary_period=job.get('job_salary_period')
-        ))
-
-    return jobs
-
-def analyze_job_description(job_description: str) -> JobAnalysis:
+# Analyses are keyed on the description, prompt template and model, so a prompt
+# or model change never serves stale results.
+analysis_cache = create_cache("analysis")
+# Identical requests already being generated share that generation
+analysis_flight = SingleFlight("analysis")
+
+async def analyze_job_description(job_description: str) -> JobAnalysis:
     """Analyze job description using AI and return structured data."""
+    job_description = prepare_job_description(job_description)
+    cache_key = make_cache_key(job_description, ANALYSIS_PROMPT, ANALYSIS_MODEL)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return JobAnalysis.model_validate_json(cached)
+    return await analysis_flight.do(cache_key, lambda: _analyze(job_description, cache_key))
+
+async def _analyze(job_description: str, cache_key: str) -> JobAnalysis:
+    from google.genai import types
     config = types.GenerateContentConfig(
         response_mime_type="application/json",
         response_schema=JobAnalysis,
     )
 
     try:
-        gemini_response = ai_client.models.generate_content(
-            model='models/gemini-flash-lite-latest',
+        gemini_response = await generate_content(
+            model=ANALYSIS_MODEL,
             contents=[
-                {"role": "user", "parts": [{"text": f"Analyze the following job description and extract:\n1. A concise summary of what the job involves (4-5 lines)\n2. Key requirements and qualifications needed (return as a list of individual requirements (upto 5)\n3. Required technical and soft skills (return as a list of individual skills (upto 5) )\n\nJob Description:\n{job_description}"}]}
+                {"role": "user", "parts": [{"text": ANALYSIS_PROMPT.format(job_description=job_description)}]}
             ],
             config=config,
         )
 
-        job_analysis = JobAnalysis.model_validate_json(gemini_response.text)
+        job_analysis = parse_response(JobAnalysis, gemini_response)
+        analysis_cache.set(cache_key, job_analysis.model_dump_json())
         return job_analysis
         
     except Exception as e:
         raise Exception(f"AI processing failed: {str(e)}")
 
-def generate_questions(request: QuestionGenerationRequest) -> QuestionSet:
-    """Generate interview questions using AI based on job description and resume."""
-    
-    SYSTEM_PROMPT = """You are an interview-question generator that must return STRICT JSON matching a provided schema.
+async def analyze_job_descriptions(
+    job_descriptions: List[str], max_concurrency: int = 8
+) -> AsyncIterator[Tuple[List[int], Optional[JobAnalysis], Optional[str]]]:
+    """Analyze many descriptions with bounded concurrency, yielding (indices, analysis, error) as each finishes.
+
+    Identical (normalized) descriptions are analyzed once and reported for every index they appear at.
+    """
+    indices_by_key: Dict[str, List[int]] = {}
+    descriptions_by_key: Dict[str, str] = {}
+    for index, job_description in enumerate(job_descriptions):
+        key = make_cache_key(job_description)
+        indices_by_key.setdefault(key, []).append(index)
+        descriptions_by_key.setdefault(key, job_description)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def analyze(key: str):
+        async with semaphore:
+            try:
+                return key, await analyze_job_description(descriptions_by_key[key]), None
+            except Exception as e:
+                return key, None, str(e)
+
+    tasks = [asyncio.create_task(analyze(key)) for key in indices_by_key]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, analysis, error = await next_done
+            yield indices_by_key[key], analysis, error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+QUESTIONS_MODEL = model_for("questions", 'models/gemini-flash-lite-latest')
+QUESTIONS_SYSTEM_PROMPT = """You are an interview-question generator that must return STRICT JSON matching a provided schema.
 Rules (MUST FOLLOW):
 - Total questions: EXACTLY 10.
 - Exactly 2 questions with kind="coding". They MUST be classic LeetCode-style DS&A (e.g., arrays, hash maps, stacks, strings, graphs).
 - The other 8 questions are non-coding: kind="job_requirement" or "behavioral".
 - Scope for interns: keep non-coding questions practical and foundational (React/TypeScript basics, simple tooling, data fetching, a11y fundamentals, collaboration, on-call awareness at an intern level).
 - For coding questions:
-  - Set difficulty to {difficulty} (based on role).
+  - Set difficulty to the coding difficulty given in the task (based on role).
   - Include short, concrete examples (I/O) and a few constraints.
   - Prefer well-known patterns (two-pointer, stack, hash map) unless JD implies otherwise.
 - For every question include a concise 'rationale' tying it to the JD/resume, and a concrete 'rubric' (3–5 bullets) with observable signals.
@@ -103,7 +317,7 @@ Rules (MUST FOLLOW):
 - Do not output anything outside of JSON.
 """
 
-    USER_PROMPT = """Job Description:
+QUESTIONS_USER_PROMPT = """Job Description:
 ---
 {jd}
 ---
@@ -116,202 +330,378 @@ Candidate Resume:
 Task:
 Create a complete QuestionSet JSON for the role "{job_title}" with:
 - Exactly 10 questions
-- Exactly 2 coding (LeetCode DS&A)
+- Exactly 2 coding (LeetCode DS&A) with difficulty "{difficulty}"
 - 8 non-coding (job_requirement/behavioral) tuned to an INTERN scope
 Respond with STRICT JSON only.
 """
 
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        response_schema=QuestionSet,
-    )
+questions_flight = SingleFlight("questions")
 
+def _flight_key(request: BaseModel) -> str:
+    """Exact digest of a request: unlike make_cache_key, case and whitespace differences keep calls apart."""
+    return hashlib.sha256(request.model_dump_json().encode("utf-8")).hexdigest()
+
+async def generate_questions(request: QuestionGenerationRequest) -> QuestionSet:
+    """Generate interview questions using AI based on job description and resume."""
+    return await questions_flight.do(_flight_key(request), lambda: _generate_questions(request))
+
+async def _generate_questions(request: QuestionGenerationRequest) -> QuestionSet:
     try:
-        system_prompt = SYSTEM_PROMPT.format(difficulty=request.difficulty)
-        user_prompt = USER_PROMPT.format(
-            jd=request.job_description,
-            resume=request.resume,
-            job_title=request.job_title
+        user_prompt = QUESTIONS_USER_PROMPT.format(
+            jd=prepare_job_description(request.job_description),
+            resume=prepare_resume(request.resume),
+            job_title=request.job_title,
+            difficulty=request.difficulty
         )
-        
-        gemini_response = ai_client.models.generate_content(
-            model='models/gemini-flash-lite-latest',
-            contents=[
-                
-                {"role": "user", "parts": [{"text": f"{system_prompt}\n\n{user_prompt}"}]}
-            ],
-            config=config,
+
+        gemini_response = await generate_with_instruction(
+            model=QUESTIONS_MODEL,
+            system_instruction=QUESTIONS_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            response_mime_type="application/json",
+            response_schema=QuestionSet,
         )
 
-        question_set = QuestionSet.model_validate_json(gemini_response.text)
+        question_set = parse_response(QuestionSet, gemini_response)
         return question_set
         
     except Exception as e:
         raise Exception(f"Question generation failed: {str(e)}")
 
-def generate_learning_plan(request: LearningPlanRequest) -> RecommendationReport:
-    """Generate learning recommendations based on scored interview report."""
-    
-    SYSTEM_PROMPT = """You are a career coach who designs targeted learning plans for software engineers.
+LEARNING_MODEL = model_for("learning", 'models/gemini-flash-latest')
+LEARNING_SYSTEM_PROMPT = """You are a career coach who designs targeted learning plans for software engineers.
 You will receive a scored interview report (per-question % and rubric notes).
 Your job: produce a JSON RecommendationReport that helps the candidate improve specifically on low or suboptimal areas.
 
 Rules (MUST FOLLOW):
 - Return STRICT JSON matching the provided schema.
-- Focus remediation on questions with percent < {threshold}% OR verdict in ["fair", "poor"].
+- Focus remediation on questions with percent below the threshold given in the context OR verdict in ["fair", "poor"].
 - Use the question text, kind, and bullet notes to derive concrete topics (e.g., "TypeScript interfaces vs types", "REST status codes", "Hash map practice", "Next.js SSR vs SSG", "Foreign keys in Postgres", "Code reviews").
 - Prioritize topics by impact (coding & core backend fundamentals first for Back End roles).
 - Provide 2–6 resources across the whole plan (favor free, reputable sources; do not fabricate paywalls). DO include URLs when known; concise titles.
 - Include actionable practice_tasks (e.g., "Implement 5 hash-map problems on arrays/strings", "Create a Next.js API route with auth and rate limiting").
-- Include a realistic study_schedule that fits within ~{budget_hours} hours (e.g., 2–3 weeks, 6–10 hrs/week).
+- Include a realistic study_schedule that fits within the hour budget given in the context (e.g., 2–3 weeks, 6–10 hrs/week).
 - Keep wording concise and practical. Avoid generic advice.
 - Limit topics to 3-5 maximum to avoid overwhelming the candidate.
 - Limit quick_wins to 3-5 maximum.
 - Provide 1-3 resources per topic maximum.
 
 Safety and integrity:
-- If all percents ≥ {threshold} and verdicts are "good/excellent", still produce stretch topics and advanced resources.
+- If all percents are at or above the threshold and verdicts are "good/excellent", still produce stretch topics and advanced resources.
 - Do not output anything outside JSON.
 """
 
-    USER_PROMPT = """Scored interview JSON:
+LEARNING_USER_PROMPT = """Scored interview JSON:
 ---
 {scores_json}
 ---
 Context:
+- Remediation threshold: {threshold}%
+- Study budget: ~{budget_hours} hours
 - Use at most {max_resources} total resources across the plan.
 - Candidate role: {job_title}
 """
 
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        response_schema=RecommendationReport,
-    )
+learning_flight = SingleFlight("learning")
 
+async def generate_learning_plan(request: LearningPlanRequest) -> RecommendationReport:
+    """Generate learning recommendations based on scored interview report."""
+    return await learning_flight.do(_flight_key(request), lambda: _generate_learning_plan(request))
+
+async def _generate_learning_plan(request: LearningPlanRequest) -> RecommendationReport:
     try:
-        system_prompt = SYSTEM_PROMPT.format(
-            threshold=request.threshold,
-            budget_hours=request.budget_hours
-        )
-        user_prompt = USER_PROMPT.format(
+        user_prompt = LEARNING_USER_PROMPT.format(
             scores_json=request.scored_report.model_dump_json(),
+            threshold=request.threshold,
+            budget_hours=request.budget_hours,
             max_resources=request.max_resources,
             job_title=request.scored_report.job_title
         )
-        
-        gemini_response = ai_client.models.generate_content(
-            model='models/gemini-flash-latest',
-            contents=[
-                {"role": "user", "parts": [{"text": f"{system_prompt}\n{user_prompt}"}]},
-            ],
-            config=config,
+
+        gemini_response = await generate_with_instruction(
+            model=LEARNING_MODEL,
+            system_instruction=LEARNING_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            response_mime_type="application/json",
+            response_schema=RecommendationReport,
         )
 
-        recommendation_report = RecommendationReport.model_validate_json(gemini_response.text)
+        recommendation_report = parse_response(RecommendationReport, gemini_response)
         return recommendation_report
         
     except Exception as e:
         raise Exception(f"Learning plan generation failed: {str(e)}")
 
-def score_questions(request: ScoringRequest) -> ScoreReport:
-    """Score interview questions based on user responses."""
-    
-    SCORER_SYSTEM_PROMPT = """You are a rigorous interview grader. You will receive a QuestionSet JSON with:
-- job_title, summary, and exactly 10 questions.
-- Each question has: question_id, kind ("coding" | "behavioral" | "job_requirement"), text, rubric (list of bullet criteria), and user_response.
+SCORING_MODEL = model_for("scoring", 'models/gemini-flash-latest')
+SCORING_MAX_CONCURRENCY = int(os.getenv("SCORING_MAX_CONCURRENCY", "10"))
+SCORING_MAX_ATTEMPTS = int(os.getenv("SCORING_MAX_ATTEMPTS", "3"))
+SCORING_BACKOFF_SECONDS = float(os.getenv("SCORING_BACKOFF_SECONDS", "0.5"))
+
+SCORER_SYSTEM_PROMPT = """You are a rigorous interview grader. You will receive ONE interview question as JSON with:
+- question_id, kind ("coding" | "behavioral" | "job_requirement"), text, rubric (list of bullet criteria), and user_response.
 
-Your task: score EACH question ONLY against its rubric.
+Your task: score the question ONLY against its rubric.
 Rules (MUST FOLLOW):
-- Return STRICT JSON matching the provided ScoreReport schema.
-- For each question, produce bullet_evals with the SAME count and ORDER as the input rubric.
+- Return STRICT JSON matching the provided QuestionGrade schema.
+- Produce bullet_scores with the SAME count and ORDER as the input rubric. Do not repeat the criterion text.
 - For each bullet:
   - score ∈ {0, 0.5, 1} (use 0.5 if partially met).
   - notes: 1 short sentence on why.
 - For "coding" questions, include coding_review (time_complexity, space_complexity, correctness_risk, notes).
-- verdict mapping guidance (non-binding, for user comprehension):
-  - excellent: avg bullet score ≥ 0.85
-  - good:     0.65–0.84
-  - fair:     0.35–0.64
-  - poor:     < 0.35
 - Evaluate the ACTUAL user_response, not hypothetical answers. Do not change or correct the rubric.
 - Do not invent new rubric items. If a criterion is not addressed, score 0 and explain briefly in notes.
 - Keep feedback concise, actionable, and respectful. Avoid restating the entire answer.
 - Output JSON ONLY, no extra text.
 """
 
-    SCORER_USER_PROMPT = """QuestionSet to grade (JSON):
+SCORER_USER_PROMPT = """Question to grade (JSON):
 
-{question_set_json}
+{question_json}
 """
 
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        response_schema=ScoreReport,
+# Per-question scores keyed on (question text, rubric, user_response), so re-grading
+# a set after one answer changes only re-scores that question.
+question_score_cache = create_cache("question_scores")
+question_score_flight = SingleFlight("question_scores")
+
+def _question_score_key(question: Question) -> str:
+    # Hashed verbatim, not through make_cache_key: case and indentation matter in code answers
+    digest = hashlib.sha256()
+    for part in (question.kind, question.text, json.dumps(question.rubric), question.user_response,
+                 SCORER_SYSTEM_PROMPT, SCORING_MODEL):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+async def score_question(question: Question) -> QuestionEvaluation:
+    """Score one question against its rubric, retrying malformed or failed generations."""
+    cache_key = _question_score_key(question)
+    cached = question_score_cache.get(cache_key)
+    if cached is not None:
+        return QuestionEvaluation.model_validate_json(cached).model_copy(update={"question_id": question.question_id})
+
+    if not question.user_response.strip():
+        return unanswered_evaluation(question)
+
+    evaluation = await question_score_flight.do(cache_key, lambda: _grade_question(question, cache_key))
+    return evaluation.model_copy(update={"question_id": question.question_id})
+
+async def _grade_question(question: Question, cache_key: str) -> QuestionEvaluation:
+    user_prompt = SCORER_USER_PROMPT.format(
+        question_json=question.model_dump_json(include={"question_id", "kind", "text", "rubric", "coding", "user_response"})
     )
 
-    try:
-        user_prompt = SCORER_USER_PROMPT.format(
-            question_set_json=request.question_set.model_dump_json()
-        )
-        
-        gemini_response = ai_client.models.generate_content(
-            model='models/gemini-flash-latest',
-            contents=[
-                {"role": "user", "parts": [{"text": f"{SCORER_SYSTEM_PROMPT}\n{user_prompt}"}]}
-            ],
-            config=config,
-        )
-
-        score_report = ScoreReport.model_validate_json(gemini_response.text)
-        return score_report
-        
-    except Exception as e:
-        raise Exception(f"Question scoring failed: {str(e)}")
-
-
-
-def generate_guidance(request: GuidanceRequest) -> GuidanceResponse:
-    """Generate concise coaching guidance (<150 words) using main question, history, and new user query."""
-    SYSTEM_PROMPT = (
-        "You are given a main question to serve as context:\n"
-        "Main Question: {main_question}\n\n"
-        "So far, the conversation history is as follows:{history_str}\n\n"
-        "Now the user asks a new follow-up question related to the above:\n"
-        "User: {new_user_query}\n\n"
-        "Your role:\n"
-        "1. Use the main question as the guiding context for the discussion.\n"
-        "2. Do not provide the direct answer to the user's follow-up; instead, help the user think through the problem. Make the answer precise and concised. DON'T OVER EXPLAIN\n"
-        "3. Offer guiding questions, suggest frameworks, or point to key concepts the user should explore.\n"
-        "4. If the user seems stuck or unclear, propose specific subtopics or steps that could lead them closer to answering their own question.\n"
-        "5. Keep your guidance concise, constructive, and well-structured.\n"
-        "6. Ensure your response is less than 75 words."
+    last_error = None
+    for attempt in range(SCORING_MAX_ATTEMPTS):
+        try:
+            gemini_response = await generate_with_instruction(
+                model=SCORING_MODEL,
+                system_instruction=SCORER_SYSTEM_PROMPT,
+                user_prompt=user_prompt,
+                response_mime_type="application/json",
+                response_schema=QuestionGrade,
+            )
+            grade = parse_response(QuestionGrade, gemini_response)
+            evaluation = evaluation_from_grade(question, grade)
+            question_score_cache.set(cache_key, evaluation.model_dump_json())
+            return evaluation
+        except Exception as e:
+            last_error = e
+            if attempt + 1 < SCORING_MAX_ATTEMPTS:
+                # Exponential backoff with jitter, so rate-limited retries don't land back to back
+                await asyncio.sleep(SCORING_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random() / 2))
+    raise Exception(f"Scoring question {question.question_id} failed: {str(last_error)}")
+
+async def score_questions(request: ScoringRequest) -> ScoreReport:
+    """Score interview questions based on user responses, one concurrent generation per question."""
+    question_set = request.question_set
+    semaphore = asyncio.Semaphore(SCORING_MAX_CONCURRENCY)
+
+    async def score(question: Question):
+        async with semaphore:
+            try:
+                return await score_question(question)
+            except Exception as e:
+                return e
+
+    results = await asyncio.gather(*(score(question) for question in question_set.questions))
+    items = [result for result in results if isinstance(result, QuestionEvaluation)]
+    failed = [
+        question.question_id
+        for question, result in zip(question_set.questions, results)
+        if not isinstance(result, QuestionEvaluation)
+    ]
+    if not items:
+        raise Exception(f"Question scoring failed: {str(results[0])}")
+
+    overall = overall_stats(items)
+    return ScoreReport(
+        job_title=question_set.job_title,
+        overall_summary=_overall_summary(overall, failed),
+        items=items,
+        overall=overall,
+        failed_question_ids=failed,
     )
 
-    user_prompt = SYSTEM_PROMPT.format(
-        main_question=request.main_question,
-        history_str=f"\n{request.history_str}\n" if request.history_str else "",
+def _overall_summary(overall: dict, failed: List[str]) -> str:
+    scored = overall["questions_scored"]
+    verdicts = ", ".join(f"{count} {verdict}" for verdict, count in overall["verdict_counts"].items() if count)
+    summary = f"Scored {scored} of {scored + len(failed)} questions ({overall['percent']:g}% of rubric points): {verdicts}."
+    if failed:
+        summary += f" {len(failed)} could not be scored; resubmit to retry them."
+    return summary
+
+GUIDANCE_MODEL = model_for("guidance", 'models/gemini-flash-lite-latest')
+GUIDANCE_MAX_WORDS = 150
+_WORD_PATTERN = re.compile(r"\S+")
+GUIDANCE_PROMPT = (
+    "You are given a main question to serve as context:\n"
+    "Main Question: {main_question}\n\n"
+    "So far, the conversation history is as follows:{history_str}\n\n"
+    "Now the user asks a new follow-up question related to the above:\n"
+    "User: {new_user_query}\n\n"
+    "Your role:\n"
+    "1. Use the main question as the guiding context for the discussion.\n"
+    "2. Do not provide the direct answer to the user's follow-up; instead, help the user think through the problem. Make the answer precise and concised. DON'T OVER EXPLAIN\n"
+    "3. Offer guiding questions, suggest frameworks, or point to key concepts the user should explore.\n"
+    "4. If the user seems stuck or unclear, propose specific subtopics or steps that could lead them closer to answering their own question.\n"
+    "5. Keep your guidance concise, constructive, and well-structured.\n"
+    "6. Ensure your response is less than 75 words."
+)
+
+COACH_SUMMARY_PROMPT = (
+    "Summarize this coaching conversation in under 120 words. Keep what the candidate has already "
+    "worked out, the hints already given and any open points. Output plain text only.\n\n"
+    "Main Question: {main_question}\n\n"
+    "Earlier summary: {summary}\n\n"
+    "New turns:\n{turns}"
+)
+
+def _guidance_contents(request: GuidanceRequest, session: Optional[CoachSession] = None) -> list:
+    if session is not None:
+        main_question = session.main_question
+        history_str = history_text(session)
+    else:
+        main_question = request.main_question
+        history_str = request.history_str
+    user_prompt = GUIDANCE_PROMPT.format(
+        main_question=main_question,
+        history_str=f"\n{history_str}\n" if history_str else "",
         new_user_query=request.new_user_query,
     )
-
+    return [{"role": "user", "parts": [{"text": user_prompt}]}]
+
+async def record_coach_turn(session: CoachSession, user: str, coach: str) -> None:
+    """Append a turn and, past the token budget, fold older turns into the rolling summary.
+
+    Concurrent follow-ups on one session are serialised, and each store write is atomic, so no
+    turn is lost to a read-modify-write race.
+    """
+    from google.genai import types
+    async with session_lock(session.session_id):
+        session = await asyncio.to_thread(append_turn, session, CoachTurn(user=user, coach=coach))
+        if not needs_compaction(session):
+            return
+        older = session.turns[:-COACH_WINDOW_TURNS]
+        prompt = COACH_SUMMARY_PROMPT.format(
+            main_question=session.main_question,
+            summary=session.summary or "(none)",
+            turns="\n".join(f"User: {turn.user}\nCoach: {turn.coach}" for turn in older),
+        )
+        try:
+            gemini_response = await generate_content(
+                model=GUIDANCE_MODEL,
+                contents=[{"role": "user", "parts": [{"text": prompt}]}],
+                config=types.GenerateContentConfig(response_mime_type="text/plain"),
+            )
+            summary = gemini_response.text.strip()
+        except Exception:
+            # Keep the previous summary; the dropped turns only lose detail
+            summary = session.summary
+        await asyncio.to_thread(compact_turns, session.session_id, older, summary)
+
+async def generate_guidance(request: GuidanceRequest, session: Optional[CoachSession] = None) -> GuidanceResponse:
+    """Generate concise coaching guidance (<150 words) using main question, history, and new user query."""
+    from google.genai import types
     # Ask for short text output and enforce word length with model selection
     config = types.GenerateContentConfig(
         response_mime_type="text/plain",
     )
 
     try:
-        gemini_response = ai_client.models.generate_content(
-            model='models/gemini-flash-lite-latest',
-            contents=[{"role": "user", "parts": [{"text": user_prompt}]}],
+        gemini_response = await generate_content(
+            model=GUIDANCE_MODEL,
+            contents=_guidance_contents(request, session),
             config=config,
         )
 
         text = gemini_response.text.strip()
         # Hard cap to approximately 150 words if model exceeds
         words = text.split()
-        if len(words) > 150:
-            text = " ".join(words[:150])
+        if len(words) > GUIDANCE_MAX_WORDS:
+            text = " ".join(words[:GUIDANCE_MAX_WORDS])
 
-        return GuidanceResponse(guidance=text)
+        if session is None:
+            return GuidanceResponse(guidance=text)
+        await record_coach_turn(session, request.new_user_query, text)
+        return GuidanceResponse(guidance=text, session_id=session.session_id)
     except Exception as e:
         raise Exception(f"Guidance generation failed: {str(e)}")
 
+async def stream_guidance(request: GuidanceRequest, session: Optional[CoachSession] = None) -> AsyncIterator[str]:
+    """Stream coaching guidance text as it is generated, stopping upstream at the word budget."""
+    from google.genai import types
+    config = types.GenerateContentConfig(
+        response_mime_type="text/plain",
+    )
+
+    text = ""
+    emitted = 0
+    usage = None
+    provider = backend_for(GUIDANCE_MODEL)
+    try:
+        async with _generation_slot(GUIDANCE_MODEL):
+            start = time.perf_counter()
+            stream = await asyncio.wait_for(
+                client_for(GUIDANCE_MODEL).aio.models.generate_content_stream(
+                    model=GUIDANCE_MODEL, contents=_guidance_contents(request, session), config=config
+                ),
+                timeout=GEMINI_TIMEOUT_SECONDS,
+            )
+            try:
+                async for chunk in stream:
+                    if start is not None:
+                        observe_upstream(provider, "stream_first_chunk", time.perf_counter() - start, GUIDANCE_MODEL)
+                        start = None
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    text += chunk.text or ""
+                    words = list(_WORD_PATTERN.finditer(text))
+                    # A trailing word may be incomplete; hold it back until the next chunk
+                    partial = bool(words) and words[-1].end() == len(text)
+                    complete = words[:-1] if partial else words
+                    # Cut right after the last word within budget and stop paying for tokens
+                    if len(complete) >= GUIDANCE_MAX_WORDS:
+                        cut = complete[GUIDANCE_MAX_WORDS - 1].end()
+                        if cut > emitted:
+                            yield text[emitted:cut]
+                            emitted = cut
+                        break
+                    safe = words[-1].start() if partial else len(text)
+                    if safe > emitted:
+                        yield text[emitted:safe].lstrip() if emitted == 0 else text[emitted:safe]
+                        emitted = safe
+                else:
+                    if len(text) > emitted:
+                        yield text[emitted:].rstrip()
+                        emitted = len(text)
+            finally:
+                if hasattr(stream, "aclose"):
+                    await stream.aclose()
+        record_usage(provider, GUIDANCE_MODEL, usage)
+
+        if session is not None:
+            await record_coach_turn(session, request.new_user_query, text[:emitted].strip())
+    except asyncio.TimeoutError:
+        raise Exception(f"Guidance generation failed: Gemini request timed out after {GEMINI_TIMEOUT_SECONDS:g}s")
+    except Exception as e:
+        raise Exception(f"Guidance generation failed: {str(e)}")
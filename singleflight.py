@@ -0,0 +1,98 @@
+import asyncio
+import copy
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from metrics import SINGLEFLIGHT_CALLS
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+SINGLEFLIGHT_MAX_WAITERS = int(os.getenv("SINGLEFLIGHT_MAX_WAITERS", "100"))  # beyond this, callers run their own call
+SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS = float(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS", "120"))
+
+
+class SingleFlightTimeout(Exception):
+    """A caller gave up waiting on another caller's in-flight call."""
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; identical concurrent calls wait for it and share its result.
+
+    The call runs as its own task, so a caller that disconnects or times out does not cancel it for
+    the others (and a result the call caches on completion is not lost). Waiters receive deep copies,
+    so no two requests share mutable models. At most `max_waiters` callers join one call; the rest
+    run independently, which bounds how many requests fail together if the shared call fails.
+    """
+
+    def __init__(self, name: str, max_waiters: int = SINGLEFLIGHT_MAX_WAITERS,
+                 timeout: Optional[float] = SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS, enabled: bool = SINGLEFLIGHT_ENABLED):
+        self.name = name
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self.enabled = enabled
+        self.calls = 0
+        self.coalesced = 0
+        self.overflow = 0
+        self.timeouts = 0
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def _start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> _Flight:
+        flight = self._flights[key] = _Flight(asyncio.ensure_future(fn()))
+
+        def finished(task: asyncio.Task) -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if not task.cancelled():
+                task.exception()  # retrieved here in case every caller has gone
+
+        flight.task.add_done_callback(finished)
+        return flight
+
+    def _record(self, role: str) -> None:
+        SINGLEFLIGHT_CALLS.inc(group=self.name, role=role)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of `fn()`, shared with concurrent callers of the same key."""
+        if not self.enabled:
+            return await fn()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            self._record("leader")
+            return await asyncio.shield(self._start(key, fn).task)
+        if flight.waiters >= self.max_waiters:
+            self.overflow += 1
+            self._record("overflow")
+            return await fn()
+
+        self.coalesced += 1
+        self._record("coalesced")
+        flight.waiters += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(flight.task), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._record("timeout")
+            raise SingleFlightTimeout(f"Timed out after {self.timeout:g}s waiting for an identical {self.name} request")
+        finally:
+            flight.waiters -= 1
+        return copy.deepcopy(result)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "overflow": self.overflow,
+            "timeouts": self.timeouts,
+        }
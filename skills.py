@@ -0,0 +1,132 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+# Canonical skill name -> aliases that also identify it in free text (matched case-insensitively)
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "python": ["python", "python3"],
+    "java": ["java"],
+    "javascript": ["javascript", "js", "ecmascript"],
+    "typescript": ["typescript"],
+    "go": ["golang", "go lang"],
+    "rust": ["rust"],
+    "c": ["c language", "ansi c"],
+    "c++": ["c++", "cpp"],
+    "c#": ["c#", "csharp", ".net", "dotnet", "asp.net"],
+    "ruby": ["ruby", "rails", "ruby on rails"],
+    "php": ["php", "laravel"],
+    "kotlin": ["kotlin"],
+    "swift": ["swift", "swiftui"],
+    "scala": ["scala"],
+    "r": ["r language", "rstudio"],
+    "sql": ["sql", "t-sql", "pl/sql"],
+    "bash": ["bash", "shell scripting"],
+    "html": ["html", "html5"],
+    "css": ["css", "css3", "sass", "scss", "tailwind", "tailwindcss"],
+    "react": ["react", "react.js", "reactjs"],
+    "next.js": ["next.js", "nextjs"],
+    "angular": ["angular", "angularjs"],
+    "vue": ["vue", "vue.js", "vuejs", "nuxt"],
+    "redux": ["redux"],
+    "node.js": ["node.js", "nodejs"],
+    "express": ["express.js", "expressjs"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "spring": ["spring boot", "springboot", "spring framework"],
+    "graphql": ["graphql"],
+    "rest api": ["restful", "rest api", "rest apis"],
+    "grpc": ["grpc"],
+    "postgresql": ["postgresql", "postgres"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"],
+    "elasticsearch": ["elasticsearch", "opensearch"],
+    "dynamodb": ["dynamodb"],
+    "cassandra": ["cassandra"],
+    "kafka": ["kafka"],
+    "rabbitmq": ["rabbitmq"],
+    "spark": ["spark", "pyspark"],
+    "hadoop": ["hadoop"],
+    "airflow": ["airflow"],
+    "snowflake": ["snowflake"],
+    "aws": ["aws", "amazon web services", "ec2", "aws lambda"],
+    "gcp": ["gcp", "google cloud"],
+    "azure": ["azure"],
+    "docker": ["docker", "containers"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"],
+    "ci/cd": ["ci/cd", "continuous integration", "github actions", "jenkins", "gitlab ci"],
+    "git": ["git", "github", "gitlab"],
+    "linux": ["linux", "unix"],
+    "microservices": ["microservices", "microservice"],
+    "distributed systems": ["distributed systems"],
+    "system design": ["system design"],
+    "data structures": ["data structures", "algorithms", "data structures and algorithms"],
+    "machine learning": ["machine learning", "ml"],
+    "deep learning": ["deep learning", "neural networks"],
+    "pytorch": ["pytorch"],
+    "tensorflow": ["tensorflow", "keras"],
+    "pandas": ["pandas"],
+    "numpy": ["numpy"],
+    "nlp": ["nlp", "natural language processing"],
+    "llm": ["llm", "llms", "large language models", "generative ai"],
+    "testing": ["unit testing", "testing", "pytest", "jest", "tdd", "test automation"],
+    "security": ["security", "oauth", "authentication"],
+    "accessibility": ["accessibility", "a11y", "wcag"],
+    "agile": ["agile", "scrum", "kanban"],
+    "communication": ["communication", "communicate"],
+    "collaboration": ["collaboration", "teamwork", "cross-functional"],
+    "leadership": ["leadership", "mentoring", "mentor"],
+    "problem solving": ["problem solving", "problem-solving"],
+    "android": ["android"],
+    "ios": ["ios"],
+    "figma": ["figma"],
+    "tableau": ["tableau", "power bi"],
+    "excel": ["microsoft excel", "ms excel"],
+}
+
+# Canonical names that are also everyday words only match through their aliases
+_AMBIGUOUS_NAMES = {"go", "c", "r", "rest api", "express", "spring", "excel"}
+
+_ALIAS_TO_SKILL = {
+    alias.lower(): skill
+    for skill, aliases in SKILL_ALIASES.items()
+    for alias in aliases + ([] if skill in _AMBIGUOUS_NAMES else [skill])
+}
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching any of `words`, nested by shared prefix so each position tries one branch per character.
+
+    Continuations are greedy, so "ruby on rails" wins over "ruby" as in a longest-first alternation.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# Matched against lower-cased text; boundaries allow symbols like c++ and .net
+_SKILL_PATTERN = re.compile(r"(?<![\w+#.])(" + _trie_pattern(_ALIAS_TO_SKILL) + r")(?![\w+#])")
+
+
+def canonical_skill(name: str) -> str:
+    """Map a skill name or alias to its canonical form; unknown names are lower-cased."""
+    key = " ".join(name.split()).lower()
+    return _ALIAS_TO_SKILL.get(key, key)
+
+
+def extract_skills(text: str) -> Set[str]:
+    """Canonical skills mentioned anywhere in free text."""
+    return {_ALIAS_TO_SKILL[alias] for alias in _SKILL_PATTERN.findall((text or "").lower())}
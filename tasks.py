@@ -0,0 +1,399 @@
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+from pydantic import BaseModel
+
+from models import LearningPlanRequest, ScoringRequest, TaskInfo
+from services import generate_learning_plan, score_questions
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional; the in-process queue is used without it
+    redis = None
+
+TASK_STORE_PATH = os.getenv("TASK_STORE_PATH", "tasks.sqlite3")
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "4"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+TASK_RETRY_BACKOFF_SECONDS = float(os.getenv("TASK_RETRY_BACKOFF_SECONDS", "2"))  # doubled per attempt
+TASK_RESULT_TTL_SECONDS = float(os.getenv("TASK_RESULT_TTL_SECONDS", "86400"))
+# Redis-compatible queue shared by several processes, e.g. redis://localhost:6379/0; in-process when unset
+TASK_QUEUE_URL = os.getenv("TASK_QUEUE_URL")
+TASK_QUEUE_NAME = os.getenv("TASK_QUEUE_NAME", "tasks")
+# Workers heartbeat the tasks they run; a running task is presumed dead after this long without one
+TASK_HEARTBEAT_SECONDS = float(os.getenv("TASK_HEARTBEAT_SECONDS", "15"))
+TASK_STALE_SECONDS = float(os.getenv("TASK_STALE_SECONDS", "60"))
+TASK_CALLBACK_TIMEOUT_SECONDS = float(os.getenv("TASK_CALLBACK_TIMEOUT_SECONDS", "10"))
+TASK_CALLBACK_ATTEMPTS = int(os.getenv("TASK_CALLBACK_ATTEMPTS", "3"))
+# Comma-separated hosts callbacks may go to; when unset, any public http(s) host is allowed
+TASK_CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.getenv("TASK_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+
+# Task kind -> (request model, generation coroutine returning a pydantic model)
+TASK_HANDLERS = {
+    "learning": (LearningPlanRequest, generate_learning_plan),
+    "scores": (ScoringRequest, score_questions),
+}
+
+TERMINAL_STATUSES = {"succeeded", "failed"}
+
+_COLUMNS = [column for column in TaskInfo.model_fields if column != "result"]
+
+
+class InvalidCallbackUrl(ValueError):
+    """A callback_url the server must not POST to."""
+
+
+class TaskStore:
+    """SQLite-backed task state, so queued work and results survive a restart."""
+
+    def __init__(self, path: str = TASK_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY,"
+            + "".join(f" {column}," for column in _COLUMNS if column != "task_id")
+            + " result TEXT, payload TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)")
+        # Worker instance running the task and its last heartbeat (added after the first release)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        for column in ("owner TEXT", "heartbeat REAL"):
+            if column.split()[0] not in existing:
+                self._conn.execute(f"ALTER TABLE tasks ADD COLUMN {column}")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('store_id', ?)", (uuid.uuid4().hex,))
+        self.store_id = self._conn.execute("SELECT value FROM meta WHERE key = 'store_id'").fetchone()[0]
+
+    def create(self, task: TaskInfo, payload: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO tasks ({', '.join(_COLUMNS)}, result, payload)"
+                f" VALUES ({', '.join('?' for _ in range(len(_COLUMNS) + 2))})",
+                tuple(getattr(task, column) for column in _COLUMNS) + (None, payload),
+            )
+
+    def get(self, task_id: str) -> Optional[TaskInfo]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)}, result FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        task = dict(zip(_COLUMNS, row))
+        task["result"] = json.loads(row[-1]) if row[-1] is not None else None
+        return TaskInfo(**task)
+
+    def get_payload(self, task_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, task: TaskInfo) -> None:
+        task.updated_at = time.time()
+        result = json.dumps(task.result) if task.result is not None else None
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE tasks SET {', '.join(f'{column} = ?' for column in _COLUMNS if column != 'task_id')},"
+                " result = ? WHERE task_id = ?",
+                tuple(getattr(task, column) for column in _COLUMNS if column != "task_id") + (result, task.task_id),
+            )
+
+    def claim(self, task_id: str, owner: str) -> bool:
+        """Atomically move a queued task to running under `owner`; False if another worker already has it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, updated_at = ?, owner = ?, heartbeat = ?"
+                " WHERE task_id = ? AND status = 'queued'",
+                (now, owner, now, task_id),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, owner: str) -> None:
+        """Mark the tasks `owner` is running as alive."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET heartbeat = ? WHERE owner = ? AND status = 'running'", (time.time(), owner)
+            )
+
+    def take_queued(self, updated_before: float) -> List[str]:
+        """IDs of queued tasks last updated before `updated_before`, oldest first, marked as just updated.
+
+        The mark stops every worker from re-pushing the same long-waiting tasks on each recovery pass.
+        """
+        taken = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id FROM tasks WHERE status = 'queued' AND updated_at < ? ORDER BY created_at",
+                (updated_before,),
+            ).fetchall()
+            for (task_id,) in rows:
+                cursor = self._conn.execute(
+                    "UPDATE tasks SET updated_at = ? WHERE task_id = ? AND status = 'queued' AND updated_at < ?",
+                    (time.time(), task_id, updated_before),
+                )
+                if cursor.rowcount == 1:
+                    taken.append(task_id)
+        return taken
+
+    def requeue_stale(self, stale_before: float) -> List[str]:
+        """Move running tasks whose owner stopped heartbeating before `stale_before` back to queued.
+
+        Returns the IDs this call requeued; the conditional update means that with several workers
+        recovering at once, each task is requeued (and pushed) by exactly one of them.
+        """
+        requeued = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id FROM tasks WHERE status = 'running' AND COALESCE(heartbeat, updated_at) < ?"
+                " ORDER BY created_at",
+                (stale_before,),
+            ).fetchall()
+            for (task_id,) in rows:
+                cursor = self._conn.execute(
+                    "UPDATE tasks SET status = 'queued', updated_at = ? WHERE task_id = ? AND status = 'running'"
+                    " AND COALESCE(heartbeat, updated_at) < ?",
+                    (time.time(), task_id, stale_before),
+                )
+                if cursor.rowcount == 1:
+                    requeued.append(task_id)
+        return requeued
+
+    def purge(self, older_than: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM tasks WHERE status IN ('succeeded', 'failed') AND updated_at < ?", (older_than,)
+            )
+
+
+class TaskQueue:
+    """Runs long generations on a worker pool; state lives in the TaskStore, IDs travel on the queue."""
+
+    def __init__(self, store: TaskStore, workers: int = TASK_WORKERS, max_attempts: int = TASK_MAX_ATTEMPTS,
+                 retry_backoff: float = TASK_RETRY_BACKOFF_SECONDS, queue_url: Optional[str] = TASK_QUEUE_URL):
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.queue_url = queue_url
+        self._redis = None
+        self._local: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._timers: Set[asyncio.Task] = set()
+        self._listeners: Dict[str, Set[asyncio.Event]] = {}
+        # Identifies this process in the store; sibling workers sharing TASK_STORE_PATH each have their own
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def start(self) -> None:
+        """Start the workers and re-enqueue queued tasks and those whose worker has died."""
+        self._local = asyncio.Queue()
+        if self.queue_url:
+            if redis is None:
+                logger.warning("TASK_QUEUE_URL is set but the redis package is not installed; using the in-process queue")
+            else:
+                self._redis = redis.from_url(self.queue_url)
+                await self._check_shared_store()
+        self.store.purge(time.time() - TASK_RESULT_TTL_SECONDS)
+
+        # Queued tasks may sit in a dead worker's in-process queue; pushing them again is harmless since
+        # claim() lets only one worker run each. Running tasks are left to their owner while it heartbeats.
+        await self._recover(queued_before=float("inf"))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._workers.append(asyncio.create_task(self._heartbeat()))
+
+    async def _check_shared_store(self) -> None:
+        """Fail at startup if workers on this queue use different task stores (e.g. per-host SQLite files).
+
+        Queue entries are only task IDs, so a worker would pop IDs its own store cannot load.
+        """
+        key = f"{TASK_QUEUE_NAME}:store_id"
+        await self._redis.set(key, self.store.store_id, nx=True)
+        store_id = await self._redis.get(key)
+        if store_id is not None and store_id.decode("utf-8") != self.store.store_id:
+            raise RuntimeError(
+                f"Queue {TASK_QUEUE_NAME!r} is used with a different task store than {self.store.path}: every worker "
+                f"on TASK_QUEUE_URL must share one TASK_STORE_PATH (delete the redis key {key!r} after moving stores)"
+            )
+
+    async def _recover(self, queued_before: float) -> None:
+        stale = self.store.requeue_stale(time.time() - TASK_STALE_SECONDS)
+        for task_id in self.store.take_queued(queued_before) + stale:
+            await self._push(task_id)
+        if stale:
+            logger.warning("Re-queued %d task(s) whose worker stopped heartbeating", len(stale))
+
+    async def _heartbeat(self) -> None:
+        """Keep this worker's running tasks alive and pick up those of dead workers."""
+        while True:
+            await asyncio.sleep(TASK_HEARTBEAT_SECONDS)
+            try:
+                self.store.heartbeat(self.instance_id)
+                await self._recover(queued_before=time.time() - TASK_STALE_SECONDS)
+            except Exception:
+                logger.exception("Task heartbeat failed")
+
+    async def stop(self) -> None:
+        for task in self._workers + list(self._timers):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._timers, return_exceptions=True)
+        self._workers = []
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def submit(self, kind: str, request: BaseModel, callback_url: Optional[str] = None) -> TaskInfo:
+        """Persist a task and queue it; returns immediately with the queued TaskInfo.
+
+        Raises InvalidCallbackUrl for a callback_url that is not a public http(s) URL (or an allowed host).
+        """
+        if callback_url is not None:
+            await check_callback_url(callback_url)
+        now = time.time()
+        task = TaskInfo(kind=kind, callback_url=callback_url, created_at=now, updated_at=now)
+        self.store.create(task, request.model_dump_json())
+        await self._push(task.task_id)
+        return task
+
+    async def _push(self, task_id: str) -> None:
+        if self._redis is not None:
+            await self._redis.rpush(TASK_QUEUE_NAME, task_id)
+        else:
+            self._local.put_nowait(task_id)
+
+    async def _pop(self) -> str:
+        if self._redis is not None:
+            _, task_id = await self._redis.blpop([TASK_QUEUE_NAME])
+            return task_id.decode("utf-8")
+        return await self._local.get()
+
+    async def _worker(self) -> None:
+        while True:
+            task_id = await self._pop()
+            try:
+                await self._run(task_id)
+            except Exception:
+                logger.exception("Task %s could not be processed", task_id)
+
+    async def _run(self, task_id: str) -> None:
+        if not self.store.claim(task_id, self.instance_id):
+            if self.store.get_payload(task_id) is None:
+                logger.error("Task %s is not in the task store %s; is TASK_STORE_PATH shared by every worker "
+                             "on the queue?", task_id, self.store.path)
+            return  # finished, or already picked up via a duplicate queue entry
+        task = self.store.get(task_id)
+        self._notify(task_id)
+        request_model, handler = TASK_HANDLERS[task.kind]
+        try:
+            result = await handler(request_model.model_validate_json(self.store.get_payload(task_id)))
+        except Exception as e:
+            task.error = str(e)
+            if task.attempts < self.max_attempts:
+                logger.warning("Task %s attempt %d failed, retrying: %s", task_id, task.attempts, e)
+                task.status = "queued"
+                self.store.save(task)
+                self._notify(task_id)
+                self._retry_later(task_id, self.retry_backoff * 2 ** (task.attempts - 1))
+                return
+            logger.exception("Task %s failed after %d attempts", task_id, task.attempts)
+            task.status = "failed"
+        else:
+            task.status = "succeeded"
+            task.result = result.model_dump(mode="json")
+            task.error = None
+        self.store.save(task)
+        self._notify(task_id)
+        if task.callback_url:
+            await send_callback(task)
+
+    def _retry_later(self, task_id: str, delay: float) -> None:
+        """Re-queue after a backoff without holding a worker; a restart meanwhile re-enqueues it anyway."""
+        async def retry():
+            await asyncio.sleep(delay)
+            await self._push(task_id)
+
+        timer = asyncio.create_task(retry())
+        self._timers.add(timer)
+        timer.add_done_callback(self._timers.discard)
+
+    def _notify(self, task_id: str) -> None:
+        for event in self._listeners.get(task_id, ()):
+            event.set()
+
+    async def wait_for_update(self, task_id: str, timeout: float) -> None:
+        """Wait until this process updates the task, or the timeout passes (other workers may have)."""
+        event = asyncio.Event()
+        self._listeners.setdefault(task_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            listeners = self._listeners.get(task_id)
+            listeners.discard(event)
+            if not listeners:
+                del self._listeners[task_id]
+
+
+async def check_callback_url(url: str) -> None:
+    """Raise InvalidCallbackUrl unless `url` is http(s) to an allowed host, or to a host that resolves
+    only to public addresses (no loopback, private, link-local or reserved ranges) when no allowlist is set.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidCallbackUrl("callback_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    if TASK_CALLBACK_ALLOWED_HOSTS:
+        if host not in TASK_CALLBACK_ALLOWED_HOSTS:
+            raise InvalidCallbackUrl(f"callback_url host {host} is not in TASK_CALLBACK_ALLOWED_HOSTS")
+        return
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, parts.port or 443, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise InvalidCallbackUrl(f"callback_url host {host} does not resolve")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if not address.is_global or address.is_multicast:
+            raise InvalidCallbackUrl(f"callback_url host {host} resolves to a non-public address")
+
+
+async def send_callback(task: TaskInfo) -> None:
+    """POST the finished TaskInfo to its callback_url, retrying transient failures."""
+    try:
+        # Checked again at send time, in case the host now resolves elsewhere
+        await check_callback_url(task.callback_url)
+    except InvalidCallbackUrl as e:
+        logger.warning("Callback for task %s not sent: %s", task.task_id, e)
+        return
+    async with httpx.AsyncClient(timeout=TASK_CALLBACK_TIMEOUT_SECONDS) as client:
+        for attempt in range(TASK_CALLBACK_ATTEMPTS):
+            try:
+                response = await client.post(task.callback_url, json=task.model_dump(mode="json"))
+                if response.status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            if attempt + 1 < TASK_CALLBACK_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+    logger.error("Callback for task %s to %s failed after %d attempts", task.task_id, task.callback_url,
+                 TASK_CALLBACK_ATTEMPTS)
+
+
+task_store = TaskStore()
+task_queue = TaskQueue(task_store)
@@ -0,0 +1,190 @@
+import html
+import os
+import re
+import unicodedata
+from typing import List, Optional, Set, Tuple
+
+TEXTPREP_ENABLED = os.getenv("TEXTPREP_ENABLED", "1") == "1"
+JD_TOKEN_BUDGET = int(os.getenv("JD_TOKEN_BUDGET", "1200"))
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "1200"))
+
+_BLOCK_TAG = re.compile(r"<\s*(br|/p|/div|/h[1-6]|/tr|/ul|/ol)\b[^>]*>", re.IGNORECASE)
+_HEADING_TAG = re.compile(r"<\s*h[1-6]\b[^>]*>", re.IGNORECASE)
+_LIST_ITEM_TAG = re.compile(r"<\s*li\b[^>]*>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+_BULLET = re.compile(r"^\s*(?:[•●▪◦‣∙·*\-–—]|\d+[.)])\s+")
+_SPACES = re.compile(r"[ \t\f\v ​]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# In low-priority sections (company, benefits), paragraphs mentioning any of these are legal/recruiting
+# boilerplate with no signal for the model
+_BOILERPLATE = re.compile(
+    r"equal (?:employment )?opportunity|without regard to (?:race|age|sex)|affirmative action"
+    r"|reasonable accommodation|e-verify|pay transparency|protected (?:veteran|characteristic)"
+    r"|background check|drug[- ]free|fraudulent|recruit(?:ment|ing) (?:agencies|scams?)"
+    r"|unsolicited resumes?|privacy (?:notice|policy)|applicants? (?:with|who have) disabilities"
+    r"|sexual orientation|gender identity|national origin|genetic information",
+    re.IGNORECASE,
+)
+# Elsewhere only paragraphs that open as a whole EEO/recruiting statement are dropped, so duties such as
+# "flag fraudulent transactions" or "run background checks" survive
+_BOILERPLATE_STATEMENT = re.compile(
+    r"^(?:- )?(?:"
+    r"[\w&.,'’ -]{0,80}\b(?:is|are) (?:an? )?(?:proud )?(?:equal (?:employment )?opportunity|affirmative action) employers?"
+    r"|all qualified applicants (?:will )?receive consideration"
+    r"|(?:we|[\w&.,'’ -]{0,80}) (?:will )?(?:provides?|offers?) reasonable accommodations?"
+    r"|(?:we|[\w&.,'’ -]{0,80}) (?:does|do) not (?:accept unsolicited resumes|discriminate)"
+    r"|(?:this employer )?participates in e-verify|pay transparency|(?:please )?beware of (?:fraudulent|recruit)"
+    r"|equal (?:employment )?opportunity\b|eeo\b"
+    r")",
+    re.IGNORECASE,
+)
+
+# Section priority by heading keyword: lower is kept first when trimming to the budget
+_SECTION_PRIORITIES: List[Tuple[re.Pattern, int]] = [
+    (re.compile(r"responsibilit|what you.?ll do|duties|the role|day[- ]to[- ]day|you will", re.I), 0),
+    (re.compile(r"requirement|qualification|must have|skills|experience|what you.?ll need|you have|tech stack", re.I), 0),
+    (re.compile(r"preferred|nice to have|bonus|plus", re.I), 1),
+    (re.compile(r"summary|overview|about (?:the|this) (?:role|position|job)|description", re.I), 1),
+    (re.compile(r"about (?:us|the company|the team)|who we are|our (?:mission|culture)|company", re.I), 3),
+    (re.compile(r"benefit|perks|compensation|salary|pay range|what we offer|why join", re.I), 4),
+    (re.compile(r"equal opportunity|eeo|disclaimer|accommodation|how to apply", re.I), 5),
+]
+_CORE_PRIORITY = 0  # responsibilities and requirements: never dropped
+_DEFAULT_PRIORITY = 2
+_BOILERPLATE_PRIORITY = 3  # sections from here on are filtered by keyword
+_DROP_PRIORITY = 5
+_CORE_MIN_TOKENS = 120  # each core section keeps at least this much once the budget is spent
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting prompt size."""
+    return len(text) // 4 + 1
+
+
+def normalize(text: str) -> str:
+    """Strip HTML, unify bullets and unicode, and collapse repeated whitespace."""
+    if "<" in text:
+        text = _HEADING_TAG.sub("\n# ", text)
+        text = _BLOCK_TAG.sub("\n", text)
+        text = _LIST_ITEM_TAG.sub("\n- ", text)
+        text = _TAG.sub(" ", text)
+    text = unicodedata.normalize("NFKC", html.unescape(text))
+    lines = []
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = _SPACES.sub(" ", _BULLET.sub("- ", line)).strip()
+        lines.append(line)
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _is_heading(line: str) -> bool:
+    if not line or line.startswith("- ") or len(line) > 60:
+        return False
+    if line.endswith(":") or line.startswith("#") or (line.isupper() and len(line.split()) <= 6):
+        return True
+    # Short unpunctuated lines that name a known section, e.g. "Who we are"
+    return len(line.split()) <= 6 and line[-1] not in ".!?," and _priority(line) != _DEFAULT_PRIORITY
+
+
+def _priority(heading: str) -> int:
+    for pattern, priority in _SECTION_PRIORITIES:
+        if pattern.search(heading):
+            return priority
+    return _DEFAULT_PRIORITY
+
+
+def split_sections(text: str) -> List[Tuple[int, str]]:
+    """Split normalized text into (priority, section text) at heading lines, preserving order."""
+    sections: List[Tuple[int, List[str]]] = [(_DEFAULT_PRIORITY, [])]
+    for line in text.split("\n"):
+        if _is_heading(line):
+            sections.append((_priority(line), [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(priority, "\n".join(lines).strip()) for priority, lines in sections if "\n".join(lines).strip()]
+
+
+def strip_boilerplate(text: str, seen: Optional[Set[str]] = None, priority: int = _DEFAULT_PRIORITY) -> str:
+    """Drop boilerplate paragraphs and bullets, and exact repeats of earlier ones.
+
+    Sections at `_BOILERPLATE_PRIORITY` or below in importance lose any paragraph mentioning
+    boilerplate keywords; others only lose paragraphs that are EEO/recruiting statements.
+    """
+    seen = set() if seen is None else seen
+    pattern = _BOILERPLATE.search if priority >= _BOILERPLATE_PRIORITY else _BOILERPLATE_STATEMENT.match
+    kept = []
+    for paragraph in text.split("\n"):
+        key = paragraph.casefold()
+        if paragraph and (key in seen or pattern(paragraph)):
+            continue
+        if paragraph:
+            seen.add(key)
+        kept.append(paragraph)
+    return _BLANK_LINES.sub("\n\n", "\n".join(kept)).strip()
+
+
+def split_sentences(text: str, min_chars: int = 0) -> List[str]:
+    """Split text at sentence ends and line breaks, joining pieces shorter than `min_chars` to the next."""
+    sentences: List[str] = []
+    pending = ""
+    for piece in _SENTENCE_BREAK.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    """Cut text to the budget at a sentence or line boundary where possible."""
+    limit = token_budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = max(cut.rfind("\n"), max((m.start() for m in _SENTENCE_END.finditer(cut)), default=-1))
+    return cut[:boundary].rstrip() if boundary > limit // 2 else cut.rstrip()
+
+
+def prepare_job_description(text: str, token_budget: int = JD_TOKEN_BUDGET) -> str:
+    """Normalize a posting, strip boilerplate and fit it to the token budget by section priority."""
+    if not TEXTPREP_ENABLED or not text:
+        return text
+    seen: Set[str] = set()
+    sections = []
+    for index, (priority, section) in enumerate(split_sections(normalize(text))):
+        if priority >= _DROP_PRIORITY:
+            continue
+        stripped = strip_boilerplate(section, seen, priority)
+        if priority == _CORE_PRIORITY and not stripped.partition("\n")[2].strip():
+            # Responsibilities and requirements are never lost to the filter (or to deduplication)
+            stripped = section
+        if stripped:
+            sections.append((index, priority, stripped))
+
+    kept = {}
+    remaining = token_budget
+    for index, priority, section in sorted(sections, key=lambda item: (item[1], item[0])):
+        budget = max(remaining, _CORE_MIN_TOKENS) if priority == _CORE_PRIORITY else remaining
+        if budget <= 0:
+            break
+        tokens = estimate_tokens(section)
+        kept[index] = section if tokens <= budget else _truncate(section, budget)
+        remaining -= tokens
+    return "\n\n".join(kept[index] for index in sorted(kept) if kept[index])
+
+
+def prepare_resume(text: str, token_budget: int = RESUME_TOKEN_BUDGET) -> str:
+    """Normalize a resume and fit it to the token budget."""
+    if not TEXTPREP_ENABLED or not text:
+        return text
+    return _truncate(normalize(text), token_budget)
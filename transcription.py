@@ -0,0 +1,173 @@
+import asyncio
+import io
+import os
+import threading
+import wave
+from typing import Any, BinaryIO, Callable, List, NamedTuple, Optional
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+STT_CHUNKING_MIN_SECONDS = float(os.getenv("STT_CHUNKING_MIN_SECONDS", "60"))  # shorter recordings go single-shot
+STT_SEGMENT_SECONDS = float(os.getenv("STT_SEGMENT_SECONDS", "30"))  # target segment length
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", "4"))
+
+_WINDOW_SECONDS = 0.02  # RMS analysis window
+_SILENCE_SECONDS = 0.3  # cuts land in a quiet stretch of about this length
+_SILENCE_RATIO = 1.5
+_ANALYSIS_WINDOWS = 500  # RMS windows read per block while looking for cuts (10 s of audio)
+# Sample width in bytes -> (dtype, offset to centre unsigned samples); 24-bit audio is not split
+_SAMPLE_TYPES = {1: (np.uint8, 128), 2: (np.int16, 0), 4: (np.int32, 0)}
+
+
+class AudioSegment(NamedTuple):
+    start: float  # seconds from the start of the recording
+    end: float
+    start_frame: int
+    end_frame: int
+
+
+def wav_duration(fileobj: BinaryIO) -> Optional[float]:
+    """Duration in seconds if the file is a PCM WAV we can split, else None. Leaves the file at 0."""
+    try:
+        with wave.open(fileobj, "rb") as wav:
+            if wav.getsampwidth() not in _SAMPLE_TYPES:
+                return None
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError):
+        return None
+    finally:
+        fileobj.seek(0)
+
+
+def _window_rms(frames: bytes, sample_width: int, channels: int, window: int) -> np.ndarray:
+    dtype, offset = _SAMPLE_TYPES[sample_width]
+    samples = np.frombuffer(frames, dtype=dtype).astype(np.float32) - offset
+    mono = samples[: len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    usable = len(mono) // window * window
+    return np.sqrt(np.mean(mono[:usable].reshape(-1, window) ** 2, axis=1))
+
+
+def silence_cuts(rms: np.ndarray, segment_windows: int, silence_windows: int) -> List[int]:
+    """Window indices to cut at, searching 0.5x-1.5x the target length after each cut.
+
+    Stretches within 1.5x of the quietest level in the range count as silence; of those, the one
+    closest to the target length wins, which keeps segments even for the worker pool.
+    """
+    if silence_windows > 1:
+        rms = np.convolve(rms, np.ones(silence_windows) / silence_windows, mode="same")
+    cuts = []
+    start = 0
+    while len(rms) - start > segment_windows * 1.5:
+        low = start + segment_windows // 2
+        high = min(start + segment_windows * 3 // 2, len(rms))
+        quiet = rms[low:high]
+        candidates = np.flatnonzero(quiet <= quiet.min() * _SILENCE_RATIO + 1e-6)
+        start = low + int(candidates[np.argmin(np.abs(candidates + low - start - segment_windows))])
+        cuts.append(start)
+    return cuts
+
+
+def split_wav(fileobj: BinaryIO, segment_seconds: float = STT_SEGMENT_SECONDS) -> List[AudioSegment]:
+    """Find cuts at silences that split a PCM WAV into segments of roughly `segment_seconds`.
+
+    Frames are read a block at a time, so only the per-window loudness of the recording is held
+    in memory; segment_wav reads each segment's frames when it is sent.
+    """
+    with wave.open(fileobj, "rb") as wav:
+        params = wav.getparams()
+        window = max(1, int(params.framerate * _WINDOW_SECONDS))
+        rms = []
+        while True:
+            frames = wav.readframes(window * _ANALYSIS_WINDOWS)
+            if not frames:
+                break
+            rms.append(_window_rms(frames, params.sampwidth, params.nchannels, window))
+    fileobj.seek(0)
+
+    cuts = silence_cuts(np.concatenate(rms) if rms else np.zeros(0, dtype=np.float32),
+                        int(segment_seconds / _WINDOW_SECONDS), int(_SILENCE_SECONDS / _WINDOW_SECONDS))
+    boundaries = [0] + [cut * window for cut in cuts] + [params.nframes]
+    return [
+        AudioSegment(start / params.framerate, end / params.framerate, start, end)
+        for start, end in zip(boundaries, boundaries[1:])
+    ]
+
+
+def segment_wav(fileobj: BinaryIO, segment: AudioSegment, lock: threading.Lock) -> io.BytesIO:
+    """A standalone WAV of one segment, read from the recording now; `lock` guards the shared file."""
+    buffer = io.BytesIO()
+    with lock:
+        fileobj.seek(0)
+        with wave.open(fileobj, "rb") as wav:
+            params = wav.getparams()
+            wav.setpos(segment.start_frame)
+            frames = wav.readframes(segment.end_frame - segment.start_frame)
+        fileobj.seek(0)
+    with wave.open(buffer, "wb") as out:
+        out.setparams(params)
+        out.writeframes(frames)
+    buffer.seek(0)
+    return buffer
+
+
+def _shifted(items: Optional[list], offset: float) -> Optional[list]:
+    """Copy timestamped items (SDK models or dicts) as dicts with start/end moved by `offset` seconds."""
+    if not isinstance(items, list):
+        return None
+    shifted = []
+    for item in items:
+        item = item.model_dump() if hasattr(item, "model_dump") else dict(item) if isinstance(item, dict) else item
+        if isinstance(item, dict):
+            for field in ("start", "end"):
+                if isinstance(item.get(field), (int, float)):
+                    item[field] = item[field] + offset
+        shifted.append(item)
+    return shifted
+
+
+def stitch(segments: List[AudioSegment], results: List[Any]) -> dict:
+    """Merge per-segment transcriptions into one, with timestamps relative to the whole recording.
+
+    Speaker labels are kept as each segment reported them; diarization runs per segment, so
+    labels only line up across segments when the recording has a single dominant speaker.
+    """
+    text, words, audio_events, speakers = [], [], [], []
+    language_code = None
+    for segment, result in zip(segments, results):
+        segment_text = result.text if hasattr(result, "text") else str(result)
+        if segment_text.strip():
+            text.append(segment_text.strip())
+        language_code = language_code or getattr(result, "language_code", None)
+        words += _shifted(getattr(result, "words", None), segment.start) or []
+        audio_events += _shifted(getattr(result, "audio_events", None), segment.start) or []
+        speakers += _shifted(getattr(result, "speakers", None), segment.start) or []
+    return {
+        "transcription": " ".join(text),
+        "language_code": language_code,
+        "words": words or None,
+        "audio_events": audio_events or None,
+        "speakers": speakers or None,
+    }
+
+
+async def transcribe_chunked(fileobj: BinaryIO, transcribe: Callable[[tuple], Any],
+                             segment_seconds: float = STT_SEGMENT_SECONDS,
+                             max_concurrency: int = STT_MAX_CONCURRENCY) -> dict:
+    """Split a WAV at silences, run the blocking `transcribe(file_tuple)` on segments concurrently, and stitch.
+
+    A segment's WAV is built only once it is allowed to run, so at most `max_concurrency` are in memory.
+    """
+    segments = await run_in_threadpool(split_wav, fileobj, segment_seconds)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    lock = threading.Lock()
+
+    def send(index: int, segment: AudioSegment):
+        return transcribe((f"segment_{index}.wav", segment_wav(fileobj, segment, lock), "audio/wav"))
+
+    async def run(index: int, segment: AudioSegment):
+        async with semaphore:
+            return await run_in_threadpool(send, index, segment)
+
+    results = await asyncio.gather(*(run(index, segment) for index, segment in enumerate(segments)))
+    return stitch(segments, results)